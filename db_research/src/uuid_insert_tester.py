@@ -0,0 +1,155 @@
+"""Скорость вставки документов с _id UUIDv4 и UUIDv7.
+
+UUIDv4 попадает в случайное место индекса _id: когда индекс перестает
+помещаться в кэш WiredTiger, каждая вставка читает с диска случайную
+страницу и вызывает ее разбиение. UUIDv7 возрастает со временем,
+поэтому вставки идут в правый край индекса.
+
+Запуск:
+    python src/uuid_insert_tester.py --documents 10000000
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.collection import Collection
+
+# Маски 48 бит времени и 62 случайных бит.
+TIMESTAMP_MASK = (1 << 48) - 1
+RANDOM_MASK = (1 << 62) - 1
+
+
+class Uuid7Generator:
+    """UUIDv7 (RFC 9562), копия db.ids.Uuid7Generator сервиса.
+
+    db_research - отдельный проект со своими зависимостями
+    и окружением Python 3.13, пакеты сервиса (src) в нем не
+    устанавливаются, поэтому генератор не импортируется, а повторен
+    здесь. При изменении db/ids.py его нужно обновить.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+        self._counter = 0
+
+    def __call__(self) -> uuid.UUID:
+        random_bits = int.from_bytes(os.urandom(10), 'big')
+        with self._lock:
+            timestamp = time.time_ns() // 1_000_000
+            if timestamp > self._last_timestamp:
+                self._counter = random_bits >> 69
+            else:
+                timestamp = self._last_timestamp
+                self._counter += 1
+                if self._counter > 0xFFF:
+                    timestamp += 1
+                    self._counter = 0
+            self._last_timestamp = timestamp
+            counter = self._counter
+        uuid_int = (timestamp & TIMESTAMP_MASK) << 80 | 0x7 << 76
+        uuid_int |= counter << 64 | 0b10 << 62
+        return uuid.UUID(int=uuid_int | random_bits & RANDOM_MASK)
+
+
+uuid7 = Uuid7Generator()
+
+
+def make_batch(id_factory: Callable[[], uuid.UUID], size: int) -> list[dict]:
+    """Создает пачку документов лайков рецензий."""
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            '_id': id_factory(),
+            'review_id': uuid.uuid4(),
+            'user_id': uuid.uuid4(),
+            'is_like': True,
+            'created_at': now,
+        }
+        for _ in range(size)
+    ]
+
+
+def run(
+    collection: Collection,
+    id_factory: Callable[[], uuid.UUID],
+    documents: int,
+    batch_size: int,
+    report_every: int,
+) -> float:
+    """Вставляет документы и возвращает общее время вставки.
+
+    Время генерации документов не учитывается.
+    """
+    collection.drop()
+    collection.create_index(
+        [('user_id', ASCENDING), ('created_at', DESCENDING)],
+    )
+    total_time = 0.0
+    chunk_time = 0.0
+    chunk_size = 0
+    inserted = 0
+    while inserted < documents:
+        batch = make_batch(id_factory, min(batch_size, documents - inserted))
+        started = time.perf_counter()
+        collection.insert_many(batch, ordered=False)
+        elapsed = time.perf_counter() - started
+        total_time += elapsed
+        chunk_time += elapsed
+        inserted += len(batch)
+        chunk_size += len(batch)
+        if inserted % report_every == 0 or inserted == documents:
+            print(
+                f'   {inserted:>11,} документов: '
+                f'{chunk_size / chunk_time:>9,.0f} док/сек',
+            )
+            chunk_time = 0.0
+            chunk_size = 0
+    return total_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=27019)
+    parser.add_argument('--documents', type=int, default=10_000_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--report-every', type=int, default=1_000_000)
+    arguments = parser.parse_args()
+
+    client = MongoClient(
+        arguments.host,
+        arguments.port,
+        uuidRepresentation='standard',
+    )
+    db = client['uuid_research']
+    results = {}
+    for name, id_factory in (('UUIDv4', uuid.uuid4), ('UUIDv7', uuid7)):
+        print(f'⏱️  {name}: вставка {arguments.documents:,} документов')
+        collection = db[f'review_likes_{name.lower()}']
+        total_time = run(
+            collection,
+            id_factory,
+            arguments.documents,
+            arguments.batch_size,
+            arguments.report_every,
+        )
+        stats = db.command('collStats', collection.name)
+        results[name] = total_time
+        print(
+            f'   Итого: {total_time:.1f} сек, '
+            f'{arguments.documents / total_time:,.0f} док/сек, '
+            f'индекс _id: {stats["indexSizes"]["_id_"] / 2 ** 20:.0f} МБ',
+        )
+        collection.drop()
+    print(f'Ускорение UUIDv7: x{results["UUIDv4"] / results["UUIDv7"]:.2f}')
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,16 @@
 from http import HTTPStatus
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 
+from api.v1.bulk import bulk_items_body
+from api.v1.pagination import STREAMED_PAGE_RESPONSES, page_response
+from api.v1.projection import FIELDS_QUERY, parse_fields
+from api.v1.streaming import ndjson_response
 from db.models import Bookmark
 from schemas.bookmark import BookmarkCreate, BookmarkResponse
+from schemas.bulk import BulkResponse
 from services.bookmark import BookmarkService
 
 router = APIRouter()
@@ -28,24 +34,77 @@ async def create_new_bookmark(
     return await BookmarkService.create_bookmark(bookmark)
 
 
+@router.post(
+    '/bulk',
+    response_model=BulkResponse,
+    summary='Пакетное создание закладок',
+    response_description='Результаты по элементам пакета',
+    status_code=HTTPStatus.OK,
+)
+async def create_bookmarks_bulk(
+    elements: list[dict[str, Any]] = bulk_items_body(BookmarkCreate),
+) -> BulkResponse:
+    """Пакетное создание закладок, например при импорте списка.
+
+    Элементы обрабатываются независимо: для каждого возвращается
+    статус, ошибки отдельных элементов не прерывают запись пакета.
+
+    - **created**: закладка создана.
+    - **exists**: закладка уже была.
+    - **duplicate**: элемент повторяет другой элемент пакета.
+    - **invalid**: элемент не прошел валидацию.
+    """
+    return await BookmarkService.bulk_create_bookmarks(elements)
+
+
 @router.get(
     '/{user_id}',
     response_model=list[Bookmark],
     summary='Просмотр закладки пользователя',
     response_description='Информация по закладке пользователя',
     status_code=HTTPStatus.OK,
+    responses=dict(STREAMED_PAGE_RESPONSES),
 )
 async def get_user_bookmarks(
     user_id: UUID,
-) -> list[Bookmark]:
-    """Просмотр закладок пользователя.
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    stream: bool = False,
+    fields: str | None = FIELDS_QUERY,
+) -> list[Bookmark] | Response:
+    """Просмотр закладок пользователя, новые первыми.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    При **stream**=true вся история, начиная с **cursor**, отдается
+    потоком в формате NDJSON без ограничения **limit**.
+    Параметр **fields** ограничивает поля ответа и чтение из базы.
 
     - **_id**: идентификатор закладки.
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **created_at**: время создания закладки.
     """
-    return await BookmarkService.get_user_bookmarks(user_id)
+    projection = parse_fields(fields, Bookmark)
+    if stream:
+        return ndjson_response(
+            BookmarkService.iter_user_bookmarks(user_id, cursor, projection),
+            Bookmark,
+            projection,
+        )
+    bookmarks, next_cursor = await BookmarkService.get_user_bookmarks(
+        user_id,
+        limit,
+        cursor,
+        projection,
+    )
+    return page_response(
+        response,
+        bookmarks,
+        next_cursor,
+        Bookmark,
+        projection,
+    )
 
 
 @router.delete(
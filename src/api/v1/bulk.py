@@ -0,0 +1,25 @@
+"""Тело запроса пакетной записи."""
+from typing import Any
+
+from fastapi import Body
+from pydantic import BaseModel
+
+from core.config import settings
+
+
+def bulk_items_body(schema: type[BaseModel]) -> Any:
+    """Описание тела запроса: массив элементов в формате schema.
+
+    Элементы проверяются по одному в сервисе, поэтому ошибка в одном
+    элементе не отклоняет весь пакет.
+    """
+    return Body(
+        ...,
+        min_length=1,
+        max_length=settings.bulk_max_items,
+        description=(
+            f'Элементы в формате {schema.__name__}, '
+            f'не более {settings.bulk_max_items}.'
+        ),
+        json_schema_extra={'items': schema.model_json_schema()},
+    )
@@ -0,0 +1,35 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+
+from core.cache import cache
+from schemas.cache import CacheStats
+
+router = APIRouter()
+
+
+@router.get(
+    '/stats',
+    response_model=CacheStats,
+    summary='Статистика кэша',
+    response_description='Счетчики кэша моделей чтения',
+    status_code=HTTPStatus.OK,
+)
+async def get_cache_stats() -> CacheStats:
+    """Получение статистики внутрипроцессного кэша.
+
+    Счетчики относятся к текущему воркеру приложения.
+
+    - **hits**: число попаданий.
+    - **misses**: число промахов.
+    - **coalesced**: число промахов, дождавшихся идущей загрузки.
+    - **evictions**: число вытесненных записей.
+    - **expirations**: число записей с истекшим временем жизни.
+    - **invalidations**: число сбросов.
+    - **shared_hits**: число ключей, найденных в общем уровне кэша.
+    - **shared_errors**: число ошибок общего уровня кэша.
+    - **backend**: общий уровень кэша (memory, redis) или null.
+    - **entries**: число записей в кэше.
+    - **bytes**: оценка объема записей в байтах.
+    """
+    return CacheStats(**cache.stats())
@@ -0,0 +1,108 @@
+"""Условные запросы: слабые ETag и ответ 304 Not Modified.
+
+ETag вычисляется по полям версии элементов ответа: идентификатору,
+времени изменения и счетчикам. Клиент (или nginx) передает полученный
+ETag в заголовке If-None-Match и, если данные не изменились, получает
+ответ 304 без тела.
+
+Last-Modified не выдается: счетчики лайков меняются без изменения
+updated_at, поэтому время изменения не описывает версию ответа.
+
+Изменения и удаления принимают ревизию - updated_at из последнего
+ответа - и возвращают 409, если документ изменили после чтения.
+"""
+import hashlib
+from http import HTTPStatus
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi import Header, Query, Response
+import orjson
+
+ETAG_HEADER = 'ETag'
+
+# Описания ответов для параметра responses эндпоинтов. FastAPI
+# принимает их словарями, поэтому эндпоинты передают копию (dict).
+Responses = Mapping[int | str, dict[str, Any]]
+
+IF_NONE_MATCH_HEADER = Header(
+    None,
+    description='ETag, полученный ранее. Если данные не изменились, '
+    'возвращается 304 без тела.',
+)
+
+REVISION_QUERY = Query(
+    None,
+    description='updated_at из последнего ответа. Если документ изменен '
+    'после него, изменение не выполняется и возвращается 409.',
+)
+
+ETAG_HEADER_SPEC: Mapping[str, Any] = MappingProxyType({
+    ETAG_HEADER: {
+        'description': 'Слабый ETag версии ответа.',
+        'schema': {'type': 'string'},
+    },
+})
+
+# Описание ответов эндпоинта с поддержкой условных запросов.
+CONDITIONAL_RESPONSES: Responses = MappingProxyType({
+    HTTPStatus.OK: {'headers': dict(ETAG_HEADER_SPEC)},
+    HTTPStatus.NOT_MODIFIED: {
+        'description': 'Данные не изменились',
+        'headers': dict(ETAG_HEADER_SPEC),
+    },
+})
+
+
+# Описание ответов эндпоинта изменения с проверкой ревизии.
+REVISION_RESPONSES: Responses = MappingProxyType({
+    HTTPStatus.CONFLICT: {'description': 'Документ изменен после чтения'},
+})
+
+
+def items_etag(documents: Iterable[Any], fields: Iterable[str]) -> str:
+    """Вычисляет слабый ETag по полям версии элементов."""
+    fields = sorted(fields)
+    versions = [
+        [getattr(document, name, None) for name in fields]
+        for document in documents
+    ]
+    digest = hashlib.blake2b(
+        orjson.dumps(versions, default=str),
+        digest_size=12,
+    )
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверяет If-None-Match слабым сравнением с текущим ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque_tag = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == opaque_tag
+        for tag in if_none_match.split(',')
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Возвращает ответ 304 с текущим ETag."""
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED,
+        headers={ETAG_HEADER: etag},
+    )
+
+
+def conditional_response(
+    response: Response,
+    if_none_match: Optional[str],
+    etag: str,
+    body: Any,
+) -> Any:
+    """Возвращает 304, если ETag совпал, иначе тело ответа с ETag."""
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers[ETAG_HEADER] = etag
+    return body
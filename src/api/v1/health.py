@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, HTTPException, Request
+
+from schemas.health import HealthStatus
+
+router = APIRouter()
+
+
+@router.get(
+    '/live',
+    response_model=HealthStatus,
+    summary='Проверка работы процесса',
+    response_description='Процесс отвечает на запросы',
+    status_code=HTTPStatus.OK,
+)
+async def get_liveness() -> HealthStatus:
+    """Проверка, что воркер приложения отвечает на запросы."""
+    return HealthStatus()
+
+
+@router.get(
+    '/ready',
+    response_model=HealthStatus,
+    summary='Проверка готовности',
+    response_description='Воркер готов принимать запросы',
+    status_code=HTTPStatus.OK,
+    responses={
+        HTTPStatus.SERVICE_UNAVAILABLE: {
+            'description': 'Воркер запускается или останавливается',
+        },
+    },
+)
+async def get_readiness(request: Request) -> HealthStatus:
+    """Проверка готовности воркера.
+
+    Воркер готов после подключения к MongoDB и прогрева пула
+    соединений и коллекций, до начала остановки.
+    """
+    if not getattr(request.app.state, 'ready', False):
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Приложение не готово',
+        )
+    return HealthStatus()
@@ -0,0 +1,77 @@
+"""Передача курсора следующей страницы в заголовке ответа.
+
+Тело ответа списочных эндпоинтов остается массивом, поэтому курсор
+не ломает совместимость с клиентами, использующими skip/limit.
+"""
+from dataclasses import dataclass
+from http import HTTPStatus
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from fastapi import Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from api.v1.etag import CONDITIONAL_RESPONSES, ETAG_HEADER_SPEC, Responses
+from api.v1.serialization import list_response
+from api.v1.streaming import NDJSON_CONTENT_SPEC
+from services.pagination import PageRequest
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+NEXT_CURSOR_HEADER_SPEC: Mapping[str, Any] = MappingProxyType({
+    NEXT_CURSOR_HEADER: {
+        'description': (
+            'Курсор следующей страницы. Отсутствует на последней странице.'
+        ),
+        'schema': {'type': 'string'},
+    },
+})
+
+# Описание ответа списочного эндпоинта с курсором и потоковым режимом.
+STREAMED_PAGE_RESPONSES: Responses = MappingProxyType({
+    HTTPStatus.OK: {
+        'headers': dict(NEXT_CURSOR_HEADER_SPEC),
+        'content': dict(NDJSON_CONTENT_SPEC),
+    },
+})
+
+# Описание ответов страницы с курсором и поддержкой условных запросов.
+CONDITIONAL_PAGE_RESPONSES: Responses = MappingProxyType({
+    **CONDITIONAL_RESPONSES,
+    HTTPStatus.OK: {
+        'headers': {**NEXT_CURSOR_HEADER_SPEC, **ETAG_HEADER_SPEC},
+    },
+})
+
+
+@dataclass
+class FilmworkReviewsPage(PageRequest):
+    """Параметры страницы рецензий кинопроизведения."""
+    skip: int = Query(0, ge=0)
+    limit: int = Query(50, ge=1, le=100)
+    sort_by: str = Query('created_at', regex='^(created_at|rating)$')
+    cursor: str | None = None
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Добавляет курсор следующей страницы в заголовки ответа."""
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def page_response(
+    response: Response,
+    documents: list[Any],
+    cursor: Optional[str],
+    schema: type[BaseModel],
+    fields: Optional[frozenset[str]] = None,
+) -> ORJSONResponse:
+    """Возвращает страницу списка с курсором следующей страницы.
+
+    Страница сериализуется без повторной валидации response_model,
+    с fields - только с запрошенными полями. Заголовки, заданные
+    эндпоинтом в response, сохраняются.
+    """
+    set_next_cursor(response, cursor)
+    return list_response(documents, schema, fields, response)
@@ -0,0 +1,44 @@
+"""Выдача списков с подмножеством полей (параметр fields).
+
+Ответ с проекцией собирается через api.v1.serialization: в нем есть
+только запрошенные поля.
+"""
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+FIELDS_QUERY = Query(
+    None,
+    description=(
+        'Поля ответа через запятую, например id,author_name,likes_count. '
+        'Остальные поля не читаются из базы.'
+    ),
+)
+
+
+def parse_fields(
+    fields: Optional[str],
+    schema: type[BaseModel],
+) -> Optional[frozenset[str]]:
+    """Разбирает параметр fields и проверяет поля по модели ответа.
+
+    Raises:
+        HTTPException: запрошены поля, которых нет в модели ответа.
+    """
+    if not fields:
+        return None
+    requested = frozenset(
+        name.strip() for name in fields.split(',') if name.strip()
+    )
+    unknown = requested.difference(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Неизвестные поля: {0}. Доступные поля: {1}'.format(
+                ', '.join(sorted(unknown)),
+                ', '.join(schema.model_fields),
+            ),
+        )
+    return requested
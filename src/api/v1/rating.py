@@ -1,9 +1,22 @@
+from datetime import datetime
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 
-from db.models import Rating
+from api.v1.etag import (
+    CONDITIONAL_RESPONSES,
+    IF_NONE_MATCH_HEADER,
+    REVISION_QUERY,
+    REVISION_RESPONSES,
+    conditional_response,
+    items_etag,
+)
+from api.v1.pagination import STREAMED_PAGE_RESPONSES, page_response
+from api.v1.projection import FIELDS_QUERY, parse_fields
+from api.v1.rating_batch import router as batch_router
+from api.v1.serialization import model_response
+from api.v1.streaming import ndjson_response
 from schemas.rating import (
     FilmworkRatingSummary,
     RatingCreate,
@@ -13,6 +26,8 @@ from schemas.rating import (
 from services.rating import RatingService
 
 router = APIRouter()
+# Пакетные эндпоинты вынесены в отдельный модуль.
+router.include_router(batch_router)
 
 
 @router.post(
@@ -24,14 +39,18 @@ router = APIRouter()
 )
 async def create_rating(
     rating: RatingCreate,
-) -> Rating:
+) -> Response:
     """Создание новой оценки кинопроизведения.
 
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **rating**: оценка от 0 до 10.
     """
-    return await RatingService.create_rating(rating)
+    return model_response(
+        await RatingService.create_rating(rating),
+        RatingResponse,
+        status_code=HTTPStatus.CREATED,
+    )
 
 
 @router.put(
@@ -40,20 +59,29 @@ async def create_rating(
     summary='Обновление оценки',
     response_description='Информация по обновленной оценке',
     status_code=HTTPStatus.OK,
+    responses=dict(REVISION_RESPONSES),
 )
 async def update_rating(
     user_id: UUID,
     rating_id: UUID,
     rating_data: RatingUpdate,
-) -> Rating:
+    revision: datetime | None = REVISION_QUERY,
+) -> Response:
     """Обновление существующей оценки.
 
+    Если передан **revision**, оценка обновляется, только если
+    не изменилась после чтения, иначе возвращается 409.
+
     - **rating**: новая оценка от 0 до 10.
     """
-    return await RatingService.update_rating(
-        user_id,
-        rating_id,
-        rating_data,
+    return model_response(
+        await RatingService.update_rating(
+            user_id,
+            rating_id,
+            rating_data,
+            revision,
+        ),
+        RatingResponse,
     )
 
 
@@ -67,7 +95,7 @@ async def update_rating(
 async def get_user_filmwork_rating(
     user_id: UUID,
     filmwork_id: UUID,
-) -> Rating:
+) -> Response:
     """Получение оценки пользователя для кинопроизведения.
 
     - **id**: идентификатор оценки.
@@ -75,7 +103,10 @@ async def get_user_filmwork_rating(
     - **user_id**: идентификатор пользователя.
     - **rating**: оценка от 0 до 10.
     """
-    return await RatingService.get_user_rating(user_id, filmwork_id)
+    return model_response(
+        await RatingService.get_user_rating(user_id, filmwork_id),
+        RatingResponse,
+    )
 
 
 @router.get(
@@ -84,19 +115,31 @@ async def get_user_filmwork_rating(
     summary='Сводная информация по рейтингам',
     response_description='Сводная информация по рейтингам кинопроизведения',
     status_code=HTTPStatus.OK,
+    responses=dict(CONDITIONAL_RESPONSES),
 )
 async def get_filmwork_rating_summary(
     filmwork_id: UUID,
-) -> FilmworkRatingSummary:
+    response: Response,
+    if_none_match: str | None = IF_NONE_MATCH_HEADER,
+) -> FilmworkRatingSummary | Response:
     """Получение сводной информации по рейтингам кинопроизведения.
 
+    Ответ содержит заголовок ETag. Если переданный **If-None-Match**
+    совпадает с ним, возвращается 304 без тела.
+
     - **filmwork_id**: идентификатор кинопроизведения.
     - **average_rating**: средний рейтинг.
     - **likes_count**: число лайков.
     - **dislikes_count**: число дизлайков.
     - **ratings_count**: суммарное число оценок.
     """
-    return await RatingService.get_filmwork_rating_summary(filmwork_id)
+    summary = await RatingService.get_filmwork_rating_summary(filmwork_id)
+    return conditional_response(
+        response,
+        if_none_match,
+        items_etag([summary], FilmworkRatingSummary.model_fields),
+        summary,
+    )
 
 
 @router.get(
@@ -105,17 +148,48 @@ async def get_filmwork_rating_summary(
     summary='Получение всех оценок пользователя',
     response_description='Список оценок пользователя',
     status_code=HTTPStatus.OK,
+    responses=dict(STREAMED_PAGE_RESPONSES),
 )
 async def get_user_ratings(
     user_id: UUID,
-) -> list[Rating]:
-    """Получение всех оценок пользователя.
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    stream: bool = False,
+    fields: str | None = FIELDS_QUERY,
+) -> Response:
+    """Получение оценок пользователя, недавно измененные первыми.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    При **stream**=true вся история, начиная с **cursor**, отдается
+    потоком в формате NDJSON без ограничения **limit**.
+    Параметр **fields** ограничивает поля ответа и чтение из базы.
+
     - **id**: идентификатор оценки.
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **rating**: оценка от 0 до 10.
     """
-    return await RatingService.get_user_ratings(user_id)
+    projection = parse_fields(fields, RatingResponse)
+    if stream:
+        return ndjson_response(
+            RatingService.iter_user_ratings(user_id, cursor, projection),
+            RatingResponse,
+            projection,
+        )
+    ratings, next_cursor = await RatingService.get_user_ratings(
+        user_id,
+        limit,
+        cursor,
+        projection,
+    )
+    return page_response(
+        response,
+        ratings,
+        next_cursor,
+        RatingResponse,
+        projection,
+    )
 
 
 @router.delete(
@@ -124,15 +198,24 @@ async def get_user_ratings(
     summary='Удаление оценки',
     response_description='Информация по удаленной оценке',
     status_code=HTTPStatus.OK,
+    responses=dict(REVISION_RESPONSES),
 )
 async def delete_rating(
     user_id: UUID,
     filmwork_id: UUID,
-) -> Rating:
+    revision: datetime | None = REVISION_QUERY,
+) -> Response:
     """Удаление оценки пользователя для кинопроизведения.
+
+    Если передан **revision**, оценка удаляется, только если
+    не изменилась после чтения, иначе возвращается 409.
+
     - **id**: идентификатор оценки.
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **rating**: оценка от 0 до 10.
     """
-    return await RatingService.delete_rating(user_id, filmwork_id)
+    return model_response(
+        await RatingService.delete_rating(user_id, filmwork_id, revision),
+        RatingResponse,
+    )
@@ -0,0 +1,61 @@
+"""Пакетные эндпоинты оценок кинопроизведений."""
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import APIRouter
+
+from api.v1.bulk import bulk_items_body
+from schemas.bulk import BulkResponse
+from schemas.rating import (
+    FilmworkRatingSummariesRequest,
+    FilmworkRatingSummary,
+    RatingCreate,
+)
+from services.rating import RatingService
+
+router = APIRouter()
+
+
+@router.post(
+    '/bulk',
+    response_model=BulkResponse,
+    summary='Пакетное создание и изменение оценок',
+    response_description='Результаты по элементам пакета',
+    status_code=HTTPStatus.OK,
+)
+async def upsert_ratings_bulk(
+    elements: list[dict[str, Any]] = bulk_items_body(RatingCreate),
+) -> BulkResponse:
+    """Пакетное создание или изменение оценок кинопроизведений.
+
+    Элементы обрабатываются независимо: для каждого возвращается
+    статус, ошибки отдельных элементов не прерывают запись пакета.
+
+    - **created**: оценка создана.
+    - **updated**: оценка изменена.
+    - **duplicate**: элемент повторяет другой элемент пакета.
+    - **invalid**: элемент не прошел валидацию.
+    """
+    return await RatingService.bulk_upsert_ratings(elements)
+
+
+@router.post(
+    '/filmwork/summaries',
+    response_model=list[FilmworkRatingSummary],
+    summary='Сводная информация по рейтингам набора кинопроизведений',
+    response_description='Сводная информация по рейтингам кинопроизведений',
+    status_code=HTTPStatus.OK,
+)
+async def get_filmwork_rating_summaries(
+    request: FilmworkRatingSummariesRequest,
+) -> list[FilmworkRatingSummary]:
+    """Получение сводок по рейтингам для сетки кинопроизведений.
+
+    Сводки возвращаются в порядке **filmwork_ids** одним ответом,
+    повторяющиеся идентификаторы пропускаются.
+
+    - **filmwork_ids**: идентификаторы кинопроизведений, не более 100.
+    """
+    return await RatingService.get_filmwork_rating_summaries(
+        request.filmwork_ids,
+    )
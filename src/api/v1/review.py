@@ -1,13 +1,55 @@
+from datetime import datetime
+from functools import partial
 from http import HTTPStatus
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
 
+from api.v1.etag import (
+    CONDITIONAL_RESPONSES,
+    ETAG_HEADER,
+    IF_NONE_MATCH_HEADER,
+    REVISION_QUERY,
+    REVISION_RESPONSES,
+    etag_matches,
+    items_etag,
+    not_modified,
+)
+from api.v1.pagination import (
+    CONDITIONAL_PAGE_RESPONSES,
+    STREAMED_PAGE_RESPONSES,
+    FilmworkReviewsPage,
+    page_response,
+)
+from api.v1.projection import FIELDS_QUERY, parse_fields
+from api.v1.serialization import model_response
+from api.v1.streaming import ndjson_response
 from schemas.review import ReviewCreate, ReviewResponse, ReviewUpdate
 from services.review import ReviewService
 
 router = APIRouter()
 
+# Поля, по которым вычисляется ETag рецензии.
+REVIEW_VERSION_FIELDS = frozenset(
+    ('id', 'updated_at', 'likes_count', 'dislikes_count', 'user_vote'),
+)
+
+
+def review_version_fields(
+    projection: Optional[frozenset[str]],
+) -> frozenset[str]:
+    """Возвращает поля версии для ответа с запрошенными полями.
+
+    Время изменения учитывается всегда: оно меняется при правке любого
+    поля рецензии.
+    """
+    if projection is None:
+        return REVIEW_VERSION_FIELDS
+    return REVIEW_VERSION_FIELDS.intersection(projection).union(
+        ('id', 'updated_at'),
+    )
+
 
 @router.post(
     '/',
@@ -18,7 +60,7 @@ router = APIRouter()
 )
 async def create_review(
     review: ReviewCreate,
-) -> ReviewResponse:
+) -> Response:
     """Создание рецензии на кинопроизведение.
 
     - **filmwork_id**: идентификатор кинопроизведения.
@@ -27,8 +69,11 @@ async def create_review(
     - **author_name**: имя автора.
     - **rating**: оценка от 0 до 10 (опционально).
     """
-    new_review = await ReviewService.create_review(review)
-    return await ReviewService.get_review(new_review.id, review.user_id)
+    return model_response(
+        await ReviewService.create_review(review),
+        ReviewResponse,
+        status_code=HTTPStatus.CREATED,
+    )
 
 
 @router.put(
@@ -37,15 +82,20 @@ async def create_review(
     summary='Обновление рецензии',
     response_description='Информация по обновленной рецензии',
     status_code=HTTPStatus.OK,
+    responses=dict(REVISION_RESPONSES),
 )
 async def update_review(
     review_id: UUID,
     review_data: ReviewUpdate,
     # TODO Получать через авторизацию JWT.
     user_id: UUID | None = None,
-) -> ReviewResponse:
+    revision: datetime | None = REVISION_QUERY,
+) -> Response:
     """Обновление рецензии.
 
+    Если передан **revision**, рецензия обновляется, только если
+    не изменилась после чтения, иначе возвращается 409.
+
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **text**: текст рецензии.
@@ -54,11 +104,15 @@ async def update_review(
     - **dislikes_count**: число дизлайков.
     - **user_vote**: какую оценку дал пользователь.
     """
-    updated_review = await ReviewService.update_review(
-        review_id,
-        review_data,
+    return model_response(
+        await ReviewService.update_review(
+            review_id,
+            review_data,
+            user_id,
+            revision,
+        ),
+        ReviewResponse,
     )
-    return await ReviewService.get_review(updated_review.id, user_id)
 
 
 @router.get(
@@ -67,14 +121,20 @@ async def update_review(
     summary='Получение рецензии',
     response_description='Информация по рецензии',
     status_code=HTTPStatus.OK,
+    responses=dict(CONDITIONAL_RESPONSES),
 )
 async def get_review(
     review_id: UUID,
+    response: Response,
     # TODO Получать через авторизацию JWT.
     user_id: UUID | None = None,
-) -> ReviewResponse:
+    if_none_match: str | None = IF_NONE_MATCH_HEADER,
+) -> Response:
     """Получение рецензии по ID.
 
+    Ответ содержит заголовок ETag. Если переданный **If-None-Match**
+    совпадает с ним, возвращается 304 без чтения рецензии целиком.
+
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **text**: текст рецензии.
@@ -83,7 +143,21 @@ async def get_review(
     - **dislikes_count**: число дизлайков.
     - **user_vote**: какую оценку дал пользователь.
     """
-    return await ReviewService.get_review(review_id, user_id)
+    if if_none_match:
+        version = await ReviewService.get_review(
+            review_id,
+            user_id,
+            REVIEW_VERSION_FIELDS,
+        )
+        etag = items_etag([version], REVIEW_VERSION_FIELDS)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    review = await ReviewService.get_review(review_id, user_id)
+    response.headers[ETAG_HEADER] = items_etag(
+        [review],
+        REVIEW_VERSION_FIELDS,
+    )
+    return model_response(review, ReviewResponse, response)
 
 
 @router.get(
@@ -92,16 +166,25 @@ async def get_review(
     summary='Получение рецензий кинопроизведения',
     response_description='Список рецензий',
     status_code=HTTPStatus.OK,
+    responses=dict(CONDITIONAL_PAGE_RESPONSES),
 )
 async def get_filmwork_reviews(
     filmwork_id: UUID,
+    response: Response,
     user_id: UUID | None = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
-    sort_by: str = Query('created_at', regex='^(created_at|rating)$'),
-) -> list[ReviewResponse]:
+    page: FilmworkReviewsPage = Depends(),
+    fields: str | None = FIELDS_QUERY,
+    if_none_match: str | None = IF_NONE_MATCH_HEADER,
+) -> Response:
     """Получение рецензий для кинопроизведения с сортировкой.
 
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Если передан **cursor**, параметр **skip** не используется.
+    Параметр **fields** ограничивает поля ответа и чтение из базы:
+    например, без поля text получается компактный список.
+    Ответ содержит заголовок ETag. Если переданный **If-None-Match**
+    совпадает с ним, возвращается 304 без чтения рецензий целиком.
+
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **text**: текст рецензии.
@@ -110,12 +193,34 @@ async def get_filmwork_reviews(
     - **dislikes_count**: число дизлайков.
     - **user_vote**: какую оценку дал пользователь.
     """
-    return await ReviewService.get_filmwork_reviews(
+    projection = parse_fields(fields, ReviewResponse)
+    version_fields = review_version_fields(projection)
+    load_page = partial(
+        ReviewService.get_filmwork_reviews,
         filmwork_id,
+        page,
         user_id,
-        skip,
-        limit,
-        sort_by,
+    )
+
+    if if_none_match:
+        # Сначала читаются только поля версии: если страница
+        # не изменилась, рецензии целиком не запрашиваются.
+        etag = items_etag(
+            (await load_page(version_fields))[0],
+            version_fields,
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    reviews, next_cursor = await load_page(
+        None if projection is None else projection.union(version_fields),
+    )
+    response.headers[ETAG_HEADER] = items_etag(reviews, version_fields)
+    return page_response(
+        response,
+        reviews,
+        next_cursor,
+        ReviewResponse,
+        projection,
     )
 
 
@@ -125,11 +230,22 @@ async def get_filmwork_reviews(
     summary='Получение рецензий пользователя',
     response_description='Список рецензий пользователя',
     status_code=HTTPStatus.OK,
+    responses=dict(STREAMED_PAGE_RESPONSES),
 )
 async def get_user_reviews(
     user_id: UUID,
-) -> list[ReviewResponse]:
-    """Получение всех рецензий пользователя.
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    stream: bool = False,
+    fields: str | None = FIELDS_QUERY,
+) -> Response:
+    """Получение рецензий пользователя, новые первыми.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    При **stream**=true вся история, начиная с **cursor**, отдается
+    потоком в формате NDJSON без ограничения **limit**.
+    Параметр **fields** ограничивает поля ответа и чтение из базы.
 
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
@@ -139,7 +255,26 @@ async def get_user_reviews(
     - **dislikes_count**: число дизлайков.
     - **user_vote**: какую оценку дал пользователь.
     """
-    return await ReviewService.get_user_reviews(user_id)
+    projection = parse_fields(fields, ReviewResponse)
+    if stream:
+        return ndjson_response(
+            ReviewService.iter_user_reviews(user_id, cursor, projection),
+            ReviewResponse,
+            projection,
+        )
+    reviews, next_cursor = await ReviewService.get_user_reviews(
+        user_id,
+        limit,
+        cursor,
+        projection,
+    )
+    return page_response(
+        response,
+        reviews,
+        next_cursor,
+        ReviewResponse,
+        projection,
+    )
 
 
 @router.delete(
@@ -148,14 +283,19 @@ async def get_user_reviews(
     summary='Удаление рецензии',
     response_description='Информация по удаленной рецензии',
     status_code=HTTPStatus.OK,
+    responses=dict(REVISION_RESPONSES),
 )
 async def delete_review(
     review_id: UUID,
     # TODO Получать через авторизацию JWT.
     user_id: UUID,
-) -> ReviewResponse:
+    revision: datetime | None = REVISION_QUERY,
+) -> Response:
     """Удаление рецензии.
 
+    Если передан **revision**, рецензия удаляется, только если
+    не изменилась после чтения, иначе возвращается 409.
+
     - **filmwork_id**: идентификатор кинопроизведения.
     - **user_id**: идентификатор пользователя.
     - **text**: текст рецензии.
@@ -164,4 +304,7 @@ async def delete_review(
     - **dislikes_count**: число дизлайков.
     - **user_vote**: какую оценку дал пользователь.
     """
-    return await ReviewService.delete_review(user_id, review_id)
+    return model_response(
+        await ReviewService.delete_review(user_id, review_id, revision),
+        ReviewResponse,
+    )
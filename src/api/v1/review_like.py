@@ -1,9 +1,21 @@
 from http import HTTPStatus
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 
+from api.v1.bulk import bulk_items_body
+from api.v1.etag import (
+    CONDITIONAL_RESPONSES,
+    IF_NONE_MATCH_HEADER,
+    conditional_response,
+    items_etag,
+)
+from api.v1.pagination import STREAMED_PAGE_RESPONSES, page_response
+from api.v1.projection import FIELDS_QUERY, parse_fields
+from api.v1.streaming import ndjson_response
 from db.models import ReviewLike
+from schemas.bulk import BulkResponse
 from schemas.review_like import (
     ReviewLikeCreate,
     ReviewLikeResponse,
@@ -33,29 +45,122 @@ async def create_or_update_review_like(
     return await ReviewLikeService.create_or_update_review_like(like_data)
 
 
+@router.post(
+    '/bulk',
+    response_model=BulkResponse,
+    summary='Пакетное добавление лайков/дизлайков рецензий',
+    response_description='Результаты по элементам пакета',
+    status_code=HTTPStatus.OK,
+)
+async def upsert_review_likes_bulk(
+    elements: list[dict[str, Any]] = bulk_items_body(ReviewLikeCreate),
+) -> BulkResponse:
+    """Пакетное добавление или изменение лайков/дизлайков рецензий.
+
+    Элементы обрабатываются независимо: для каждого возвращается
+    статус, ошибки отдельных элементов не прерывают запись пакета.
+
+    - **created**: голос добавлен.
+    - **updated**: голос изменен.
+    - **not_found**: рецензия не найдена.
+    - **duplicate**: элемент повторяет другой элемент пакета.
+    - **invalid**: элемент не прошел валидацию.
+    """
+    return await ReviewLikeService.bulk_upsert_review_likes(elements)
+
+
 @router.get(
     '/review/{review_id}/summary',
     response_model=ReviewLikeSummary,
     summary='Получение статистики лайков рецензии',
     response_description='Статистика лайков рецензии',
     status_code=HTTPStatus.OK,
+    responses=dict(CONDITIONAL_RESPONSES),
 )
 async def get_review_like_summary(
     review_id: UUID,
+    response: Response,
     # TODO Получать через авторизацию JWT.
     user_id: UUID | None = None,
-) -> ReviewLikeSummary:
+    if_none_match: str | None = IF_NONE_MATCH_HEADER,
+) -> ReviewLikeSummary | Response:
     """Получение статистики лайков рецензии.
 
+    Ответ содержит заголовок ETag. Если переданный **If-None-Match**
+    совпадает с ним, возвращается 304 без тела.
+
     - **review_id**: идентификатор рецензии.
     - **likes_count**: число лайков.
     - **dislikes_count**: число дизлайков.
     - **user_vote**: оценка пользователя.
     """
-    return await ReviewLikeService.get_review_like_summary(
+    summary = await ReviewLikeService.get_review_like_summary(
         review_id,
         user_id,
     )
+    return conditional_response(
+        response,
+        if_none_match,
+        items_etag([summary], ReviewLikeSummary.model_fields),
+        summary,
+    )
+
+
+@router.get(
+    '/user/{user_id}',
+    response_model=list[ReviewLikeResponse],
+    summary='Получение лайков/дизлайков пользователя',
+    response_description='Список лайков/дизлайков пользователя',
+    status_code=HTTPStatus.OK,
+    responses=dict(STREAMED_PAGE_RESPONSES),
+)
+async def get_user_review_likes(
+    user_id: UUID,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    stream: bool = False,
+    fields: str | None = FIELDS_QUERY,
+) -> list[ReviewLike] | Response:
+    """Получение лайков и дизлайков пользователя, новые первыми.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    При **stream**=true вся история, начиная с **cursor**, отдается
+    потоком в формате NDJSON без ограничения **limit**.
+    Параметр **fields** ограничивает поля ответа и чтение из базы.
+
+    - **id**: идентификатор лайка рецензии.
+    - **review_id**: идентификатор рецензии.
+    - **user_id**: идентификатор пользователя.
+    - **is_like**: True - лайк, False - дизлайк.
+    - **created_at**: дата создания.
+    """
+    projection = parse_fields(fields, ReviewLikeResponse)
+    if stream:
+        return ndjson_response(
+            ReviewLikeService.iter_user_review_likes(
+                user_id,
+                cursor,
+                projection,
+            ),
+            ReviewLikeResponse,
+            projection,
+        )
+    review_likes, next_cursor = (
+        await ReviewLikeService.get_user_review_likes(
+            user_id,
+            limit,
+            cursor,
+            projection,
+        )
+    )
+    return page_response(
+        response,
+        review_likes,
+        next_cursor,
+        ReviewLikeResponse,
+        projection,
+    )
 
 
 @router.delete(
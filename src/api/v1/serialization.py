@@ -0,0 +1,109 @@
+"""Сериализация ответов без повторной валидации.
+
+Сервисы возвращают документы, модели ответа и записи быстрого чтения,
+данные которых уже прошли валидацию при записи. Ответ собирается
+в словарь за один проход по полям модели ответа и сериализуется
+orjson. response_model эндпоинта описывает ответ в OpenAPI, но
+готовый ORJSONResponse через него не проходит.
+"""
+from functools import cache
+from http import HTTPStatus
+from typing import Any, Iterable, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+@cache
+def response_fields(schema: type[BaseModel]) -> tuple[tuple[str, str], ...]:
+    """Пары (поле, ключ ответа) модели ответа.
+
+    Ключом служит псевдоним поля, как при by_alias=True; исключенные
+    из сериализации поля пропускаются.
+    """
+    return tuple(
+        (name, field.serialization_alias or field.alias or name)
+        for name, field in schema.model_fields.items()
+        if not field.exclude
+    )
+
+
+@cache
+def response_defaults(schema: type[BaseModel]) -> dict[str, Any]:
+    """Значения по умолчанию необязательных полей модели ответа."""
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in schema.model_fields.items()
+        if not field.is_required()
+    }
+
+
+def response_dict(
+    document: Any,
+    schema: type[BaseModel],
+    fields: Optional[frozenset[str]] = None,
+) -> dict[str, Any]:
+    """Возвращает поля модели ответа из документа, модели или записи.
+
+    Поля моделей читаются из __dict__, минуя __getattribute__
+    документов Beanie, поля записей (db.records) - по именам атрибутов.
+
+    Поля идут в порядке модели ответа. Отсутствующие у элемента
+    необязательные поля (например, голос пользователя у документа
+    Beanie) получают значения по умолчанию.
+    """
+    names = [
+        (name, key) for name, key in response_fields(schema)
+        if fields is None or name in fields
+    ]
+    defaults = response_defaults(schema)
+    if isinstance(document, BaseModel):
+        attributes = document.__dict__
+        return {
+            key: attributes.get(name, defaults.get(name))
+            for name, key in names
+        }
+    return {
+        key: getattr(document, name, defaults.get(name))
+        for name, key in names
+    }
+
+
+def json_response(
+    body: Any,
+    response: Optional[Response] = None,
+    status_code: int = HTTPStatus.OK,
+) -> ORJSONResponse:
+    """Возвращает готовый ответ, сохраняя заголовки response эндпоинта."""
+    json = ORJSONResponse(body, status_code=status_code)
+    if response is not None:
+        json.headers.update(response.headers)
+    return json
+
+
+def model_response(
+    document: Any,
+    schema: type[BaseModel],
+    response: Optional[Response] = None,
+    status_code: int = HTTPStatus.OK,
+) -> ORJSONResponse:
+    """Возвращает элемент в представлении модели ответа."""
+    return json_response(
+        response_dict(document, schema),
+        response,
+        status_code,
+    )
+
+
+def list_response(
+    documents: Iterable[Any],
+    schema: type[BaseModel],
+    fields: Optional[frozenset[str]] = None,
+    response: Optional[Response] = None,
+) -> ORJSONResponse:
+    """Возвращает список элементов с полями fields или всеми полями."""
+    return json_response(
+        [response_dict(document, schema, fields) for document in documents],
+        response,
+    )
@@ -0,0 +1,55 @@
+"""Потоковая выдача списков в формате NDJSON.
+
+Документы сериализуются по мере чтения из курсора MongoDB, поэтому
+память воркера не зависит от размера истории пользователя.
+"""
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Mapping, Optional
+
+from fastapi.responses import StreamingResponse
+import orjson
+from pydantic import BaseModel
+
+from api.v1.serialization import response_dict
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+NDJSON_CONTENT_SPEC: Mapping[str, Any] = MappingProxyType({
+    NDJSON_MEDIA_TYPE: {
+        'schema': {
+            'type': 'string',
+            'description': 'По одному JSON-объекту на строку (stream=true).',
+        },
+    },
+})
+
+
+async def ndjson_lines(
+    documents: AsyncIterator[Any],
+    schema: type[BaseModel],
+    fields: Optional[frozenset[str]] = None,
+) -> AsyncIterator[bytes]:
+    """Сериализует документы потока в строки NDJSON."""
+    async for document in documents:
+        yield orjson.dumps(
+            response_dict(document, schema, fields),
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+
+
+def ndjson_response(
+    documents: AsyncIterator[Any],
+    schema: type[BaseModel],
+    fields: Optional[frozenset[str]] = None,
+) -> StreamingResponse:
+    """Возвращает ответ, который сериализует документы по одному на строку.
+
+    Args:
+        documents: асинхронный поток документов.
+        schema: модель ответа, поля которой отдаются для документа.
+        fields: поля ответа или None для всех полей.
+    """
+    return StreamingResponse(
+        ndjson_lines(documents, schema, fields),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
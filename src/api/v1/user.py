@@ -0,0 +1,36 @@
+from http import HTTPStatus
+from uuid import UUID
+
+from fastapi import APIRouter
+
+from schemas.user import UserStateRequest, UserStateResponse
+from services.user import UserService
+
+router = APIRouter()
+
+
+@router.post(
+    '/{user_id}/state',
+    response_model=UserStateResponse,
+    summary='Состояние пользователя по кинопроизведениям',
+    response_description='Закладки, оценки и рецензии по кинопроизведениям',
+    status_code=HTTPStatus.OK,
+)
+async def get_user_filmworks_state(
+    user_id: UUID,
+    request: UserStateRequest,
+) -> UserStateResponse:
+    """Получение действий пользователя для набора кинопроизведений.
+
+    Заменяет отдельные запросы закладок, оценок и рецензий для каждого
+    кинопроизведения на странице каталога.
+
+    - **filmwork_ids**: идентификаторы кинопроизведений, не более 100.
+    - **bookmarked**: кинопроизведение в закладках.
+    - **rating**: оценка пользователя.
+    - **review_id**: идентификатор рецензии пользователя.
+    """
+    return await UserService.get_filmworks_state(
+        user_id,
+        request.filmwork_ids,
+    )
@@ -0,0 +1 @@
+"""Пакет со служебными командами обслуживания данных."""
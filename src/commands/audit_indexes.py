@@ -0,0 +1,23 @@
+"""Проверка планов запросов сервисов: поиск COLLSCAN и SORT в памяти.
+
+Запуск из директории src:
+    python -m commands.audit_indexes
+
+Код возврата 1, если хотя бы один запрос не обслуживается индексом.
+"""
+import asyncio
+import sys
+
+from db.index_audit import audit_indexes
+from db.mongo import get_client, init_db
+
+
+async def main() -> int:
+    async with get_client() as client:
+        await init_db(client)
+        problems = await audit_indexes()
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,171 @@
+"""Сравнение чтения через Beanie и быстрого чтения записями.
+
+Запуск из директории src:
+    python -m commands.bench_read_paths [--documents N] [--rounds N]
+
+Заполняет коллекции reviews и ratings тестовыми документами одного
+кинопроизведения и одного пользователя, измеряет время страниц
+ReviewService.get_filmwork_reviews и RatingService.get_user_ratings
+вместе со сборкой ответа для обоих путей и удаляет документы.
+Кэш на время измерения выключается, чтобы каждая страница читалась
+из MongoDB.
+"""
+import argparse
+import asyncio
+import contextlib
+from datetime import datetime, timedelta, timezone
+import logging
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel
+
+from api.v1.serialization import list_response
+from core.cache import cache
+from core.config import settings
+from db.models import Rating, Review
+from db.mongo import get_client, init_db
+from schemas.rating import RatingResponse
+from schemas.review import ReviewResponse
+from services.pagination import PageRequest
+from services.rating import RatingService
+from services.review import ReviewService
+
+PAGE_SIZE = 50
+
+# Страница сервиса: документы и курсор следующей страницы.
+Page = tuple[list[Any], Optional[str]]
+PageLoader = Callable[[], Awaitable[Page]]
+# Загрузка страницы и модель ответа для ее сборки.
+Benchmark = tuple[PageLoader, type[BaseModel]]
+
+logger = logging.getLogger(__name__)
+
+
+async def seed(documents: int) -> tuple[UUID, UUID]:
+    """Создает рецензии кинопроизведения и оценки пользователя."""
+    filmwork_id, user_id = uuid4(), uuid4()
+    now = datetime.now(timezone.utc)
+    await Review.get_pymongo_collection().insert_many([
+        {
+            '_id': uuid4(),
+            'filmwork_id': filmwork_id,
+            'user_id': uuid4(),
+            'text': 'Тестовая рецензия ' * 20,
+            'author_name': f'Автор {number}',
+            'rating': number % 11,
+            'created_at': now - timedelta(seconds=number),
+            'updated_at': now - timedelta(seconds=number),
+            'likes_count': number % 7,
+            'dislikes_count': number % 3,
+        }
+        for number in range(documents)
+    ])
+    await Rating.get_pymongo_collection().insert_many([
+        {
+            '_id': uuid4(),
+            'filmwork_id': uuid4(),
+            'user_id': user_id,
+            'rating': number % 11,
+            'created_at': now - timedelta(seconds=number),
+            'updated_at': now - timedelta(seconds=number),
+        }
+        for number in range(documents)
+    ])
+    return filmwork_id, user_id
+
+
+async def cleanup(filmwork_id: UUID, user_id: UUID) -> None:
+    """Удаляет тестовые документы."""
+    await Review.get_pymongo_collection().delete_many(
+        {'filmwork_id': filmwork_id},
+    )
+    await Rating.get_pymongo_collection().delete_many({'user_id': user_id})
+
+
+async def measure(
+    page: PageLoader,
+    schema: type[BaseModel],
+    rounds: int,
+) -> list[float]:
+    """Возвращает время каждой страницы в миллисекундах."""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        documents, _ = await page()
+        list_response(documents, schema).body
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(method: str, path: str, timings: list[float]) -> float:
+    """Выводит медиану и 95-й перцентиль времени страницы."""
+    median = statistics.median(timings)
+    logger.info(
+        '%-40s %-8s median %7.2f мс  p95 %7.2f мс',
+        method,
+        path,
+        median,
+        statistics.quantiles(timings, n=20)[-1],
+    )
+    return median
+
+
+def get_benchmarks(filmwork_id: UUID, user_id: UUID) -> dict[str, Benchmark]:
+    """Возвращает измеряемые страницы методов сервисов."""
+    return {
+        'ReviewService.get_filmwork_reviews': (
+            lambda: ReviewService.get_filmwork_reviews(
+                filmwork_id,
+                PageRequest(skip=PAGE_SIZE, limit=PAGE_SIZE),
+            ),
+            ReviewResponse,
+        ),
+        'RatingService.get_user_ratings': (
+            lambda: RatingService.get_user_ratings(
+                user_id,
+                limit=PAGE_SIZE,
+            ),
+            RatingResponse,
+        ),
+    }
+
+
+async def compare(method: str, benchmark: Benchmark, rounds: int) -> None:
+    """Измеряет страницу метода через Beanie и быстрым чтением."""
+    page, schema = benchmark
+    medians = {}
+    for path, methods in (('beanie', ''), ('records', method)):
+        settings.fast_read_methods = methods
+        # Прогрев пула соединений и кэшей pydantic.
+        await measure(page, schema, 5)
+        medians[path] = report(
+            method,
+            path,
+            await measure(page, schema, rounds),
+        )
+    logger.info(
+        '%-40s ускорение x%.2f',
+        method,
+        medians['beanie'] / medians['records'],
+    )
+
+
+async def main(documents: int, rounds: int) -> None:
+    async with get_client() as client, contextlib.AsyncExitStack() as stack:
+        await init_db(client, skip_indexes=True)
+        cache.enabled = False
+        filmwork_id, user_id = await seed(documents)
+        stack.push_async_callback(cleanup, filmwork_id, user_id)
+        for method, benchmark in get_benchmarks(filmwork_id, user_id).items():
+            await compare(method, benchmark, rounds)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.documents, arguments.rounds))
@@ -0,0 +1,125 @@
+"""Сравнение сериализации страницы рецензий: прежний и текущий путь.
+
+Запуск из директории src:
+    python -m commands.bench_serialization [--page-size N] [--rounds N]
+
+Измеряет только процессорное время сборки ответа, MongoDB не нужна.
+Прежний путь: ReviewResponse(**review.dict()), проверка и сериализация
+response_model в FastAPI и orjson. Текущий путь: запись ReviewRecord,
+словарь полей (api.v1.serialization) и orjson.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+import statistics
+import time
+from typing import Any, Callable
+from uuid import uuid4
+
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.v1.serialization import list_response
+from db.models import Review
+from db.records import ReviewRecord
+from schemas.review import ReviewResponse
+
+PAGE_FIELD = create_response_field('page', list[ReviewResponse])
+
+logger = logging.getLogger(__name__)
+
+
+def reviews_page(size: int) -> list[Review]:
+    """Создает страницу рецензий, как после чтения из MongoDB."""
+    now = datetime.now(timezone.utc)
+    return [
+        Review.model_construct(
+            id=uuid4(),
+            filmwork_id=uuid4(),
+            user_id=uuid4(),
+            text='Тестовая рецензия ' * 20,
+            author_name=f'Автор {number}',
+            rating=number % 11,
+            created_at=now - timedelta(seconds=number),
+            updated_at=now - timedelta(seconds=number),
+            likes_count=number % 7,
+            dislikes_count=number % 3,
+        )
+        for number in range(size)
+    ]
+
+
+async def validated_page(reviews: list[Review]) -> bytes:
+    """Прежний путь: три прохода по каждой рецензии."""
+    responses = [
+        ReviewResponse(**review.dict(), user_vote=None)
+        for review in reviews
+    ]
+    serialized = await serialize_response(
+        field=PAGE_FIELD,
+        response_content=responses,
+    )
+    return ORJSONResponse(serialized).body
+
+
+async def constructed_page(reviews: list[Review]) -> bytes:
+    """Текущий путь: словарь ответа собирается один раз."""
+    records = [
+        ReviewRecord.from_model(review, user_vote=None)
+        for review in reviews
+    ]
+    return list_response(records, ReviewResponse).body
+
+
+async def measure(
+    build: Callable[[list[Review]], Any],
+    reviews: list[Review],
+    rounds: int,
+) -> list[float]:
+    """Возвращает время сборки страницы в миллисекундах."""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await build(reviews)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(path: str, timings: list[float]) -> float:
+    """Выводит медиану и 95-й перцентиль времени сборки страницы."""
+    median = statistics.median(timings)
+    logger.info(
+        '%-12s median %7.3f мс  p95 %7.3f мс',
+        path,
+        median,
+        statistics.quantiles(timings, n=20)[-1],
+    )
+    return median
+
+
+async def main(page_size: int, rounds: int) -> None:
+    reviews = reviews_page(page_size)
+    medians = {}
+    for path, build in (
+        ('validated', validated_page),
+        ('constructed', constructed_page),
+    ):
+        # Прогрев кэшей pydantic и FastAPI.
+        await measure(build, reviews, 10)
+        medians[path] = report(path, await measure(build, reviews, rounds))
+    logger.info(
+        'Экономия на странице из %s рецензий: %.3f мс (x%.2f)',
+        page_size,
+        medians['validated'] - medians['constructed'],
+        medians['validated'] / medians['constructed'],
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=500)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.page_size, arguments.rounds))
@@ -0,0 +1,34 @@
+"""Создание индексов моделей в MongoDB.
+
+Запуск из директории src:
+    python -m commands.create_indexes
+
+Запускается при развертывании, если воркеры стартуют с
+mongo_skip_indexes=true. Перед созданием индексов удаляются дубликаты
+уникальных ключей (commands.dedup_documents), после создания
+удаляются индексы, которых больше нет в моделях.
+"""
+import asyncio
+import logging
+
+from db.dedup import remove_duplicates
+from db.mongo import get_client, init_db
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with get_client() as client:
+        await init_db(client, skip_indexes=True)
+        await remove_duplicates()
+        # Индексы, которых больше нет в моделях, удаляются.
+        await init_db(
+            client,
+            skip_indexes=False,
+            allow_index_dropping=True,
+        )
+    logger.info('Индексы созданы.')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
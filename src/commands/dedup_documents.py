@@ -0,0 +1,30 @@
+"""Удаление дубликатов перед созданием уникальных индексов.
+
+Запуск из директории src:
+    python -m commands.dedup_documents
+
+Команда запускается перед create_indexes (create_indexes выполняет ее
+сама). Удаление дубликатов оценок и лайков меняет данные, по которым
+построены счетчики, поэтому после него запускаются
+rebuild_review_counters и rebuild_rating_stats.
+"""
+import asyncio
+import logging
+
+from db.dedup import remove_duplicates
+from db.mongo import get_client, init_db
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with get_client() as client:
+        # Индексы не создаются: уникальные индексы не строятся, пока
+        # есть дубликаты.
+        await init_db(client, skip_indexes=True)
+        removed = await remove_duplicates()
+    logger.info('Удалено дубликатов: %s.', removed)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
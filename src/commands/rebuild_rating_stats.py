@@ -0,0 +1,23 @@
+"""Построение статистики оценок кинопроизведений по коллекции ratings.
+
+Запуск из директории src:
+    python -m commands.rebuild_rating_stats
+"""
+import asyncio
+import logging
+
+from db.mongo import get_client, init_db
+from services.rating import RatingService
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with get_client() as client:
+        await init_db(client)
+        await RatingService.rebuild_rating_stats()
+    logger.info('Статистика оценок кинопроизведений построена.')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
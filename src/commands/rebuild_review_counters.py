@@ -0,0 +1,23 @@
+"""Пересчет счетчиков лайков рецензий по коллекции review_likes.
+
+Запуск из директории src:
+    python -m commands.rebuild_review_counters
+"""
+import asyncio
+import logging
+
+from db.mongo import get_client, init_db
+from services.review_like import ReviewLikeService
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with get_client() as client:
+        await init_db(client)
+        await ReviewLikeService.rebuild_review_counters()
+    logger.info('Счетчики лайков рецензий пересчитаны.')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -2,18 +2,29 @@ import contextlib
 from http import HTTPStatus
 import logging
 
-from beanie import init_beanie
 from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
 from logstash import LogstashHandler  # type: ignore
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.starlette import StarletteIntegration
 
-from api.v1 import bookmark, rating, review, review_like
+from api.v1 import (
+    bookmark,
+    cache,
+    health,
+    rating,
+    review,
+    review_like,
+    user,
+)
+from core.cache import cache as read_cache
 from core.config import settings
-from db import models
+from core.dataloader import DataLoaderMiddleware
+from db.index_audit import audit_indexes
+from db.mongo import get_client, init_db, warm_up
+from services.review_like import ReviewLikeService, review_like_buffer
 
 
 def init_sentry():
@@ -29,25 +40,37 @@ def init_sentry():
     )
 
 
+async def prepare_db(client: AsyncMongoClient) -> None:
+    """Инициализирует Beanie, прогревает пул и проверяет индексы."""
+    await init_db(client)
+    await warm_up(client)
+    if settings.mongo_index_audit:
+        await audit_indexes()
+
+
+async def stop_buffers() -> None:
+    """Записывает ожидающие голоса и закрывает кэш."""
+    # Ожидающие голоса записываются до закрытия кэша и клиента MongoDB.
+    await review_like_buffer.close()
+    await read_cache.close()
+
+
 @contextlib.asynccontextmanager
-async def lifespan(_: FastAPI):
+async def lifespan(app: FastAPI):
 
+    # Пока воркер не прогрет, /health/ready отвечает 503.
+    app.state.ready = False
     init_sentry()
 
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        f'{settings.mongo_host}:{settings.mongo_port}',
-    )
-    await init_beanie(
-        database=client.ugc,  # type: ignore
-        document_models=[
-            models.Bookmark,
-            models.Rating,
-            models.Review,
-            models.ReviewLike,
-        ],
-    )
-    yield
-    client.close()
+    async with get_client() as client:
+        await prepare_db(client)
+        await read_cache.start()
+        await ReviewLikeService.warm_review_exists()
+        await review_like_buffer.start()
+        app.state.ready = True
+        yield
+        app.state.ready = False
+        await stop_buffers()
 
 
 def get_app() -> FastAPI:  # noqa CFQ004
@@ -66,6 +89,9 @@ def get_app() -> FastAPI:  # noqa CFQ004
         lifespan=lifespan,  # type: ignore
     )
 
+    # Пакетная загрузка по ключам в пределах запроса.
+    app.add_middleware(DataLoaderMiddleware)
+
     logging.getLogger('').addHandler(
         LogstashHandler(
             settings.logstash_host,
@@ -111,6 +137,21 @@ def get_app() -> FastAPI:  # noqa CFQ004
         prefix='/api/v1/review-likes',
         tags=['Review Like'],
     )
+    app.include_router(
+        user.router,
+        prefix='/api/v1/users',
+        tags=['User'],
+    )
+    app.include_router(
+        health.router,
+        prefix='/health',
+        tags=['Health'],
+    )
+    app.include_router(
+        cache.router,
+        prefix='/api/v1/cache',
+        tags=['Cache'],
+    )
 
     return app
 
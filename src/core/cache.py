@@ -0,0 +1,594 @@
+"""Внутрипроцессный кэш моделей чтения с TTL и вытеснением LRU.
+
+Размер кэша ограничен числом записей и суммарным объемом значений,
+объем оценивается по длине JSON значения. Одновременные промахи
+по одному ключу объединяются: загрузка из базы выполняется один раз,
+остальные запросы ждут ее результата.
+
+Вторым уровнем может быть подключено общее для воркеров хранилище
+(см. core.cache_backends): промахи сначала ищутся в нем, а сбросы
+ключей рассылаются остальным воркерам. Значения хранятся там в JSON
+и читаются pydantic по типу value_type, переданному вызывающим кодом,
+поэтому из общего хранилища не восстанавливаются произвольные объекты.
+
+Значения из кэша отдаются как есть и не должны изменяться вызывающим
+кодом.
+"""
+import asyncio
+from collections import Counter, OrderedDict
+import contextlib
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from itertools import repeat
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+from uuid import uuid4
+
+import orjson
+from pydantic import TypeAdapter
+
+from core.cache_backends import CacheBackend, SharedEntry, get_cache_backend
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повторной подпиской на сбросы после ошибки, в секундах.
+RESUBSCRIBE_DELAY = 1
+# Счетчики обращений, которые отдает stats().
+COUNTERS = (
+    'hits',
+    'misses',
+    'coalesced',
+    'evictions',
+    'expirations',
+    'invalidations',
+    'shared_hits',
+    'shared_errors',
+)
+
+KeyType = TypeVar('KeyType', bound=Hashable)
+ValueType = TypeVar('ValueType')
+
+# Пространство имен и строковое имя ключа.
+CacheKey = tuple[str, str]
+Loaded = dict[Any, Any]
+Loader = Callable[[], Awaitable[Any]]
+# Загрузка значений набора ключей: словарь значений найденных ключей.
+LoadResult = Awaitable[Mapping[KeyType, ValueType]]
+ManyLoader = Callable[[list[KeyType]], LoadResult[KeyType, ValueType]]
+# Загрузки ключей по именам.
+Waiting = dict[str, asyncio.Future]
+# Значение, которого нет в общем хранилище.
+NOT_SHARED = SharedEntry(None, '')
+
+
+@dataclass
+class CacheEntry:
+    """Запись кэша."""
+    cached: Any
+    expires_at: float
+    size: int
+
+
+@lru_cache(maxsize=None)
+def value_adapter(value_type: Any) -> TypeAdapter:
+    """Адаптер pydantic для значений value_type и отсутствующих значений."""
+    return TypeAdapter(value_type | None)
+
+
+def key_name(key: Hashable) -> str:
+    """Возвращает строковое имя ключа."""
+    if isinstance(key, tuple):
+        return ':'.join(str(part) for part in key)
+    return str(key)
+
+
+def counter_totals(counters: Counter) -> dict[str, int]:
+    """Возвращает значения счетчиков, включая нулевые."""
+    return {counter: counters[counter] for counter in COUNTERS}
+
+
+async def load_single(loader: Loader, keys: list[Hashable]) -> Loaded:
+    """Загружает значение одного ключа загрузчиком без аргументов."""
+    return {keys[0]: await loader()}
+
+
+async def load_uncached(
+    loader: ManyLoader[Any, Any],
+    keys: list[Hashable],
+) -> Loaded:
+    """Загружает значения при выключенном кэше."""
+    loaded = await loader(keys) if keys else {}
+    return {key: loaded.get(key) for key in keys}
+
+
+class AsyncCache:
+    """Ограниченный асинхронный кэш с TTL и вытеснением LRU.
+
+    Ключи разделены на пространства имен (namespace), что позволяет
+    сбрасывать как отдельный ключ, так и все пространство целиком.
+    Ключи хранятся под строковыми именами (key_name), одинаковыми
+    во всех воркерах.
+
+    Args:
+        max_items: наибольшее число записей в процессе.
+        max_bytes: наибольший объем записей в процессе.
+        enabled: выключенный кэш всегда вызывает loader.
+        backend: общее для воркеров хранилище второго уровня.
+        local_ttl: наибольшее время жизни записей в процессе при
+            подключенном общем хранилище.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_bytes: int,
+        enabled: bool = True,
+        backend: Optional[CacheBackend] = None,
+        local_ttl: Optional[float] = None,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.backend = backend
+        self.local_ttl = local_ttl
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._inflight: dict[CacheKey, asyncio.Future] = {}
+        self._bytes = 0
+        self._counters: Counter = Counter()
+        self._namespace_counters: dict[str, Counter] = {}
+        # Отличает сбросы этого процесса от сбросов других воркеров.
+        self._origin = uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Подписывается на сбросы ключей от других воркеров."""
+        if self.backend is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(self.backend))
+
+    async def close(self) -> None:
+        """Отменяет подписку и закрывает общее хранилище."""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: Hashable,
+        loader: Loader,
+        ttl: float,
+        value_type: Any,
+    ) -> Any:
+        """Возвращает значение из кэша или загружает его через loader."""
+        found = await self.get_or_load_many(
+            namespace,
+            [key],
+            partial(load_single, loader),
+            ttl,
+            value_type,
+        )
+        return found[key]
+
+    async def get_or_load_many(
+        self,
+        namespace: str,
+        keys: Iterable[KeyType],
+        loader: ManyLoader[KeyType, ValueType],
+        ttl: float,
+        value_type: Any,
+    ) -> dict[KeyType, Optional[ValueType]]:
+        """Возвращает значения набора ключей.
+
+        Отсутствующие в кэше ключи загружаются одним вызовом loader,
+        который получает список ключей и возвращает словарь значений.
+        Ключи, которых нет в ответе loader, возвращаются как None
+        и не кэшируются: отсутствие документа часто временное, например
+        документ создан в другом воркере после загрузки.
+        Ключи, которые уже загружаются другим запросом, не загружаются
+        повторно. value_type - тип значений для общего хранилища.
+        """
+        names = {key_name(key): key for key in keys}
+        if not self.enabled:
+            return await load_uncached(loader, list(names.values()))
+
+        found, waiting, missing = self._lookup(namespace, names)
+        if missing:
+            waiting.update(self._start_load(
+                namespace,
+                list(missing),
+                self._load(namespace, missing, loader, ttl, value_type),
+            ))
+        found.update(await self._wait(waiting))
+        return {key: found[name] for name, key in names.items()}
+
+    async def set_many(
+        self,
+        namespace: str,
+        entries: Mapping[Hashable, Any],
+        ttl: float,
+        value_type: Any,
+    ) -> None:
+        """Записывает известные значения в оба уровня кэша.
+
+        Используется для прогрева и после записи, когда значение уже
+        известно без чтения из базы. Начатые загрузки этих ключей не
+        сохраняют свой результат.
+        """
+        if not self.enabled or not entries:
+            return
+        adapter = value_adapter(value_type)
+        payloads = {}
+        for key, cached in entries.items():
+            payload = adapter.dump_json(cached, by_alias=True)
+            payloads[key_name(key)] = payload
+            self._inflight.pop((namespace, key_name(key)), None)
+            self._set((namespace, key_name(key)), cached, ttl, len(payload))
+        shared = await self._fetch_shared(namespace, list(payloads))
+        await self._store_shared(namespace, payloads, shared, ttl)
+
+    async def invalidate(self, namespace: str, *keys: Hashable) -> None:
+        """Сбрасывает ключи пространства имен.
+
+        Без ключей сбрасывается все пространство имен. Загрузки, начатые
+        до сброса, отдают результат ожидающим запросам, но не сохраняют
+        его в кэш. Ключи удаляются из общего хранилища, а остальные
+        воркеры получают сообщение о сбросе.
+        """
+        names = [key_name(key) for key in keys]
+        self._invalidate_local(namespace, names)
+        if self.backend is None:
+            return
+        try:
+            await self._delete_shared(self.backend, namespace, names)
+        except Exception:
+            self._shared_error(namespace, 'Не удалось сбросить ключи %s')
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._entries.clear()
+        self._inflight.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Возвращает счетчики попаданий, промахов и вытеснений."""
+        return {
+            **counter_totals(self._counters),
+            'backend': self.backend.name if self.backend else None,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_items': self.max_items,
+            'max_bytes': self.max_bytes,
+            'namespaces': {
+                namespace: counter_totals(counters)
+                for namespace, counters in self._namespace_counters.items()
+            },
+        }
+
+    def _lookup(
+        self,
+        namespace: str,
+        names: Mapping[str, Hashable],
+    ) -> tuple[dict[str, Any], Waiting, dict[str, Hashable]]:
+        """Раскладывает ключи на найденные, загружаемые и отсутствующие."""
+        found = self._cached(namespace, names)
+        loading = {
+            name: self._inflight.get((namespace, name))
+            for name in names
+            if name not in found
+        }
+        waiting = {
+            name: task
+            for name, task in loading.items()
+            if task is not None
+        }
+        missing = {
+            name: names[name]
+            for name, task in loading.items()
+            if task is None
+        }
+        self._count(namespace, 'hits', len(found))
+        self._count(namespace, 'coalesced', len(waiting))
+        self._count(namespace, 'misses', len(missing))
+        return found, waiting, missing
+
+    def _cached(self, namespace: str, names: Iterable[str]) -> dict[str, Any]:
+        """Возвращает действующие значения ключей из кэша процесса."""
+        entries = {name: self._get_entry((namespace, name)) for name in names}
+        return {name: entry.cached for name, entry in entries.items() if entry}
+
+    def _start_load(
+        self,
+        namespace: str,
+        names: list[str],
+        load: Awaitable[dict[str, Any]],
+    ) -> Waiting:
+        """Запускает загрузку ключей и отмечает их загружаемыми."""
+        task = asyncio.ensure_future(load)
+        task.add_done_callback(partial(self._release, namespace, names))
+        self._inflight.update(((namespace, name), task) for name in names)
+        return dict.fromkeys(names, task)
+
+    async def _wait(self, waiting: Waiting) -> dict[str, Any]:
+        """Дожидается загрузок и возвращает значения их ключей.
+
+        Отмена одного из ожидающих запросов не прерывает загрузку.
+        """
+        loads = await asyncio.gather(*map(asyncio.shield, waiting.values()))
+        return {name: loaded.get(name) for name, loaded in zip(waiting, loads)}
+
+    async def _load(
+        self,
+        namespace: str,
+        missing: dict[str, Hashable],
+        loader: ManyLoader[Any, Any],
+        ttl: float,
+        value_type: Any,
+    ) -> dict[str, Any]:
+        """Загружает значения и сохраняет их, если ключи не сброшены.
+
+        Сначала значения и их версии читаются из общего хранилища,
+        остальные загружаются через loader и записываются в оба
+        уровня. В общее хранилище значение попадает, только если
+        версия ключа не изменилась с начала загрузки.
+        """
+        shared = await self._fetch_shared(namespace, list(missing))
+        found = self._decode_shared(namespace, shared, value_type)
+        fresh = [missing[name] for name in missing.keys() - found.keys()]
+        loaded = await loader(fresh) if fresh else {}
+        found.update({key_name(key): loaded.get(key) for key in fresh})
+        await self._save(
+            namespace,
+            found,
+            shared,
+            ttl,
+            value_adapter(value_type),
+        )
+        return found
+
+    def _decode_shared(
+        self,
+        namespace: str,
+        shared: dict[str, SharedEntry],
+        value_type: Any,
+    ) -> dict[str, Any]:
+        """Читает значения, найденные в общем хранилище."""
+        adapter = value_adapter(value_type)
+        found = {
+            name: adapter.validate_json(entry.payload)
+            for name, entry in shared.items()
+            if entry.payload is not None
+        }
+        self._count(namespace, 'shared_hits', len(found))
+        return found
+
+    async def _save(
+        self,
+        namespace: str,
+        found: dict[str, Any],
+        shared: dict[str, SharedEntry],
+        ttl: float,
+        adapter: TypeAdapter,
+    ) -> None:
+        """Сохраняет загруженные значения в оба уровня кэша.
+
+        Ключ мог быть сброшен или перезагружен во время загрузки:
+        тогда результат этой загрузки в кэш не попадает.
+        """
+        payloads = {}
+        for name in self._current_names(namespace, found):
+            if found[name] is None:
+                continue
+            payload = shared.get(name, NOT_SHARED).payload
+            if payload is None:
+                payload = adapter.dump_json(found[name], by_alias=True)
+                payloads[name] = payload
+            self._set((namespace, name), found[name], ttl, len(payload))
+        await self._store_shared(namespace, payloads, shared, ttl)
+
+    def _current_names(
+        self,
+        namespace: str,
+        names: Iterable[str],
+    ) -> list[str]:
+        """Ключи, которые загружает текущая задача."""
+        task = asyncio.current_task()
+        return [
+            name for name in names
+            if self._inflight.get((namespace, name)) is task
+        ]
+
+    def _release(
+        self,
+        namespace: str,
+        names: list[str],
+        task: asyncio.Future,
+    ) -> None:
+        """Снимает отметку загрузки с ключей завершенной задачи.
+
+        Ключи, которые сброшены или загружаются заново, не трогаются.
+        """
+        for cache_key in zip(repeat(namespace), names):
+            if self._inflight.get(cache_key) is task:
+                self._inflight.pop(cache_key)
+
+    async def _fetch_shared(
+        self,
+        namespace: str,
+        names: list[str],
+    ) -> dict[str, SharedEntry]:
+        """Читает значения и версии ключей из общего хранилища.
+
+        Ошибки общего хранилища не мешают загрузке из базы.
+        """
+        if self.backend is None:
+            return {}
+        try:
+            return await self.backend.fetch_many(namespace, names)
+        except Exception:
+            self._shared_error(namespace, 'Не удалось прочитать %s из кэша')
+        return {}
+
+    async def _store_shared(
+        self,
+        namespace: str,
+        payloads: dict[str, bytes],
+        shared: dict[str, SharedEntry],
+        ttl: float,
+    ) -> None:
+        """Записывает значения с известными версиями в общее хранилище."""
+        payloads = {
+            name: payload
+            for name, payload in payloads.items()
+            if name in shared
+        }
+        if self.backend is None or not payloads:
+            return
+        try:
+            await self.backend.store_many(
+                namespace,
+                payloads,
+                {name: shared[name].version for name in payloads},
+                ttl,
+            )
+        except Exception:
+            self._shared_error(namespace, 'Не удалось записать %s в кэш')
+
+    def _shared_error(self, namespace: str, message: str) -> None:
+        """Учитывает и записывает в лог ошибку общего хранилища."""
+        self._count(namespace, 'shared_errors')
+        logger.exception(message, namespace)
+
+    async def _delete_shared(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        names: list[str],
+    ) -> None:
+        """Удаляет ключи из общего хранилища и рассылает сброс."""
+        if names:
+            await backend.delete(namespace, names)
+        else:
+            await backend.delete_namespace(namespace)
+        await backend.publish(orjson.dumps({
+            'origin': self._origin,
+            'namespace': namespace,
+            'keys': names,
+        }))
+
+    async def _listen(self, backend: CacheBackend) -> None:
+        """Применяет сбросы других воркеров, переподключаясь при ошибках."""
+        while True:
+            try:
+                await backend.listen(self._on_message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Потеряна подписка на сбросы кэша')
+            # Пока подписки не было, сбросы могли быть пропущены.
+            self.clear()
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+    def _on_message(self, message: bytes) -> None:
+        """Применяет сброс, полученный от другого воркера."""
+        invalidation = orjson.loads(message)
+        if invalidation['origin'] != self._origin:
+            self._invalidate_local(
+                str(invalidation['namespace']),
+                [str(name) for name in invalidation['keys']],
+            )
+
+    def _invalidate_local(self, namespace: str, names: list[str]) -> None:
+        """Сбрасывает ключи в кэше процесса."""
+        if names:
+            cache_keys = [(namespace, name) for name in names]
+        else:
+            cache_keys = [
+                cache_key
+                for cache_key in (*self._entries, *self._inflight)
+                if cache_key[0] == namespace
+            ]
+        for cache_key in cache_keys:
+            self._inflight.pop(cache_key, None)
+            self._remove(cache_key)
+        self._count(namespace, 'invalidations')
+
+    def _get_entry(self, cache_key: CacheKey) -> Optional[CacheEntry]:
+        """Возвращает действующую запись и отмечает ее использование."""
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._count(cache_key[0], 'expirations')
+            self._remove(cache_key)
+            return None
+        self._entries.move_to_end(cache_key)
+        return entry
+
+    def _set(
+        self,
+        cache_key: CacheKey,
+        cached: Any,
+        ttl: float,
+        size: int,
+    ) -> None:
+        """Сохраняет значение и вытесняет давно не использованные записи."""
+        if self.backend is not None and self.local_ttl is not None:
+            ttl = min(ttl, self.local_ttl)
+        self._remove(cache_key)
+        if size > self.max_bytes or self.max_items <= 0:
+            return
+        self._entries[cache_key] = CacheEntry(
+            cached=cached,
+            expires_at=time.monotonic() + ttl,
+            size=size,
+        )
+        self._bytes += size
+        while self._is_full():
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._count(evicted_key[0], 'evictions')
+
+    def _is_full(self) -> bool:
+        """Проверяет, превышены ли ограничения размера кэша."""
+        if len(self._entries) > self.max_items:
+            return True
+        return self._bytes > self.max_bytes
+
+    def _remove(self, cache_key: CacheKey) -> None:
+        """Удаляет запись, если она есть."""
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _count(self, namespace: str, counter: str, step: int = 1) -> None:
+        """Увеличивает общий счетчик и счетчик пространства имен."""
+        self._counters[counter] += step
+        namespace_counters = self._namespace_counters.setdefault(
+            namespace,
+            Counter(),
+        )
+        namespace_counters[counter] += step
+
+
+cache = AsyncCache(
+    max_items=settings.cache_max_items,
+    max_bytes=settings.cache_max_bytes,
+    enabled=settings.cache_enabled,
+    backend=get_cache_backend(),
+    local_ttl=settings.cache_local_ttl,
+)
@@ -0,0 +1,305 @@
+"""Общий для воркеров уровень кэша и рассылка сбросов.
+
+Каждый воркер gunicorn держит свой внутрипроцессный кэш, а общий
+уровень хранится один раз на узел - в локальном Redis. Через pub/sub
+Redis воркеры получают сбросы ключей, сделанные другими воркерами.
+
+У каждого ключа есть версия, которая увеличивается при сбросе ключа
+или всего пространства имен. Загрузка читает версию до обращения
+к базе, а запись сохраняет значение, только если версия не изменилась:
+значение, прочитанное до сброса, не попадает в хранилище после него.
+
+Для тестов и локального запуска без Redis есть хранилище в памяти
+процесса с тем же интерфейсом.
+"""
+from abc import ABC, abstractmethod
+import asyncio
+from collections import Counter
+import contextlib
+import time
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional
+
+from core.config import settings
+
+MessageHandler = Callable[[bytes], None]
+# Ключ версии: пространство имен и ключ, None - все пространство.
+VersionKey = tuple[str, Optional[str]]
+
+# Префикс ключей и канал сбросов в Redis.
+KEY_PREFIX = 'ugc:cache'
+VERSION_PREFIX = 'ugc:cache-version'
+INVALIDATION_CHANNEL = 'ugc:cache:invalidations'
+# Число ключей, удаляемых за одну команду при сбросе пространства имен.
+DELETE_BATCH_SIZE = 500
+# Время жизни версии ключа в миллисекундах. Оно больше времени любой
+# загрузки, поэтому версия не возвращается к прочитанному загрузкой
+# значению, пока та не закончилась.
+VERSION_TTL_MS = 3600 * 1000
+
+# Записывает значения, версии которых не изменились.
+# KEYS[1] - версия пространства имен, далее пары: ключ и версия ключа.
+# ARGV[1] - время жизни в миллисекундах, далее пары: значение
+# и ожидаемая версия.
+STORE_SCRIPT = """
+local namespace_version = redis.call('GET', KEYS[1]) or '0'
+for index = 2, #KEYS, 2 do
+    local key_version = redis.call('GET', KEYS[index + 1]) or '0'
+    if namespace_version .. ':' .. key_version == ARGV[index + 1] then
+        redis.call('SET', KEYS[index], ARGV[index], 'PX', ARGV[1])
+    end
+end
+"""
+
+
+class SharedEntry(NamedTuple):
+    """Значение ключа в общем хранилище и его версия."""
+    payload: Optional[bytes]
+    version: str
+
+
+class CacheBackend(ABC):
+    """Общее хранилище кэша: ключи - строки, значения - байты."""
+    name: str
+
+    @abstractmethod
+    async def fetch_many(
+        self,
+        namespace: str,
+        keys: list[str],
+    ) -> dict[str, SharedEntry]:
+        """Возвращает значения и версии ключей."""
+
+    @abstractmethod
+    async def store_many(
+        self,
+        namespace: str,
+        payloads: Mapping[str, bytes],
+        versions: Mapping[str, str],
+        ttl: float,
+    ) -> None:
+        """Сохраняет значения ключей, версии которых не изменились."""
+
+    @abstractmethod
+    async def delete(self, namespace: str, keys: list[str]) -> None:
+        """Удаляет ключи пространства имен и увеличивает их версии."""
+
+    @abstractmethod
+    async def delete_namespace(self, namespace: str) -> None:
+        """Удаляет все ключи пространства имен и увеличивает его версию."""
+
+    @abstractmethod
+    async def publish(self, message: bytes) -> None:
+        """Рассылает сообщение о сбросе всем подписчикам."""
+
+    @abstractmethod
+    async def listen(self, on_message: MessageHandler) -> None:
+        """Передает сообщения о сбросах в on_message до отмены."""
+
+    async def close(self) -> None:
+        """Закрывает соединения хранилища."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Хранилище в памяти процесса для тестов и запуска без Redis.
+
+    Подписчики одного экземпляра получают сообщения друг друга,
+    как воркеры, подключенные к одному Redis.
+    """
+    name = 'memory'
+
+    def __init__(self) -> None:
+        self._payloads: dict[tuple[str, str], tuple[bytes, float]] = {}
+        # Версии ключей, версия пространства имен - под ключом None.
+        self._versions: Counter[VersionKey] = Counter()
+        self._queues: list[asyncio.Queue] = []
+
+    async def fetch_many(
+        self,
+        namespace: str,
+        keys: list[str],
+    ) -> dict[str, SharedEntry]:
+        """Возвращает значения и версии ключей."""
+        now = time.monotonic()
+        entries = {}
+        for key in keys:
+            payload, expires_at = self._payloads.get(
+                (namespace, key),
+                (None, now),
+            )
+            entries[key] = SharedEntry(
+                payload if expires_at > now else None,
+                self._version(namespace, key),
+            )
+        return entries
+
+    async def store_many(
+        self,
+        namespace: str,
+        payloads: Mapping[str, bytes],
+        versions: Mapping[str, str],
+        ttl: float,
+    ) -> None:
+        """Сохраняет значения ключей, версии которых не изменились."""
+        expires_at = time.monotonic() + ttl
+        for key, payload in payloads.items():
+            if versions[key] == self._version(namespace, key):
+                self._payloads[(namespace, key)] = (payload, expires_at)
+
+    async def delete(self, namespace: str, keys: list[str]) -> None:
+        """Удаляет ключи пространства имен и увеличивает их версии."""
+        for key in keys:
+            self._versions[(namespace, key)] += 1
+            self._payloads.pop((namespace, key), None)
+
+    async def delete_namespace(self, namespace: str) -> None:
+        """Удаляет все ключи пространства имен и увеличивает его версию."""
+        self._versions[(namespace, None)] += 1
+        self._payloads = {
+            stored_key: stored
+            for stored_key, stored in self._payloads.items()
+            if stored_key[0] != namespace
+        }
+
+    async def publish(self, message: bytes) -> None:
+        """Рассылает сообщение о сбросе всем подписчикам."""
+        for queue in self._queues:
+            queue.put_nowait(message)
+
+    async def listen(self, on_message: MessageHandler) -> None:
+        """Передает сообщения о сбросах в on_message до отмены."""
+        queue: asyncio.Queue = asyncio.Queue()
+        with contextlib.ExitStack() as subscription:
+            self._queues.append(queue)
+            subscription.callback(self._queues.remove, queue)
+            while True:
+                on_message(await queue.get())
+
+    def _version(self, namespace: str, key: str) -> str:
+        """Возвращает версию ключа вместе с версией пространства имен."""
+        namespace_version = self._versions[(namespace, None)]
+        key_version = self._versions[(namespace, key)]
+        return f'{namespace_version}:{key_version}'
+
+
+class RedisCacheBackend(CacheBackend):
+    """Хранилище в Redis с рассылкой сбросов через pub/sub."""
+    name = 'redis'
+
+    def __init__(self, url: str) -> None:
+        # Redis нужен только при cache_backend=redis.
+        from redis import asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._store_script = self._redis.register_script(STORE_SCRIPT)
+
+    async def fetch_many(
+        self,
+        namespace: str,
+        keys: list[str],
+    ) -> dict[str, SharedEntry]:
+        """Возвращает значения и версии ключей одной командой MGET."""
+        stored = await self._redis.mget([
+            version_name(namespace),
+            *(version_name(namespace, key) for key in keys),
+            *(key_name(namespace, key) for key in keys),
+        ])
+        namespace_version = int(stored[0] or 0)
+        return {
+            key: SharedEntry(
+                stored[len(keys) + index + 1],
+                '{0}:{1}'.format(
+                    namespace_version,
+                    int(stored[index + 1] or 0),
+                ),
+            )
+            for index, key in enumerate(keys)
+        }
+
+    async def store_many(
+        self,
+        namespace: str,
+        payloads: Mapping[str, bytes],
+        versions: Mapping[str, str],
+        ttl: float,
+    ) -> None:
+        """Сохраняет значения одним скриптом, сверяя версии ключей."""
+        names = [version_name(namespace)]
+        arguments: list[bytes | str | int] = [int(ttl * 1000)]
+        for key, payload in payloads.items():
+            names += [key_name(namespace, key), version_name(namespace, key)]
+            arguments += [payload, versions[key]]
+        await self._store_script(keys=names, args=arguments)
+
+    async def delete(self, namespace: str, keys: list[str]) -> None:
+        """Удаляет ключи пространства имен и увеличивает их версии.
+
+        Версии увеличиваются до удаления значений: загрузка, которая
+        не нашла значение, уже не запишет прочитанное до сброса.
+        """
+        pipeline = self._redis.pipeline(transaction=False)
+        for version_key in keys:
+            pipeline.incr(version_name(namespace, version_key))
+            pipeline.pexpire(
+                version_name(namespace, version_key),
+                VERSION_TTL_MS,
+            )
+        pipeline.unlink(*(key_name(namespace, key) for key in keys))
+        await pipeline.execute()
+
+    async def delete_namespace(self, namespace: str) -> None:
+        """Удаляет все ключи пространства имен пачками через SCAN."""
+        await self._redis.incr(version_name(namespace))
+        names = []
+        async for name in self._redis.scan_iter(
+            match=key_name(namespace, '*'),
+            count=DELETE_BATCH_SIZE,
+        ):
+            names.append(name)
+            if len(names) >= DELETE_BATCH_SIZE:
+                await self._redis.unlink(*names)
+                names = []
+        if names:
+            await self._redis.unlink(*names)
+
+    async def publish(self, message: bytes) -> None:
+        """Рассылает сообщение о сбросе всем подписчикам."""
+        await self._redis.publish(INVALIDATION_CHANNEL, message)
+
+    async def listen(self, on_message: MessageHandler) -> None:
+        """Передает сообщения о сбросах из канала Redis в on_message."""
+        async with self._redis.pubsub() as pubsub:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    on_message(message['data'])
+
+    async def close(self) -> None:
+        """Закрывает соединения с Redis."""
+        await self._redis.aclose()
+
+
+def key_name(namespace: str, key: str) -> str:
+    """Возвращает имя ключа значения в Redis."""
+    return f'{KEY_PREFIX}:{namespace}:{key}'
+
+
+def version_name(namespace: str, key: Optional[str] = None) -> str:
+    """Возвращает имя ключа версии ключа или пространства имен."""
+    if key is None:
+        return f'{VERSION_PREFIX}:{namespace}'
+    return f'{VERSION_PREFIX}:{namespace}:{key}'
+
+
+BACKENDS: Mapping[str, Callable[[], CacheBackend]] = MappingProxyType({
+    'memory': MemoryCacheBackend,
+    'redis': lambda: RedisCacheBackend(settings.redis_url),
+})
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Создает общее хранилище кэша по настройке cache_backend."""
+    factory = BACKENDS.get(settings.cache_backend)
+    if factory is None:
+        return None
+    return factory()
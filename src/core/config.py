@@ -1,5 +1,6 @@
 from logging import config as logging_config
 import os
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -23,6 +24,73 @@ class Settings(BaseSettings):
     # Подключение к MongoDB.
     mongo_host: str = 'localhost'
     mongo_port: int = 27019
+    # Полный URI подключения, например ко всем mongos кластера.
+    # Если задан, mongo_host и mongo_port не используются.
+    mongo_uri: str = ''
+    # Пул соединений. None - значение из URI или по умолчанию драйвера.
+    mongo_max_pool_size: Optional[int] = None
+    mongo_min_pool_size: Optional[int] = None
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    # Сжатие трафика через запятую, например zstd,snappy,zlib.
+    mongo_compressors: str = ''
+    # Число соединений, открываемых при запуске воркера.
+    mongo_warmup_connections: int = 4
+    # Не создавать индексы при запуске. Индексы тогда создаются
+    # командой create_indexes при развертывании.
+    mongo_skip_indexes: bool = False
+    # Предпочтение чтения для сводок и агрегаций. Вторичные узлы
+    # включаются явно: сводка, прочитанная с отстающего узла после
+    # записи оценки, попадает в кэш на cache_rating_summary_ttl.
+    mongo_analytics_read_preference: Literal[
+        'primary',
+        'primaryPreferred',
+        'secondary',
+        'secondaryPreferred',
+        'nearest',
+    ] = 'primary'
+    # Гарантия записи лайков: w (число узлов или majority) и журнал.
+    # Пустое значение - гарантия записи клиента.
+    mongo_likes_write_concern: str = ''
+    mongo_likes_journal: Optional[bool] = None
+    # Источник сводки по рейтингам: stats - предрассчитанная статистика,
+    # aggregation - агрегация по коллекции оценок. На stats переходят
+    # после команды rebuild_rating_stats.
+    rating_summary_source: Literal['stats', 'aggregation'] = 'aggregation'
+    # Проверка планов запросов сервисов при запуске приложения.
+    mongo_index_audit: bool = False
+    # Внутрипроцессный кэш моделей чтения.
+    cache_enabled: bool = True
+    cache_max_items: int = 10_000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    # Время жизни записей кэша в секундах.
+    cache_rating_summary_ttl: float = 60
+    cache_review_counters_ttl: float = 30
+    cache_filmwork_reviews_ttl: float = 30
+    cache_review_exists_ttl: float = 3600
+    # Число идентификаторов последних рецензий, загружаемых в кэш
+    # существования рецензий при запуске.
+    review_exists_warm_items: int = 1000
+    # Рецензии старше стольких дней при прогреве не читаются: выборка
+    # новых рецензий по _id ограничена промежутком UUIDv7 (db.ids).
+    review_exists_warm_days: int = 30
+    # Общий для воркеров уровень кэша: none, memory или redis.
+    cache_backend: Literal['none', 'memory', 'redis'] = 'none'
+    # Время жизни записей в процессе при общем уровне кэша. Без общего
+    # уровня столько же живет признак существования рецензии.
+    cache_local_ttl: float = 5
+    redis_url: str = 'redis://localhost:6379/0'
+    # Наибольшее число элементов в запросе пакетной записи.
+    bulk_max_items: int = 100
+    # Отложенная запись лайков рецензий: голоса подтверждаются сразу
+    # и записываются пачками по размеру или по интервалу в секундах.
+    review_like_write_behind: bool = False
+    review_like_buffer_max_items: int = 10_000
+    review_like_flush_size: int = 500
+    review_like_flush_interval: float = 1
+    # Методы сервисов, читающие без Beanie в компактные записи, через
+    # запятую, например ReviewService.get_filmwork_reviews.
+    fast_read_methods: str = ''
     # Подключение к Sentry.
     sentry_dsn: str = ''
     # Подключение к logstash.
@@ -1,3 +1,15 @@
 """Модуль с константами, общими для всего проекта."""
 
 MUST_BE_AUTHORIZED_MSG = 'Для доступа необходимо быть авторизованным'
+
+# Имена полей документов в запросах к MongoDB.
+DOCUMENT_ID_FIELD = '_id'
+ID_FIELD = 'id'
+USER_ID_FIELD = 'user_id'
+FILMWORK_ID_FIELD = 'filmwork_id'
+REVIEW_ID_FIELD = 'review_id'
+RATING_FIELD = 'rating'
+CREATED_AT_FIELD = 'created_at'
+UPDATED_AT_FIELD = 'updated_at'
+# Оператор изменения полей документа.
+SET_OPERATOR = '$set'
@@ -0,0 +1,167 @@
+"""Пакетная загрузка по ключам в пределах одного запроса (DataLoader).
+
+Сервисы запрашивают значения по одному ключу, а загрузчик собирает
+ключи, запрошенные за один проход цикла событий, и передает их
+в batch_load одним вызовом - одним запросом с $in. Результаты
+запоминаются до конца HTTP-запроса: повторная загрузка ключа
+не обращается к базе.
+
+Загрузчики хранятся в contextvar, который DataLoaderMiddleware
+заполняет для каждого запроса. Вне запроса (команды, фоновые задачи)
+request_loader возвращает новый загрузчик без общего запоминания.
+"""
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+KeyType = TypeVar('KeyType', bound=Hashable)
+ValueType = TypeVar('ValueType')
+
+# Загрузка пачки: словарь значений найденных ключей.
+BatchResult = Awaitable[Mapping[KeyType, ValueType]]
+BatchLoader = Callable[[list[KeyType]], BatchResult[KeyType, ValueType]]
+# Загрузчики запроса по именам.
+RequestLoaders = dict[tuple, 'DataLoader']
+
+_request_loaders: ContextVar[Optional[RequestLoaders]] = ContextVar(
+    'request_loaders',
+    default=None,
+)
+
+
+class DataLoader(Generic[KeyType, ValueType]):
+    """Объединяет загрузки ключей одного прохода цикла событий.
+
+    Args:
+        batch_load: получает список ключей и возвращает словарь
+            значений. Ключи, которых нет в ответе, получают None.
+    """
+
+    def __init__(self, batch_load: BatchLoader[KeyType, ValueType]) -> None:
+        self.batch_load = batch_load
+        self._futures: dict[KeyType, asyncio.Future] = {}
+        self._queue: list[KeyType] = []
+        # Цикл событий хранит только слабые ссылки на задачи, поэтому
+        # задачи пачек держит загрузчик, пока они не завершатся.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: KeyType) -> Optional[ValueType]:
+        """Возвращает значение ключа, загружая его в общей пачке."""
+        return await asyncio.shield(self._future(key))
+
+    async def load_many(
+        self,
+        keys: Iterable[KeyType],
+    ) -> dict[KeyType, Optional[ValueType]]:
+        """Возвращает значения набора ключей одной пачкой."""
+        unique_keys = list(dict.fromkeys(keys))
+        # Ключи ставятся в очередь сразу, до переключения задач.
+        futures = [self._future(key) for key in unique_keys]
+        loaded = await asyncio.gather(
+            *(asyncio.shield(future) for future in futures),
+        )
+        return dict(zip(unique_keys, loaded))
+
+    def clear(self, *keys: KeyType) -> None:
+        """Забывает значения ключей, например после их изменения."""
+        for key in keys:
+            future = self._futures.get(key)
+            if future is not None and future.done():
+                self._futures.pop(key)
+
+    def _future(self, key: KeyType) -> asyncio.Future:
+        """Возвращает результат ключа, ставя ключ в очередь пачки."""
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Пачка отправляется, когда все задачи текущего прохода
+                # цикла событий успеют добавить свои ключи.
+                loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self) -> None:
+        """Передает накопленные ключи в batch_load."""
+        keys = self._queue
+        self._queue = []
+        task = asyncio.ensure_future(self._load_batch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: list[KeyType]) -> None:
+        """Загружает пачку и передает значения ожидающим запросам.
+
+        Ошибка загрузки передается всем ожидающим, а ключи пачки
+        не запоминаются, чтобы следующая загрузка повторила запрос.
+        """
+        try:
+            loaded = await self.batch_load(keys)
+        except Exception as error:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(error)
+                # Ошибка могла остаться непрочитанной, если все
+                # ожидающие запросы отменены.
+                future.exception()
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(loaded.get(key))
+
+
+def request_loader(
+    name: tuple[Hashable, ...],
+    batch_load: BatchLoader[KeyType, ValueType],
+) -> DataLoader[KeyType, ValueType]:
+    """Возвращает загрузчик name текущего запроса, создавая его.
+
+    Имя - кортеж из вида загрузчика и всех параметров загрузки,
+    например набора полей: загрузчики с одним именем должны загружать
+    одно и то же.
+    """
+    loaders = _request_loaders.get()
+    if loaders is None:
+        return DataLoader(batch_load)
+    return loaders.setdefault(name, DataLoader(batch_load))
+
+
+def clear_request_keys(kind: Hashable, *keys: Hashable) -> None:
+    """Забывает значения ключей во всех загрузчиках вида kind запроса."""
+    for name, loader in (_request_loaders.get() or {}).items():
+        if name[0] == kind:
+            loader.clear(*keys)
+
+
+class DataLoaderMiddleware:
+    """Создает набор загрузчиков для каждого HTTP-запроса."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        with contextlib.ExitStack() as request_scope:
+            request_scope.callback(
+                _request_loaders.reset,
+                _request_loaders.set({}),
+            )
+            await self.app(scope, receive, send)
@@ -0,0 +1,131 @@
+"""Отложенная запись (write-behind) с объединением изменений по ключу.
+
+Изменения подтверждаются сразу после помещения в буфер процесса.
+Повторные изменения одного ключа заменяют друг друга, поэтому в базу
+попадает только последнее состояние. Фоновая задача передает
+накопленные изменения в writer пачками, когда их число достигает
+flush_size или прошло flush_interval секунд.
+
+Буфер ограничен: при max_items изменений запись ждет сброса буфера.
+Изменения, не записанные до остановки процесса без close(), теряются.
+"""
+import asyncio
+import contextlib
+import logging
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+Writer = Callable[[list[Any]], Awaitable[None]]
+
+
+class WriteBehindBuffer:
+    """Ограниченный буфер отложенной записи.
+
+    Args:
+        writer: записывает пачку изменений в базу.
+        max_items: наибольшее число ожидающих записи ключей.
+        flush_size: число ключей, при котором запись начинается
+            не дожидаясь flush_interval; также размер пачки writer.
+        flush_interval: наибольшее время ожидания записи в секундах.
+        enabled: выключенный буфер не запускает фоновую задачу.
+    """
+
+    def __init__(
+        self,
+        writer: Writer,
+        max_items: int,
+        flush_size: int,
+        flush_interval: float,
+        enabled: bool = True,
+    ) -> None:
+        self.writer = writer
+        self.max_items = max_items
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._pending: dict[Hashable, Any] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Запускает фоновую запись буфера."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает фоновую запись и записывает остаток буфера."""
+        if self._task is not None:
+            # Задача завершается сама: отмена во время wait_for может
+            # быть потеряна, если событие уже установлено.
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._closing = False
+        await self.flush()
+        if self._pending:
+            logger.error(
+                'При остановке не записано изменений: %s',
+                len(self._pending),
+            )
+
+    async def put(self, key: Hashable, change: Any) -> None:
+        """Помещает изменение в буфер, заменяя прежнее изменение ключа."""
+        if key not in self._pending and len(self._pending) >= self.max_items:
+            # Буфер заполнен: ждем записи, а не растим очередь.
+            await self.flush()
+        self._pending[key] = change
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    def get(self, key: Hashable) -> Any:
+        """Возвращает ожидающее записи изменение ключа или None."""
+        return self._pending.get(key)
+
+    async def flush(self) -> None:
+        """Записывает накопленные изменения пачками по flush_size.
+
+        Пачки записываются одновременно. Пачки, которые не удалось
+        записать, возвращаются в буфер, если ключ не был изменен заново.
+        """
+        async with self._flush_lock:
+            pending = self._pending
+            self._pending = {}
+            keys = list(pending)
+            await asyncio.gather(*(
+                self._write_chunk(pending, keys[start:start + self.flush_size])
+                for start in range(0, len(keys), self.flush_size)
+            ))
+
+    async def _write_chunk(
+        self,
+        pending: dict[Hashable, Any],
+        keys: list[Hashable],
+    ) -> None:
+        """Записывает пачку изменений, при ошибке возвращает ее в буфер."""
+        try:
+            await self.writer([pending[key] for key in keys])
+        except Exception:
+            logger.exception(
+                'Ошибка отложенной записи %s изменений',
+                len(keys),
+            )
+            for key in keys:
+                self._pending.setdefault(key, pending[key])
+
+    async def _run(self) -> None:
+        """Записывает буфер по заполнению или по истечении интервала."""
+        while not self._closing:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    self.flush_interval,
+                )
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,98 @@
+"""Удаление дубликатов перед созданием уникальных индексов.
+
+Уникальный индекс не создается, пока в коллекции есть документы
+с одинаковым ключом, и воркер, создающий индексы при запуске, падает.
+Для каждого уникального индекса моделей остается самый новый документ
+ключа (по updated_at, затем created_at и _id), остальные удаляются.
+"""
+import asyncio
+import logging
+from typing import Any, Iterator
+
+from beanie import Document
+
+from db.mongo import DOCUMENT_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Число идентификаторов в одном запросе удаления.
+DELETE_BATCH_SIZE = 1000
+
+
+def unique_keys(model: type[Document]) -> Iterator[list[str]]:
+    """Возвращает поля уникальных индексов модели."""
+    for index_field in model.get_settings().indexes:
+        index = index_field.index.document
+        if index.get('unique'):
+            yield list(index['key'])
+
+
+async def duplicate_ids(
+    model: type[Document],
+    key_fields: list[str],
+) -> list[Any]:
+    """Возвращает идентификаторы лишних документов ключа.
+
+    Группы с одним документом отбрасываются в MongoDB, в приложение
+    передаются только идентификаторы дубликатов.
+    """
+    pipeline: list[dict[str, Any]] = [
+        {'$sort': {'updated_at': -1, 'created_at': -1, '_id': -1}},
+        {
+            '$group': {
+                '_id': {name: f'${name}' for name in key_fields},
+                'ids': {'$push': '$_id'},
+                'count': {'$sum': 1},
+            },
+        },
+        {'$match': {'count': {'$gt': 1}}},
+        {'$project': {'ids': {'$slice': ['$ids', 1, '$count']}}},
+    ]
+    cursor = await model.get_pymongo_collection().aggregate(
+        pipeline,
+        allowDiskUse=True,
+    )
+    return [
+        document_id
+        for group in await cursor.to_list()
+        for document_id in group['ids']
+    ]
+
+
+async def delete_ids(model: type[Document], ids: list[Any]) -> int:
+    """Удаляет документы модели пачками по DELETE_BATCH_SIZE."""
+    if not ids:
+        return 0
+    deleted = await asyncio.gather(*(
+        model.get_pymongo_collection().delete_many(
+            {'_id': {'$in': ids[start:start + DELETE_BATCH_SIZE]}},
+        )
+        for start in range(0, len(ids), DELETE_BATCH_SIZE)
+    ))
+    logger.warning(
+        'Удалено дубликатов %s: %s',
+        model.get_collection_name(),
+        len(ids),
+    )
+    return sum(batch.deleted_count for batch in deleted)
+
+
+async def remove_duplicates() -> int:
+    """Удаляет дубликаты уникальных ключей всех моделей.
+
+    Возвращает число удаленных документов.
+    """
+    targets = [
+        (model, key_fields)
+        for model in DOCUMENT_MODELS
+        for key_fields in unique_keys(model)
+    ]
+    duplicates = await asyncio.gather(*(
+        duplicate_ids(model, key_fields)
+        for model, key_fields in targets
+    ))
+    deleted = await asyncio.gather(*(
+        delete_ids(model, ids)
+        for (model, _), ids in zip(targets, duplicates)
+    ))
+    return sum(deleted)
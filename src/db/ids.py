@@ -0,0 +1,81 @@
+"""Упорядоченные по времени идентификаторы документов (UUIDv7, RFC 9562).
+
+Старшие 48 бит идентификатора - время создания в миллисекундах,
+поэтому новые документы попадают в конец индекса _id, а не в случайное
+место B-дерева, и сортировка по _id совпадает с порядком создания.
+Внутри одной миллисекунды порядок сохраняет 12-битный счетчик
+(rand_a, метод 1 RFC 9562).
+
+Документы, созданные до перехода на UUIDv7, сохраняют случайные UUIDv4.
+Их старшие биты не связаны со временем, поэтому выборки "новые первыми"
+по _id ограничиваются промежутком времени (uuid7_bounds).
+"""
+from datetime import datetime
+import os
+import threading
+import time
+from uuid import UUID
+
+# Наибольшее значение 12-битного счетчика.
+MAX_COUNTER = (1 << 12) - 1
+# Маски 48 бит времени и 62 случайных бит.
+TIMESTAMP_MASK = (1 << 48) - 1
+RANDOM_MASK = (1 << 62) - 1
+# Младшие 80 бит: все поля после времени создания.
+AFTER_TIMESTAMP_MASK = (1 << 80) - 1
+
+
+class Uuid7Generator:
+    """Генератор UUIDv7, возрастающих в пределах процесса."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+        self._counter = 0
+
+    def __call__(self) -> UUID:
+        """Возвращает следующий UUIDv7."""
+        random_bits = int.from_bytes(os.urandom(10), 'big')
+        with self._lock:
+            # Счетчик новой миллисекунды начинается со случайного
+            # значения в младшей половине, чтобы оставить запас
+            # на увеличение.
+            timestamp, counter = self._advance(random_bits >> 69)
+        # Поля: unix_ts_ms (48 бит), версия 7, счетчик (12 бит),
+        # вариант 0b10 и случайные 62 бита.
+        uuid_int = (timestamp & TIMESTAMP_MASK) << 80 | 0x7 << 76
+        uuid_int |= counter << 64 | 0b10 << 62
+        return UUID(int=uuid_int | random_bits & RANDOM_MASK)
+
+    def _advance(self, initial_counter: int) -> tuple[int, int]:
+        """Возвращает время и счетчик следующего идентификатора."""
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp > self._last_timestamp:
+            self._counter = initial_counter
+        else:
+            # Та же миллисекунда или часы ушли назад: увеличиваем
+            # счетчик, при переполнении - время последнего UUID.
+            timestamp = self._last_timestamp
+            self._counter += 1
+            if self._counter > MAX_COUNTER:
+                timestamp += 1
+                self._counter = 0
+        self._last_timestamp = timestamp
+        return timestamp, self._counter
+
+
+uuid7 = Uuid7Generator()
+
+
+def uuid7_bounds(since: datetime, until: datetime) -> dict[str, UUID]:
+    """Условие на _id для UUIDv7, созданных в промежутке времени.
+
+    UUIDv4 попадают в промежуток лишь случайно: для промежутка в месяц
+    это примерно один идентификатор из ста тысяч.
+    """
+    since_ms = int(since.timestamp() * 1000)
+    until_ms = int(until.timestamp() * 1000)
+    return {
+        '$gte': UUID(int=since_ms << 80),
+        '$lte': UUID(int=until_ms << 80 | AFTER_TIMESTAMP_MASK),
+    }
@@ -0,0 +1,222 @@
+"""Проверка планов запросов сервисов на соответствие индексам.
+
+Для каждой формы запроса, которую выполняют сервисы, запрашивается
+explain() и ищутся стадии COLLSCAN (полный проход по коллекции) и SORT
+(сортировка в памяти).
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+from typing import Any, Iterator
+from uuid import uuid4
+
+from beanie import Document
+
+from core.constants import (
+    CREATED_AT_FIELD,
+    DOCUMENT_ID_FIELD,
+    FILMWORK_ID_FIELD,
+    RATING_FIELD,
+    REVIEW_ID_FIELD,
+    UPDATED_AT_FIELD,
+    USER_ID_FIELD,
+)
+from db.ids import uuid7_bounds
+from db.models import Bookmark, FilmworkRatingStats, Rating, Review, ReviewLike
+from services.pagination import encode_cursor, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+# Стадии плана, которые говорят о неподходящем индексе.
+PROBLEM_STAGES = frozenset(('COLLSCAN', 'SORT'))
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """Форма запроса сервиса."""
+    name: str
+    model: type[Document]
+    filter: dict[str, Any]
+    sort: list[tuple[str, int]] = field(default_factory=list)
+
+
+def get_query_shapes() -> list[QueryShape]:
+    """Возвращает формы запросов сервисов, включая страницы по курсору.
+
+    Для каждого списка с курсорной пагинацией проверяется и первая,
+    и следующая страница: следующая должна идти по тому же составному
+    индексу, без SORT и COLLSCAN.
+    """
+    shapes = get_first_page_shapes()
+    keyset_shapes = [shape for shape in shapes if len(shape.sort) == 2]
+    return [*shapes, *map(cursor_page_shape, keyset_shapes)]
+
+
+def cursor_page_shape(shape: QueryShape) -> QueryShape:
+    """Форма запроса следующей страницы списка по курсору.
+
+    Условие после курсора строится так же, как в сервисах
+    (services.pagination.keyset_filter).
+    """
+    sort_by = shape.sort[0][0]
+    sort_value = 5 if sort_by == RATING_FIELD else datetime.now(timezone.utc)
+    after_cursor = keyset_filter(
+        sort_by,
+        encode_cursor(sort_by, sort_value, uuid4()),
+        nullable=sort_by == RATING_FIELD,
+    )
+    return QueryShape(
+        '{0} (cursor)'.format(shape.name),
+        shape.model,
+        {**shape.filter, **after_cursor},
+        shape.sort,
+    )
+
+
+def get_first_page_shapes() -> list[QueryShape]:
+    """Возвращает формы запросов, выполняемых сервисами.
+
+    Значения идентификаторов случайные: на выбор плана влияет только
+    форма запроса.
+    """
+    user_id, filmwork_id, review_id = uuid4(), uuid4(), uuid4()
+    filmwork_ids = {'$in': [filmwork_id]}
+    newest_first = [(CREATED_AT_FIELD, -1), (DOCUMENT_ID_FIELD, -1)]
+    now = datetime.now(timezone.utc)
+    return [
+        QueryShape(
+            'BookmarkService.get_user_bookmarks',
+            Bookmark,
+            {USER_ID_FIELD: user_id},
+            newest_first,
+        ),
+        QueryShape(
+            'RatingService.get_user_ratings',
+            Rating,
+            {USER_ID_FIELD: user_id},
+            [(UPDATED_AT_FIELD, -1), (DOCUMENT_ID_FIELD, -1)],
+        ),
+        QueryShape(
+            'RatingService.get_user_rating',
+            Rating,
+            {USER_ID_FIELD: user_id, FILMWORK_ID_FIELD: filmwork_id},
+        ),
+        QueryShape(
+            'RatingService._aggregate_rating_stats',
+            Rating,
+            {FILMWORK_ID_FIELD: filmwork_ids},
+        ),
+        QueryShape(
+            'RatingService._load_rating_summaries',
+            FilmworkRatingStats,
+            {DOCUMENT_ID_FIELD: filmwork_ids},
+        ),
+        QueryShape(
+            'ReviewService.get_filmwork_reviews(created_at)',
+            Review,
+            {FILMWORK_ID_FIELD: filmwork_id},
+            newest_first,
+        ),
+        QueryShape(
+            'ReviewService.get_filmwork_reviews(rating)',
+            Review,
+            {FILMWORK_ID_FIELD: filmwork_id},
+            [(RATING_FIELD, -1), (DOCUMENT_ID_FIELD, -1)],
+        ),
+        QueryShape(
+            'ReviewService.get_user_reviews',
+            Review,
+            {USER_ID_FIELD: user_id},
+            newest_first,
+        ),
+        QueryShape(
+            'UserService.get_filmworks_state(bookmarks)',
+            Bookmark,
+            {USER_ID_FIELD: user_id, FILMWORK_ID_FIELD: filmwork_ids},
+        ),
+        QueryShape(
+            'UserService.get_filmworks_state(ratings)',
+            Rating,
+            {USER_ID_FIELD: user_id, FILMWORK_ID_FIELD: filmwork_ids},
+        ),
+        QueryShape(
+            'UserService.get_filmworks_state(reviews)',
+            Review,
+            {USER_ID_FIELD: user_id, FILMWORK_ID_FIELD: filmwork_ids},
+        ),
+        QueryShape(
+            'ReviewLikeService.warm_review_exists',
+            Review,
+            {DOCUMENT_ID_FIELD: uuid7_bounds(now, now)},
+            [(DOCUMENT_ID_FIELD, -1)],
+        ),
+        QueryShape(
+            'ReviewLikeService.get_user_votes',
+            ReviewLike,
+            {USER_ID_FIELD: user_id, REVIEW_ID_FIELD: {'$in': [review_id]}},
+        ),
+        QueryShape(
+            'ReviewLikeService.rebuild_review_counters',
+            ReviewLike,
+            {REVIEW_ID_FIELD: review_id},
+        ),
+        QueryShape(
+            'ReviewLikeService.get_user_review_likes',
+            ReviewLike,
+            {USER_ID_FIELD: user_id},
+            newest_first,
+        ),
+    ]
+
+
+def _iter_stages(plan: Any) -> Iterator[str]:
+    """Обходит дерево плана и возвращает названия всех стадий.
+
+    Отклоненные планы пропускаются, на шардированном кластере
+    учитываются планы всех шардов.
+    """
+    if isinstance(plan, list):
+        for subplan in plan:
+            yield from _iter_stages(subplan)
+        return
+    if not isinstance(plan, dict):
+        return
+    for key, node in plan.items():
+        if key == 'stage':
+            yield node
+        elif key != 'rejectedPlans':
+            yield from _iter_stages(node)
+
+
+async def explain_shape(shape: QueryShape) -> frozenset[str]:
+    """Возвращает проблемные стадии выигравшего плана запроса."""
+    cursor = shape.model.get_pymongo_collection().find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    explanation = await cursor.limit(1).explain()
+    stages = _iter_stages(explanation.get('queryPlanner', {}))
+    return PROBLEM_STAGES.intersection(stages)
+
+
+async def audit_indexes() -> dict[str, frozenset[str]]:
+    """Проверяет все формы запросов и логирует найденные проблемы.
+
+    Returns:
+        Словарь: название запроса -> проблемные стадии плана.
+    """
+    shapes = get_query_shapes()
+    explained = await asyncio.gather(*map(explain_shape, shapes))
+    problems = {}
+    for shape, stages in zip(shapes, explained):
+        if stages:
+            problems[shape.name] = stages
+            logger.warning(
+                'Запрос %s к коллекции %s использует стадии %s',
+                shape.name,
+                shape.model.get_collection_name(),
+                ', '.join(sorted(stages)),
+            )
+    if not problems:
+        logger.info('Все запросы сервисов обслуживаются индексами.')
+    return problems
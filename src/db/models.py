@@ -1,24 +1,38 @@
 from datetime import datetime, timezone
 from typing import Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 
 from beanie import Document
 from pydantic import Field
 from pymongo import ASCENDING, DESCENDING, IndexModel
 
+from db.ids import uuid7
+
 
 class ReviewLike(Document):
     """Лайк/дизлайк рецензии."""
     class Settings:
         name = 'review_likes'
         indexes = [
-            IndexModel([('user_id', ASCENDING)]),
+            # Один голос пользователя на рецензию. Индекс покрывает и
+            # выборки по user_id.
+            IndexModel(
+                [('user_id', ASCENDING), ('review_id', ASCENDING)],
+                unique=True,
+            ),
+            # Сводки и пересчет счетчиков по рецензии.
             IndexModel([('review_id', ASCENDING)]),
-            IndexModel([('is_like', ASCENDING)]),
-            IndexModel([('created_at', ASCENDING)]),
+            # Лайки пользователя, новые первыми.
+            IndexModel(
+                [
+                    ('user_id', ASCENDING),
+                    ('created_at', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
         ]
 
-    id: UUID = Field(default_factory=uuid4)  # type: ignore
+    id: UUID = Field(default_factory=uuid7)  # type: ignore
     review_id: UUID
     user_id: UUID
     # True - лайк, False - дизлайк.
@@ -33,19 +47,47 @@ class Review(Document):
     class Settings:
         name = 'reviews'
         indexes = [
-            IndexModel([('user_id', ASCENDING)]),
-            IndexModel([('filmwork_id', ASCENDING)]),
-            IndexModel([('created_at', DESCENDING)]),
-            IndexModel([('rating', DESCENDING)]),
+            # Одна рецензия пользователя на кинопроизведение.
+            IndexModel(
+                [('user_id', ASCENDING), ('filmwork_id', ASCENDING)],
+                unique=True,
+            ),
+            # Рецензии кинопроизведения с сортировкой по дате и оценке.
+            # _id разрешает равенство значений при курсорной пагинации.
+            IndexModel(
+                [
+                    ('filmwork_id', ASCENDING),
+                    ('created_at', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
+            IndexModel(
+                [
+                    ('filmwork_id', ASCENDING),
+                    ('rating', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
+            # Рецензии пользователя, новые первыми.
+            IndexModel(
+                [
+                    ('user_id', ASCENDING),
+                    ('created_at', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
         ]
 
-    id: UUID = Field(default_factory=uuid4)  # type: ignore
+    id: UUID = Field(default_factory=uuid7)  # type: ignore
     filmwork_id: UUID
     user_id: UUID
     text: str
     author_name: str  # Имя автора рецензии
     # Оценка в рецензии (опционально)
     rating: Optional[int] = Field(None, ge=0, le=10)
+    # Денормализованные счетчики, обновляются через $inc при голосовании.
+    likes_count: int = 0
+    dislikes_count: int = 0
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
     )
@@ -59,13 +101,24 @@ class Rating(Document):
     class Settings:
         name = 'ratings'
         indexes = [
-            IndexModel([('user_id', ASCENDING)]),
+            # Одна оценка пользователя на кинопроизведение.
+            IndexModel(
+                [('user_id', ASCENDING), ('filmwork_id', ASCENDING)],
+                unique=True,
+            ),
+            # Оценки пользователя, недавно измененные первыми.
+            IndexModel(
+                [
+                    ('user_id', ASCENDING),
+                    ('updated_at', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
+            # Агрегация оценок кинопроизведения.
             IndexModel([('filmwork_id', ASCENDING)]),
-            IndexModel([('rating', ASCENDING)]),
-            IndexModel([('created_at', ASCENDING)]),
         ]
 
-    id: UUID = Field(default_factory=uuid4)  # type: ignore
+    id: UUID = Field(default_factory=uuid7)  # type: ignore
     filmwork_id: UUID
     user_id: UUID
     rating: int = Field(ge=0, le=10)
@@ -82,16 +135,41 @@ class Bookmark(Document):
     class Settings:
         name = 'bookmarks'
         indexes = [
-            # Отдельные индексы для производительности
-            IndexModel([('user_id', ASCENDING)]),
-            IndexModel([('filmwork_id', ASCENDING)]),
-            IndexModel([('created_at', ASCENDING)]),
+            # Одна закладка пользователя на кинопроизведение.
+            IndexModel(
+                [('user_id', ASCENDING), ('filmwork_id', ASCENDING)],
+                unique=True,
+            ),
+            # Закладки пользователя, новые первыми.
+            IndexModel(
+                [
+                    ('user_id', ASCENDING),
+                    ('created_at', DESCENDING),
+                    ('_id', DESCENDING),
+                ],
+            ),
         ]
 
-    id: UUID = Field(default_factory=uuid4)  # type: ignore
+    id: UUID = Field(default_factory=uuid7)  # type: ignore
     filmwork_id: UUID
     user_id: UUID
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
 
     )
+
+
+class FilmworkRatingStats(Document):
+    """Агрегированная статистика оценок кинопроизведения.
+
+    Поддерживается через $inc при каждом изменении оценки.
+    """
+    class Settings:
+        name = 'filmwork_rating_stats'
+
+    # Идентификатор кинопроизведения.
+    id: UUID  # type: ignore
+    ratings_count: int = 0
+    ratings_sum: int = 0
+    # Число оценок по каждому значению от 0 до 10.
+    histogram: dict[str, int] = Field(default_factory=dict)
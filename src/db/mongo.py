@@ -0,0 +1,138 @@
+"""Модуль с подключением к MongoDB и инициализацией Beanie."""
+import asyncio
+import logging
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from beanie import Document, init_beanie
+from pymongo import AsyncMongoClient, ReadPreference, WriteConcern
+from pymongo.asynchronous.collection import AsyncCollection
+
+from core.config import settings
+from db import models
+
+DOCUMENT_MODELS = (
+    models.Bookmark,
+    models.FilmworkRatingStats,
+    models.Rating,
+    models.Review,
+    models.ReviewLike,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES: Mapping[str, Any] = MappingProxyType({
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+})
+
+
+def get_client() -> AsyncMongoClient:
+    """Создает клиент MongoDB.
+
+    Beanie 2 работает поверх асинхронного клиента PyMongo. UUID кодируем
+    по стандарту, чтобы их можно было передавать в агрегации напрямую.
+    Незаданные настройки пула не передаются, чтобы действовали
+    параметры из URI.
+    """
+    pool_options: dict[str, Any] = {
+        'maxPoolSize': settings.mongo_max_pool_size,
+        'minPoolSize': settings.mongo_min_pool_size,
+        'maxIdleTimeMS': settings.mongo_max_idle_time_ms,
+        'waitQueueTimeoutMS': settings.mongo_wait_queue_timeout_ms,
+        'compressors': settings.mongo_compressors or None,
+    }
+    return AsyncMongoClient(
+        settings.mongo_uri or f'{settings.mongo_host}:{settings.mongo_port}',
+        uuidRepresentation='standard',
+        **{
+            name: option
+            for name, option in pool_options.items()
+            if option is not None
+        },
+    )
+
+
+def collection_options() -> dict[type[Document], dict[str, Any]]:
+    """Параметры коллекций, отличные от параметров клиента.
+
+    Запись лайков может требовать своей гарантии записи: это самая
+    частая запись сервиса.
+    """
+    options: dict[type[Document], dict[str, Any]] = {}
+    if settings.mongo_likes_write_concern or settings.mongo_likes_journal:
+        concern = settings.mongo_likes_write_concern or None
+        options[models.ReviewLike] = {
+            'write_concern': WriteConcern(
+                w=int(concern) if concern and concern.isdigit() else concern,
+                j=settings.mongo_likes_journal,
+            ),
+        }
+    return options
+
+
+def analytics_collection(model: type[Document]) -> AsyncCollection:
+    """Коллекция модели для чтений, допускающих отставание.
+
+    Сводки и агрегации читаются с mongo_analytics_read_preference,
+    по умолчанию с первичного узла. Вторичные узлы включаются явно:
+    сводка, перечитанная после записи оценки с отстающего узла,
+    кэшируется вместе с отставанием. Запись и чтения, которые должны
+    видеть только что сделанные изменения, всегда идут на первичный
+    узел.
+    """
+    return model.get_pymongo_collection().with_options(
+        read_preference=READ_PREFERENCES[
+            settings.mongo_analytics_read_preference
+        ],
+    )
+
+
+async def init_db(
+    client: AsyncMongoClient,
+    skip_indexes: Optional[bool] = None,
+    allow_index_dropping: bool = False,
+) -> None:
+    """Инициализирует Beanie для всех моделей проекта.
+
+    По умолчанию создание индексов определяет mongo_skip_indexes.
+    Индексы, которых нет в моделях, удаляются только при
+    allow_index_dropping: воркеры при запуске их не трогают, чтобы
+    не удалять индексы, созданные вручную, и не удалять индексы
+    одновременно из нескольких воркеров.
+    """
+    if skip_indexes is None:
+        skip_indexes = settings.mongo_skip_indexes
+    await init_beanie(
+        database=client.ugc,  # type: ignore
+        document_models=DOCUMENT_MODELS,
+        allow_index_dropping=allow_index_dropping,
+        skip_indexes=skip_indexes,
+    )
+    for model, options in collection_options().items():
+        model_settings = model.get_settings()
+        model_settings.pymongo_collection = (
+            model.get_pymongo_collection().with_options(**options)
+        )
+
+
+async def warm_up(client: AsyncMongoClient) -> None:
+    """Открывает соединения пула и прогревает коллекции.
+
+    Одновременные ping занимают разные соединения, поэтому пул
+    открывает mongo_warmup_connections соединений. Затем из каждой
+    коллекции читается один _id, чтобы первые запросы не ждали
+    разрешения маршрутов в mongos.
+    """
+    await asyncio.gather(*(
+        client.admin.command('ping')
+        for _ in range(max(settings.mongo_warmup_connections, 1))
+    ))
+    await asyncio.gather(*(
+        model.get_pymongo_collection().find_one({}, {'_id': 1})
+        for model in DOCUMENT_MODELS
+    ))
+    logger.info('Соединения с MongoDB прогреты')
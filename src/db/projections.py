@@ -0,0 +1,83 @@
+"""Модели проекций документов для чтения только нужных полей."""
+from functools import lru_cache
+from typing import Any, Optional, TypeVar
+from uuid import UUID
+
+from beanie.odm.queries.find import FindMany, FindOne
+from pydantic import BaseModel, Field, create_model
+
+
+class DocumentId(BaseModel):
+    """Только идентификатор документа: для проверок существования."""
+    id: UUID = Field(alias='_id')
+
+
+class ReviewCounters(BaseModel):
+    """Счетчики лайков рецензии."""
+    id: UUID = Field(alias='_id')
+    likes_count: int = 0
+    dislikes_count: int = 0
+
+
+class ReviewVote(BaseModel):
+    """Голос пользователя за рецензию."""
+    review_id: UUID
+    is_like: bool
+
+
+def partial_projection(
+    model: type[BaseModel],
+    fields: frozenset[str],
+) -> type[Any]:
+    """Создает модель проекции с подмножеством полей модели документа.
+
+    Все поля проекции необязательные, псевдонимы (например, _id)
+    сохраняются. Модели кэшируются по набору полей. Поля модели
+    известны только при выполнении, поэтому тип ее экземпляров - Any.
+    """
+    return _projection_model(model, fields)
+
+
+@lru_cache(maxsize=None)
+def _projection_model(
+    model: type[BaseModel],
+    fields: frozenset[str],
+) -> type[Any]:
+    """Создает и кэширует модель проекции по набору полей."""
+    definitions: dict = {
+        name: (
+            Optional[model.model_fields[name].annotation],
+            Field(None, alias=model.model_fields[name].alias),
+        )
+        for name in sorted(fields)
+    }
+    return create_model(  # type: ignore
+        f'{model.__name__}Projection',
+        __config__={'populate_by_name': True},
+        **definitions,
+    )
+
+
+QueryType = TypeVar('QueryType', FindMany, FindOne)
+
+
+def project_fields(
+    query: QueryType,
+    fields: Optional[frozenset[str]],
+    *required: str,
+) -> QueryType:
+    """Ограничивает запрос запрошенными полями документа.
+
+    Args:
+        query: запрос Beanie.
+        fields: запрошенные поля или None, чтобы читать документ целиком.
+        required: поля, которые нужны сервису (идентификатор, поле
+            сортировки) и читаются всегда.
+    """
+    if fields is None:
+        return query
+    model = query.document_model
+    document_fields = fields.union(required).intersection(model.model_fields)
+    return query.project(
+        partial_projection(model, frozenset(document_fields)),
+    )
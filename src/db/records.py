@@ -0,0 +1,164 @@
+"""Компактные записи для быстрого чтения без Beanie.
+
+Документы читаются из коллекции PyMongo напрямую и раскладываются
+в записи с __slots__ без валидации pydantic: данные в коллекциях
+записаны через модели и уже прошли валидацию. Записи отдаются
+клиенту через orjson, минуя response_model.
+
+Быстрое чтение включается для отдельных методов сервисов настройкой
+fast_read_methods. Рецензии, прочитанные через Beanie, сервис также
+отдает записями (from_model), чтобы не создавать модели ответа.
+"""
+from datetime import datetime
+from typing import Any, ClassVar, Iterable, Mapping, Optional, Self
+from uuid import UUID
+
+from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+from core.config import settings
+from schemas.rating import RatingResponse
+from schemas.review import ReviewResponse
+
+
+def fast_read(method: str) -> bool:
+    """Проверяет, включено ли быстрое чтение для метода сервиса."""
+    return method in settings.fast_read_methods.split(',')
+
+
+def record_fields(record: 'Record') -> dict[str, Any]:
+    """Возвращает поля записи словарем."""
+    return {name: getattr(record, name) for name in record.__slots__}
+
+
+class Record:
+    """Запись с полями из __slots__.
+
+    Имена полей совпадают с полями модели ответа, _id документа
+    попадает в поле id. Отсутствующие в документе поля (например,
+    не вошедшие в проекцию) получают значения из defaults.
+    """
+    __slots__: ClassVar[tuple[str, ...]] = ()
+    defaults: ClassVar[dict[str, Any]] = {}
+    aliases: ClassVar[dict[str, str]] = {'id': '_id'}
+    # Модель ответа, по которой запись читается из общего кэша.
+    response_model: ClassVar[type[BaseModel]]
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls,
+        source: Any,
+        schema_handler: GetCoreSchemaHandler,
+    ) -> core_schema.CoreSchema:
+        """Схема pydantic для записи в общем кэше.
+
+        Запись сохраняется словарем полей и читается через модель
+        ответа, поэтому в общий кэш попадают только полные записи.
+        """
+        return core_schema.no_info_after_validator_function(
+            cls.from_model,
+            schema_handler(cls.response_model),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                record_fields,
+            ),
+        )
+
+    @classmethod
+    def from_document(cls, document: Mapping[str, Any]) -> Self:
+        """Создает запись из документа MongoDB."""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            key = cls.aliases.get(name, name)
+            setattr(record, name, document.get(key, cls.defaults.get(name)))
+        return record
+
+    @classmethod
+    def from_model(cls, model: BaseModel, **overrides: Any) -> Self:
+        """Создает запись из модели, прочитанной через Beanie.
+
+        Поля читаются из __dict__ модели, минуя __getattribute__
+        документа Beanie. overrides заменяют поля модели.
+        """
+        fields = {**model.__dict__, **overrides}
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, fields.get(name, cls.defaults.get(name)))
+        return record
+
+    @classmethod
+    def projection(
+        cls,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Optional[dict[str, int]]:
+        """Проекция документа для набора полей записи."""
+        if fields is None:
+            return None
+        return {
+            cls.aliases.get(name, name): 1
+            for name in fields
+            if name in cls.__slots__
+        }
+
+    def model_copy(self, update: Optional[dict[str, Any]] = None) -> Self:
+        """Возвращает копию записи с измененными полями.
+
+        Повторяет сигнатуру model_copy pydantic, чтобы сервисы
+        одинаково обращались с моделями и записями.
+        """
+        record = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        for name, field_value in (update or {}).items():
+            setattr(record, name, field_value)
+        return record
+
+
+class ReviewRecord(Record):
+    """Рецензия в представлении ReviewResponse."""
+    __slots__ = (
+        'id',
+        'filmwork_id',
+        'user_id',
+        'text',
+        'author_name',
+        'rating',
+        'created_at',
+        'updated_at',
+        'likes_count',
+        'dislikes_count',
+        'user_vote',
+    )
+    defaults = {'likes_count': 0, 'dislikes_count': 0}
+    response_model = ReviewResponse
+
+    id: UUID
+    filmwork_id: UUID
+    user_id: UUID
+    text: str
+    author_name: str
+    rating: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+    likes_count: int
+    dislikes_count: int
+    user_vote: Optional[bool]
+
+
+class RatingRecord(Record):
+    """Оценка в представлении RatingResponse."""
+    __slots__ = (
+        'id',
+        'filmwork_id',
+        'user_id',
+        'rating',
+        'created_at',
+        'updated_at',
+    )
+    response_model = RatingResponse
+
+    id: UUID
+    filmwork_id: UUID
+    user_id: UUID
+    rating: int
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,32 @@
+from typing import Any, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+# created - документ создан, updated - изменен, exists - уже был,
+# duplicate - повтор ключа, invalid - ошибка валидации,
+# not_found - не найден связанный документ, error - ошибка записи.
+BulkItemStatus = Literal[
+    'created',
+    'updated',
+    'exists',
+    'duplicate',
+    'invalid',
+    'not_found',
+    'error',
+]
+
+
+class BulkItemResult(BaseModel):
+    """Результат обработки элемента пакета."""
+    # Номер элемента в запросе.
+    index: int
+    status: BulkItemStatus
+    # Идентификатор документа, если он известен.
+    id: Optional[UUID] = None
+    detail: Optional[Any] = None
+
+
+class BulkResponse(BaseModel):
+    """Результаты обработки пакета в порядке элементов запроса."""
+    elements: list[BulkItemResult]
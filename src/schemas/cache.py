@@ -0,0 +1,28 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CacheCounters(BaseModel):
+    """Счетчики обращений к кэшу."""
+    hits: int = 0
+    misses: int = 0
+    # Промахи, дождавшиеся уже идущей загрузки того же ключа.
+    coalesced: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    # Промахи, найденные в общем для воркеров уровне кэша.
+    shared_hits: int = 0
+    shared_errors: int = 0
+
+
+class CacheStats(CacheCounters):
+    """Состояние кэша с разбивкой счетчиков по пространствам имен."""
+    # Общий для воркеров уровень кэша, если он подключен.
+    backend: Optional[str] = None
+    entries: int = 0
+    bytes: int = 0
+    max_items: int
+    max_bytes: int
+    namespaces: dict[str, CacheCounters] = {}
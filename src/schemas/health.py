@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class HealthStatus(BaseModel):
+    """Модель для ответа проверки состояния."""
+    status: str = 'ok'
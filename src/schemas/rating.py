@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class RatingCreate(BaseModel):
@@ -11,23 +11,11 @@ class RatingCreate(BaseModel):
     user_id: UUID
     rating: int = Field(ge=0, le=10)
 
-    @validator('rating')
-    def validate_rating(cls, rating):
-        if not 0 <= rating <= 10:
-            raise ValueError('Рейтинг должен быть от 0 до 10')
-        return rating
-
 
 class RatingUpdate(BaseModel):
     """Модель для обновления оценки."""
     rating: int = Field(ge=0, le=10)
 
-    @validator('rating')
-    def validate_rating(cls, rating):
-        if not 0 <= rating <= 10:
-            raise ValueError('Рейтинг должен быть от 0 до 10')
-        return rating
-
 
 class RatingResponse(BaseModel):
     """Модель для ответа."""
@@ -48,3 +36,8 @@ class FilmworkRatingSummary(BaseModel):
     likes_count: int = 0
     dislikes_count: int = 0
     ratings_count: int = 0
+
+
+class FilmworkRatingSummariesRequest(BaseModel):
+    """Модель запроса сводок по рейтингам кинопроизведений."""
+    filmwork_ids: list[UUID] = Field(min_length=1, max_length=100)
@@ -0,0 +1,25 @@
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class UserStateRequest(BaseModel):
+    """Модель запроса состояния пользователя по кинопроизведениям."""
+    filmwork_ids: list[UUID] = Field(min_length=1, max_length=100)
+
+
+class UserFilmworkState(BaseModel):
+    """Действия пользователя с кинопроизведением."""
+    bookmarked: bool = False
+    # Оценка пользователя или None, если оценки нет.
+    rating: Optional[int] = None
+    # Идентификатор рецензии пользователя или None.
+    review_id: Optional[UUID] = None
+
+
+class UserStateResponse(BaseModel):
+    """Модель для ответа."""
+    user_id: UUID
+    # Состояние по каждому запрошенному кинопроизведению.
+    filmworks: dict[UUID, UserFilmworkState]
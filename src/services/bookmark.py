@@ -1,11 +1,28 @@
+from datetime import datetime, timezone
 from http import HTTPStatus
 import logging
+from typing import Any, AsyncIterator, Optional
 from uuid import UUID
 
+from beanie.odm.queries.find import FindMany
 from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 
+from core.constants import (
+    CREATED_AT_FIELD,
+    DOCUMENT_ID_FIELD,
+    FILMWORK_ID_FIELD,
+    ID_FIELD,
+    USER_ID_FIELD,
+)
+from db.ids import uuid7
 from db.models import Bookmark
+from db.projections import project_fields
 from schemas.bookmark import BookmarkCreate
+from schemas.bulk import BulkResponse
+from services.bulk import BulkBatch, bulk_upsert
+from services.pagination import keyset_filter, keyset_sort, next_cursor
 
 
 class BookmarkService:
@@ -34,27 +51,112 @@ class BookmarkService:
         bookmark_data: BookmarkCreate,
     ) -> Bookmark:
         """Создает закладку, если она не существует."""
-
-        # Проверяем существование закладки.
-        existing = await Bookmark.find_one(
-            Bookmark.user_id == bookmark_data.user_id,
-            Bookmark.filmwork_id == bookmark_data.filmwork_id,
+        bookmark = Bookmark(
+            user_id=bookmark_data.user_id,
+            filmwork_id=bookmark_data.filmwork_id,
         )
-
-        if existing:
+        # Уникальность закладки гарантирует индекс (user_id, filmwork_id).
+        try:
+            return await bookmark.insert()
+        except DuplicateKeyError:
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
                 detail='Это кинопроизведение уже добавлено в закладки.',
             )
-        bookmark = Bookmark(
-            user_id=bookmark_data.user_id,
-            filmwork_id=bookmark_data.filmwork_id,
+
+    @classmethod
+    async def bulk_create_bookmarks(
+        cls,
+        elements: list[dict[str, Any]],
+    ) -> BulkResponse:
+        """Добавляет закладки пакетом.
+
+        Закладки, которые уже есть у пользователя, получают статус
+        exists и не меняются.
+        """
+        batch = BulkBatch(
+            elements,
+            BookmarkCreate,
+            lambda bookmark: (bookmark.user_id, bookmark.filmwork_id),
+        )
+        bookmark_ids = {index: uuid7() for index, _ in batch.pending}
+        created, errors = await bulk_upsert(
+            Bookmark,
+            cls._bookmark_upserts(batch.pending, bookmark_ids),
         )
-        return await bookmark.insert()
+        # Идентификатор существующей закладки не читается.
+        batch.set_upsert_results(
+            {index: bookmark_ids[index] for index in created},
+            created,
+            errors,
+            'exists',
+        )
+        return batch.response()
+
+    @classmethod
+    async def get_user_bookmarks(
+        cls,
+        user_id: UUID,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[Bookmark], Optional[str]]:
+        """Возвращает страницу закладок пользователя, новые первыми."""
+        bookmarks = await cls._user_bookmarks_query(
+            user_id,
+            cursor,
+            fields,
+        ).limit(limit).to_list()
+        return bookmarks, next_cursor(CREATED_AT_FIELD, bookmarks, limit)
+
+    @classmethod
+    def iter_user_bookmarks(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[Bookmark]:
+        """Возвращает закладки пользователя по мере чтения из MongoDB."""
+        return aiter(cls._user_bookmarks_query(user_id, cursor, fields))
+
+    @classmethod
+    def _bookmark_upserts(
+        cls,
+        bookmarks: list[tuple[int, BookmarkCreate]],
+        bookmark_ids: dict[int, UUID],
+    ) -> list[tuple[int, UpdateOne]]:
+        """Операции, создающие отсутствующие закладки."""
+        created_at = datetime.now(timezone.utc)
+        return [
+            (
+                index,
+                UpdateOne(
+                    {
+                        USER_ID_FIELD: bookmark.user_id,
+                        FILMWORK_ID_FIELD: bookmark.filmwork_id,
+                    },
+                    {
+                        '$setOnInsert': {
+                            DOCUMENT_ID_FIELD: bookmark_ids[index],
+                            CREATED_AT_FIELD: created_at,
+                        },
+                    },
+                    upsert=True,
+                ),
+            )
+            for index, bookmark in bookmarks
+        ]
 
     @classmethod
-    async def get_user_bookmarks(cls, user_id: UUID) -> list[Bookmark]:
-        """Возвращает все закладки пользователя."""
-        return await Bookmark.find(
+    def _user_bookmarks_query(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> FindMany[Bookmark]:
+        """Запрос закладок пользователя, начиная с позиции курсора."""
+        query = Bookmark.find(
             Bookmark.user_id == user_id,
-        ).sort(-Bookmark.created_at).to_list()  # type: ignore
+            keyset_filter(CREATED_AT_FIELD, cursor),
+        ).sort(keyset_sort(CREATED_AT_FIELD))
+        return project_fields(query, fields, ID_FIELD, CREATED_AT_FIELD)
@@ -0,0 +1,175 @@
+"""Общие шаги пакетной записи для bulk-эндпоинтов.
+
+Элементы пакета проверяются по одному: ошибка валидации или повтор
+ключа в пакете попадает в результат элемента и не прерывает обработку
+остальных. Корректные элементы записываются одним неупорядоченным
+bulk_write из upsert-операций.
+"""
+from typing import Any, Callable, Generic, Hashable, Mapping, Optional, TypeVar
+from uuid import UUID
+
+from beanie import Document
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from schemas.bulk import BulkItemResult, BulkItemStatus, BulkResponse
+
+# Код ошибки MongoDB при нарушении уникального индекса.
+DUPLICATE_KEY_ERROR = 11000
+
+ItemType = TypeVar('ItemType', bound=BaseModel)
+# Ошибки записи из ответа bulk_write по номерам элементов.
+WriteErrors = dict[int, dict[str, Any]]
+
+
+class BulkBatch(Generic[ItemType]):
+    """Пакет элементов запроса с результатами их обработки.
+
+    Args:
+        elements: элементы из тела запроса.
+        schema: модель, по которой проверяется каждый элемент.
+        key: ключ уникальности элемента; повторы ключа в пакете
+            получают статус duplicate.
+    """
+
+    def __init__(
+        self,
+        elements: list[Any],
+        schema: type[ItemType],
+        key: Callable[[ItemType], Hashable],
+    ) -> None:
+        self.valid: list[tuple[int, ItemType]] = []
+        self._statuses: dict[int, BulkItemResult] = {}
+        first_indexes: dict[Hashable, int] = {}
+        for index, raw_element in enumerate(elements):
+            try:
+                element = schema.model_validate(raw_element)
+            except ValidationError as exc:
+                errors = exc.errors(include_url=False, include_context=False)
+                self.set_result(index, 'invalid', detail=errors)
+                continue
+            first_index = first_indexes.setdefault(key(element), index)
+            if first_index != index:
+                self.set_result(
+                    index,
+                    'duplicate',
+                    detail=f'Повторяет элемент {first_index}',
+                )
+                continue
+            self.valid.append((index, element))
+
+    @property
+    def pending(self) -> list[tuple[int, ItemType]]:
+        """Корректные элементы, для которых еще нет результата."""
+        return [
+            (index, element)
+            for index, element in self.valid
+            if index not in self._statuses
+        ]
+
+    def set_result(
+        self,
+        index: int,
+        status: BulkItemStatus,
+        document_id: Optional[UUID] = None,
+        detail: Optional[Any] = None,
+    ) -> None:
+        """Сохраняет результат обработки элемента."""
+        self._statuses[index] = BulkItemResult(
+            index=index,
+            status=status,
+            id=document_id,
+            detail=detail,
+        )
+
+    def set_write_error(self, index: int, error: dict[str, Any]) -> None:
+        """Сохраняет ошибку записи элемента из ответа bulk_write."""
+        status: BulkItemStatus = 'error'
+        if error.get('code') == DUPLICATE_KEY_ERROR:
+            status = 'duplicate'
+        self.set_result(index, status, detail=error.get('errmsg'))
+
+    def set_upsert_results(
+        self,
+        document_ids: Mapping[int, UUID],
+        created: set[int],
+        errors: WriteErrors,
+        matched_status: BulkItemStatus = 'updated',
+    ) -> list[tuple[int, ItemType]]:
+        """Сохраняет результаты upsert ожидающих элементов.
+
+        Элементы из created получают статус created, остальные
+        записанные - matched_status. Возвращает записанные элементы.
+        """
+        written = []
+        for index, element in self.pending:
+            error = errors.get(index)
+            if error is not None:
+                self.set_write_error(index, error)
+                continue
+            status = 'created' if index in created else matched_status
+            self.set_result(index, status, document_ids.get(index))
+            written.append((index, element))
+        return written
+
+    def response(self) -> BulkResponse:
+        """Возвращает результаты в порядке элементов запроса."""
+        return BulkResponse(
+            elements=[
+                self._statuses[index] for index in sorted(self._statuses)
+            ],
+        )
+
+
+async def bulk_upsert(
+    model: type[Document],
+    operations: list[tuple[int, UpdateOne]],
+) -> tuple[set[int], WriteErrors]:
+    """Выполняет upsert-операции одним неупорядоченным bulk_write.
+
+    Args:
+        model: модель коллекции.
+        operations: пары (номер элемента запроса, операция).
+
+    Returns:
+        Номера элементов, для которых документ был создан, и ошибки
+        записи по номерам элементов.
+    """
+    if not operations:
+        return set(), {}
+    indexes = [index for index, _ in operations]
+    try:
+        write_result = await model.get_pymongo_collection().bulk_write(
+            [operation for _, operation in operations],
+            ordered=False,
+        )
+    except BulkWriteError as exc:
+        upserted = [
+            upsert['index'] for upsert in exc.details.get('upserted', [])
+        ]
+        write_errors = exc.details.get('writeErrors', [])
+    else:
+        upserted = list(write_result.upserted_ids or {})
+        write_errors = []
+    return (
+        {indexes[position] for position in upserted},
+        {indexes[error['index']]: error for error in write_errors},
+    )
+
+
+def pairs_filter(
+    first_field: str,
+    second_field: str,
+    pairs: list[tuple[Any, Any]],
+) -> dict[str, Any]:
+    """Условие выборки документов по парам значений двух полей.
+
+    Каждое условие $or обслуживается уникальным составным индексом.
+    """
+    return {
+        '$or': [
+            {first_field: first, second_field: second}
+            for first, second in pairs
+        ],
+    }
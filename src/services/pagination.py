@@ -0,0 +1,138 @@
+"""Курсорная (keyset) пагинация по убыванию поля сортировки.
+
+Курсор - непрозрачная для клиента строка, в которой закодированы поле
+сортировки, его значение и идентификатор последнего документа страницы.
+Следующая страница выбирается условием "после (значение, _id)", поэтому
+ее стоимость не зависит от номера страницы.
+"""
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Literal, Optional, TypeVar
+from uuid import UUID
+
+from beanie import SortDirection
+from fastapi import HTTPException
+import orjson
+from pydantic import TypeAdapter
+
+INVALID_CURSOR_MSG = 'Некорректный курсор пагинации'
+
+# Содержимое курсора: поле сортировки, его значение и _id. Значение
+# проверяется строго: оценка - целое число или null, время - строка
+# ISO 8601, поэтому операторы MongoDB из подделанного курсора не
+# попадают в фильтр запроса.
+CURSOR_ADAPTER: TypeAdapter[tuple[str, Any, UUID]] = TypeAdapter(
+    tuple[Literal['rating'], Optional[int], UUID]
+    | tuple[Literal['created_at', 'updated_at'], datetime, UUID],
+)
+
+ItemType = TypeVar('ItemType')
+
+
+@dataclass
+class PageRequest:
+    """Параметры страницы: курсор или смещение, размер и сортировка."""
+    skip: int = 0
+    limit: int = 50
+    sort_by: str = 'created_at'
+    cursor: Optional[str] = None
+
+
+def encode_cursor(sort_by: str, sort_value: Any, last_id: UUID) -> str:
+    """Кодирует позицию последнего документа страницы в курсор."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = orjson.dumps([sort_by, sort_value, str(last_id)])
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple[Any, UUID]:
+    """Раскодирует курсор, выданный для той же сортировки.
+
+    Raises:
+        HTTPException: курсор поврежден или выдан для другой сортировки.
+    """
+    try:
+        cursor_sort_by, sort_value, last_id = CURSOR_ADAPTER.validate_json(
+            base64.urlsafe_b64decode(cursor.encode()),
+            strict=True,
+        )
+    # binascii.Error и pydantic.ValidationError - подклассы ValueError.
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=INVALID_CURSOR_MSG,
+        )
+    if cursor_sort_by != sort_by:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=INVALID_CURSOR_MSG,
+        )
+    return sort_value, last_id
+
+
+def keyset_sort(sort_by: str) -> list[tuple[str, SortDirection]]:
+    """Сортировка по убыванию поля с _id в качестве разрешения равенства."""
+    return [
+        (sort_by, SortDirection.DESCENDING),
+        ('_id', SortDirection.DESCENDING),
+    ]
+
+
+def keyset_filter(
+    sort_by: str,
+    cursor: Optional[str],
+    nullable: bool = False,
+) -> dict[str, Any]:
+    """Условие выборки документов, идущих после курсора.
+
+    Args:
+        sort_by: поле сортировки.
+        cursor: курсор предыдущей страницы или None для первой страницы.
+        nullable: поле может быть пустым; пустые значения идут в конце.
+    """
+    if cursor is None:
+        return {}
+    sort_value, last_id = decode_cursor(cursor, sort_by)
+    if sort_value is None:
+        return {sort_by: None, '_id': {'$lt': last_id}}
+    conditions: list[dict[str, Any]] = [
+        {sort_by: {'$lt': sort_value}},
+        {sort_by: sort_value, '_id': {'$lt': last_id}},
+    ]
+    if nullable:
+        conditions.append({sort_by: None})
+    return {'$or': conditions}
+
+
+def next_cursor(
+    sort_by: str,
+    documents: list[Any],
+    limit: int,
+) -> Optional[str]:
+    """Возвращает курсор следующей страницы, если страница заполнена."""
+    if not documents or len(documents) < limit:
+        return None
+    last_document = documents[-1]
+    return encode_cursor(
+        sort_by,
+        getattr(last_document, sort_by),
+        last_document.id,
+    )
+
+
+async def batched(
+    elements: AsyncIterator[ItemType],
+    size: int,
+) -> AsyncIterator[list[ItemType]]:
+    """Группирует элементы асинхронного потока в пачки заданного размера."""
+    batch: list[ItemType] = []
+    async for element in elements:
+        batch.append(element)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
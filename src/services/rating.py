@@ -1,16 +1,49 @@
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
 from http import HTTPStatus
 import logging
+from typing import Any, AsyncIterator, Optional
 from uuid import UUID
 
+from beanie import UpdateResponse
+from beanie.odm.queries.find import FindMany
 from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 
-from db.models import Rating
+from core.cache import cache
+from core.config import settings
+from core.constants import (
+    CREATED_AT_FIELD,
+    DOCUMENT_ID_FIELD,
+    FILMWORK_ID_FIELD,
+    ID_FIELD,
+    RATING_FIELD,
+    SET_OPERATOR,
+    UPDATED_AT_FIELD,
+    USER_ID_FIELD,
+)
+from db.ids import uuid7
+from db.models import FilmworkRatingStats, Rating
+from db.mongo import analytics_collection
+from db.projections import partial_projection, project_fields
+from db.records import RatingRecord, fast_read
+from schemas.bulk import BulkResponse
 from schemas.rating import (
     FilmworkRatingSummary,
     RatingCreate,
     RatingUpdate,
 )
+from services.bulk import BulkBatch, WriteErrors, bulk_upsert, pairs_filter
+from services.pagination import keyset_filter, keyset_sort, next_cursor
+from services.revision import raise_not_matched, revision_filter
+
+# Пространство имен кэша сводок по рейтингам кинопроизведений.
+RATING_SUMMARY_CACHE = 'rating_summary'
+# Поля оценки, нужные для пакетной записи.
+RATING_KEY_FIELDS = frozenset(
+    (ID_FIELD, USER_ID_FIELD, FILMWORK_ID_FIELD, RATING_FIELD),
+)
 
 
 class RatingService:
@@ -22,25 +55,51 @@ class RatingService:
         rating_data: RatingCreate,
     ) -> Rating:
         """Создает новую оценку кинопроизведения."""
-        # Проверяем существование оценки
-        existing_rating = await Rating.find_one(
-            Rating.user_id == rating_data.user_id,
-            Rating.filmwork_id == rating_data.filmwork_id,
+        rating = Rating(
+            user_id=rating_data.user_id,
+            filmwork_id=rating_data.filmwork_id,
+            rating=rating_data.rating,
         )
-
-        if existing_rating:
+        # Уникальность оценки гарантирует индекс (user_id, filmwork_id).
+        try:
+            await rating.insert()
+        except DuplicateKeyError:
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
                 detail='Оценка для этого фильма уже существует',
             )
+        await cls._update_rating_stats(
+            rating.filmwork_id,
+            new_rating=rating.rating,
+        )
+        return rating
 
-        # Создаем новую оценку
-        rating = Rating(
-            user_id=rating_data.user_id,
-            filmwork_id=rating_data.filmwork_id,
-            rating=rating_data.rating,
+    @classmethod
+    async def bulk_upsert_ratings(
+        cls,
+        elements: list[dict[str, Any]],
+    ) -> BulkResponse:
+        """Создает или обновляет оценки пакетом.
+
+        Прежние оценки читаются одним запросом, по ним сдвигается
+        статистика кинопроизведений. Если оценку изменили между чтением
+        и записью пакета, статистику исправляет rebuild_rating_stats.
+        """
+        batch = BulkBatch(
+            elements,
+            RatingCreate,
+            lambda rating: (rating.user_id, rating.filmwork_id),
+        )
+        old_ratings = await cls._find_old_ratings(batch.pending)
+        rating_ids, created, errors = await cls._write_ratings(
+            batch.pending,
+            old_ratings,
         )
-        return await rating.insert()
+        written = batch.set_upsert_results(rating_ids, created, errors)
+        await cls._apply_rating_stats_changes(
+            cls._bulk_stats_changes(written, old_ratings, created),
+        )
+        return batch.response()
 
     @classmethod
     async def update_rating(
@@ -48,22 +107,49 @@ class RatingService:
         user_id: UUID,
         rating_id: UUID,
         rating_data: RatingUpdate,
+        revision: Optional[datetime] = None,
     ) -> Rating:
-        """Обновляет существующую оценку."""
+        """Обновляет существующую оценку.
+
+        Оценка изменяется одним find_one_and_update с $set измененных
+        полей. Если передана ревизия (updated_at), оценка изменяется,
+        только пока она совпадает.
+        """
+        updated_at = datetime.now(timezone.utc)
+        document_filter = {
+            DOCUMENT_ID_FIELD: rating_id,
+            USER_ID_FIELD: user_id,
+        }
+        # Прежнее значение нужно для переноса оценки между корзинами
+        # гистограммы, поэтому возвращается документ до изменения.
         rating = await Rating.find_one(
-            Rating.user_id == user_id,
-            Rating.id == rating_id,
+            document_filter,
+            revision_filter(revision),
+        ).update(
+            {
+                SET_OPERATOR: {
+                    RATING_FIELD: rating_data.rating,
+                    UPDATED_AT_FIELD: updated_at,
+                },
+            },
+            response_type=UpdateResponse.OLD_DOCUMENT,
         )
 
         if rating is None:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail='Оценка не найдена',
+            await raise_not_matched(
+                Rating,
+                document_filter,
+                revision,
+                'Оценка не найдена',
             )
 
+        await cls._update_rating_stats(
+            rating.filmwork_id,
+            old_rating=rating.rating,
+            new_rating=rating_data.rating,
+        )
         rating.rating = rating_data.rating
-        rating.updated_at = datetime.now(timezone.utc)
-        await rating.save()
+        rating.updated_at = updated_at
         return rating
 
     @classmethod
@@ -89,13 +175,34 @@ class RatingService:
         cls,
         user_id: UUID,
         filmwork_id: UUID,
-    ) -> Rating:
-        """Удаляет оценку пользователя."""
-        rating = await cls.get_user_rating(
-            user_id=user_id,
-            filmwork_id=filmwork_id,
+        revision: Optional[datetime] = None,
+    ) -> RatingRecord:
+        """Удаляет оценку пользователя.
+
+        Оценка удаляется одним find_one_and_delete. Если передана
+        ревизия (updated_at), оценка удаляется, только пока
+        она совпадает.
+        """
+        document_filter = {
+            USER_ID_FIELD: user_id,
+            FILMWORK_ID_FIELD: filmwork_id,
+        }
+        document = await Rating.get_pymongo_collection().find_one_and_delete(
+            {**document_filter, **revision_filter(revision)},
+        )
+        if document is None:
+            await raise_not_matched(
+                Rating,
+                document_filter,
+                revision,
+                'Оценка не найдена',
+            )
+
+        rating = RatingRecord.from_document(document)
+        await cls._update_rating_stats(
+            rating.filmwork_id,
+            old_rating=rating.rating,
         )
-        await rating.delete()
         return rating
 
     @classmethod
@@ -103,38 +210,415 @@ class RatingService:
         cls,
         filmwork_id: UUID,
     ) -> FilmworkRatingSummary:
-        """Возвращает сводную информацию по рейтингам кинопроизведения."""
+        """Возвращает сводную информацию по рейтингам кинопроизведения.
+
+        Сводка кэшируется и сбрасывается при изменении оценок фильма.
+        """
+        summaries = await cls.get_filmwork_rating_summaries([filmwork_id])
+        return summaries[0]
+
+    @classmethod
+    async def get_filmwork_rating_summaries(
+        cls,
+        filmwork_ids: list[UUID],
+    ) -> list[FilmworkRatingSummary]:
+        """Возвращает сводки по рейтингам набора кинопроизведений.
+
+        Сводки, которых нет в кэше, читаются одним запросом. Порядок
+        сводок совпадает с порядком идентификаторов, повторы убираются.
+        """
+        summaries = await cache.get_or_load_many(
+            RATING_SUMMARY_CACHE,
+            filmwork_ids,
+            cls._load_rating_summaries,
+            settings.cache_rating_summary_ttl,
+            FilmworkRatingSummary,
+        )
+        # Загрузчик возвращает сводку для каждого кинопроизведения.
+        return [
+            summary for summary in summaries.values() if summary is not None
+        ]
+
+    @classmethod
+    async def rebuild_rating_stats(cls) -> None:
+        """Строит статистику оценок по коллекции ratings.
+
+        Агрегация выполняется на стороне MongoDB и записывает результат
+        в коллекцию статистики через $merge. Статистика, не попавшая
+        в результат (у кинопроизведения не осталось оценок), удаляется
+        по отметке rebuilt_at.
+
+        Изменения оценок во время построения теряются: $merge заменяет
+        статистику, посчитанную до их $inc. Запись оценок на время
+        команды нужно остановить.
+        """
+        rebuilt_at = datetime.now(timezone.utc)
+        pipeline = [
+            *cls._rating_stats_stages(),
+            {SET_OPERATOR: {'rebuilt_at': rebuilt_at}},
+            {
+                '$merge': {
+                    'into': FilmworkRatingStats.get_collection_name(),
+                    'on': DOCUMENT_ID_FIELD,
+                    'whenMatched': 'replace',
+                    'whenNotMatched': 'insert',
+                },
+            },
+        ]
+        cursor = await Rating.get_pymongo_collection().aggregate(pipeline)
+        await cursor.to_list()
+        await FilmworkRatingStats.get_pymongo_collection().delete_many(
+            {'rebuilt_at': {'$ne': rebuilt_at}},
+        )
+        await cache.invalidate(RATING_SUMMARY_CACHE)
+
+    @classmethod
+    async def get_user_ratings(
+        cls,
+        user_id: UUID,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[Rating] | list[RatingRecord], Optional[str]]:
+        """Возвращает страницу оценок пользователя.
+
+        Недавно измененные оценки идут первыми. При быстром чтении
+        возвращаются записи RatingRecord, прочитанные без Beanie.
+        """
+        if fast_read('RatingService.get_user_ratings'):
+            return await cls._get_user_rating_records(
+                user_id,
+                limit,
+                cursor,
+                fields,
+            )
+        ratings = await cls._user_ratings_query(
+            user_id,
+            cursor,
+            fields,
+        ).limit(limit).to_list()
+        return ratings, next_cursor(UPDATED_AT_FIELD, ratings, limit)
+
+    @classmethod
+    def iter_user_ratings(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[Rating]:
+        """Возвращает оценки пользователя по мере чтения из MongoDB."""
+        return aiter(cls._user_ratings_query(user_id, cursor, fields))
+
+    @classmethod
+    async def _write_ratings(
+        cls,
+        ratings: list[tuple[int, RatingCreate]],
+        old_ratings: dict[int, Any],
+    ) -> tuple[dict[int, UUID], set[int], WriteErrors]:
+        """Записывает оценки одним bulk_write.
+
+        Возвращает идентификаторы оценок, номера созданных оценок
+        и ошибки записи по номерам.
+        """
+        rating_ids = {
+            index: old_rating.id if old_rating else uuid7()
+            for index, old_rating in old_ratings.items()
+        }
+        created, errors = await bulk_upsert(
+            Rating,
+            cls._rating_upserts(ratings, rating_ids),
+        )
+        # Оценка, которой не было при чтении, учитывается как новая.
+        created.update(
+            index
+            for index, old_rating in old_ratings.items()
+            if old_rating is None
+        )
+        return rating_ids, created, errors
+
+    @classmethod
+    def _bulk_stats_changes(
+        cls,
+        written: list[tuple[int, RatingCreate]],
+        old_ratings: dict[int, Any],
+        created: set[int],
+    ) -> dict[UUID, Counter]:
+        """Суммирует изменения статистики по записанным оценкам."""
+        stats_changes: dict[UUID, Counter] = defaultdict(Counter)
+        for index, rating in written:
+            old_rating = None if index in created else old_ratings[index]
+            stats_changes[rating.filmwork_id].update(
+                cls._rating_stats_changes(
+                    old_rating.rating if old_rating else None,
+                    rating.rating,
+                ),
+            )
+        return stats_changes
+
+    @classmethod
+    async def _find_old_ratings(
+        cls,
+        ratings: list[tuple[int, RatingCreate]],
+    ) -> dict[int, Any]:
+        """Читает прежние оценки элементов пакета, None - оценки нет."""
+        existing = await cls._find_ratings(
+            [(rating.user_id, rating.filmwork_id) for _, rating in ratings],
+        )
+        return {
+            index: existing.get((rating.user_id, rating.filmwork_id))
+            for index, rating in ratings
+        }
+
+    @classmethod
+    def _rating_upserts(
+        cls,
+        ratings: list[tuple[int, RatingCreate]],
+        rating_ids: dict[int, UUID],
+    ) -> list[tuple[int, UpdateOne]]:
+        """Операции, создающие или изменяющие оценки."""
+        updated_at = datetime.now(timezone.utc)
+        return [
+            (
+                index,
+                UpdateOne(
+                    {
+                        USER_ID_FIELD: rating.user_id,
+                        FILMWORK_ID_FIELD: rating.filmwork_id,
+                    },
+                    {
+                        SET_OPERATOR: {
+                            RATING_FIELD: rating.rating,
+                            UPDATED_AT_FIELD: updated_at,
+                        },
+                        '$setOnInsert': {
+                            DOCUMENT_ID_FIELD: rating_ids[index],
+                            CREATED_AT_FIELD: updated_at,
+                        },
+                    },
+                    upsert=True,
+                ),
+            )
+            for index, rating in ratings
+        ]
+
+    @classmethod
+    async def _find_ratings(
+        cls,
+        keys: list[tuple[UUID, UUID]],
+    ) -> dict[tuple[UUID, UUID], Any]:
+        """Читает оценки по парам (user_id, filmwork_id) одним запросом."""
+        if not keys:
+            return {}
         ratings = await Rating.find(
-            Rating.filmwork_id == filmwork_id,
+            pairs_filter(USER_ID_FIELD, FILMWORK_ID_FIELD, keys),
+        ).project(
+            partial_projection(Rating, RATING_KEY_FIELDS),
         ).to_list()
+        return {
+            (rating.user_id, rating.filmwork_id): rating
+            for rating in ratings
+        }
 
-        if not ratings:
-            return FilmworkRatingSummary(filmwork_id=filmwork_id)
-
-        total_ratings = len(ratings)
-        total_score = sum(rating.rating for rating in ratings)
-        average_rating = round(total_score / total_ratings, 2)
+    @classmethod
+    async def _load_rating_summaries(
+        cls,
+        filmwork_ids: list[UUID],
+    ) -> dict[UUID, FilmworkRatingSummary]:
+        """Читает сводки по рейтингам кинопроизведений из MongoDB.
 
-        # Распределение оценок.
-        distribution = {}
-        for indx in range(11):
-            distribution[indx] = sum(
-                1 for rating in ratings if rating.rating == indx
+        Сводки допускают отставание и читаются по политике чтения
+        аналитических запросов.
+        """
+        if settings.rating_summary_source == 'aggregation':
+            stats = await cls._aggregate_rating_stats(filmwork_ids)
+        else:
+            cursor = analytics_collection(FilmworkRatingStats).find(
+                {DOCUMENT_ID_FIELD: {'$in': filmwork_ids}},
+            )
+            stats = [
+                FilmworkRatingStats.model_validate(row)
+                for row in await cursor.to_list()
+            ]
+        stats_by_id = {
+            filmwork_stats.id: filmwork_stats for filmwork_stats in stats
+        }
+        return {
+            filmwork_id: cls._summary_from_stats(
+                filmwork_id,
+                stats_by_id.get(filmwork_id),
             )
+            for filmwork_id in filmwork_ids
+        }
+
+    @classmethod
+    async def _aggregate_rating_stats(
+        cls,
+        filmwork_ids: list[UUID],
+    ) -> list[FilmworkRatingStats]:
+        """Считает статистику оценок кинопроизведений агрегацией.
+
+        Используется, пока предрассчитанная статистика не построена:
+        оценки не передаются в приложение, Mongo возвращает по одной
+        строке на кинопроизведение.
+        """
+        pipeline = [
+            {'$match': {FILMWORK_ID_FIELD: {'$in': filmwork_ids}}},
+            *cls._rating_stats_stages(),
+        ]
+        cursor = await analytics_collection(Rating).aggregate(pipeline)
+        return [
+            FilmworkRatingStats.model_validate(row)
+            for row in await cursor.to_list()
+        ]
+
+    @classmethod
+    def _rating_stats_stages(cls) -> list[dict]:
+        """Стадии агрегации, сворачивающие оценки в статистику фильмов."""
+        return [
+            {
+                '$group': {
+                    DOCUMENT_ID_FIELD: {
+                        FILMWORK_ID_FIELD: '$filmwork_id',
+                        RATING_FIELD: '$rating',
+                    },
+                    'count': {'$sum': 1},
+                },
+            },
+            {
+                '$group': {
+                    DOCUMENT_ID_FIELD: '$_id.filmwork_id',
+                    'ratings_count': {'$sum': '$count'},
+                    'ratings_sum': {
+                        '$sum': {'$multiply': ['$_id.rating', '$count']},
+                    },
+                    'histogram': {
+                        '$push': {
+                            'k': {'$toString': '$_id.rating'},
+                            'v': '$count',
+                        },
+                    },
+                },
+            },
+            {SET_OPERATOR: {'histogram': {'$arrayToObject': '$histogram'}}},
+        ]
+
+    @classmethod
+    def _summary_from_stats(
+        cls,
+        filmwork_id: UUID,
+        stats: Optional[FilmworkRatingStats],
+    ) -> FilmworkRatingSummary:
+        """Собирает сводку по рейтингам из статистики кинопроизведения."""
+        if stats is None or not stats.ratings_count:
+            return FilmworkRatingSummary(filmwork_id=filmwork_id)
 
         return FilmworkRatingSummary(
             filmwork_id=filmwork_id,
-            average_rating=average_rating,
+            average_rating=round(
+                stats.ratings_sum / stats.ratings_count,
+                2,
+            ),
             # Оценки 10 считаем лайками.
-            likes_count=distribution[10],
+            likes_count=stats.histogram.get('10', 0),
             # Оценки 0 считаем дизлайками.
-            dislikes_count=distribution[0],
-            ratings_count=total_ratings,
+            dislikes_count=stats.histogram.get('0', 0),
+            ratings_count=stats.ratings_count,
         )
 
     @classmethod
-    async def get_user_ratings(cls, user_id: UUID) -> list[Rating]:
-        """Возвращает все оценки пользователя."""
-        return await Rating.find(
+    async def _update_rating_stats(
+        cls,
+        filmwork_id: UUID,
+        old_rating: Optional[int] = None,
+        new_rating: Optional[int] = None,
+    ) -> None:
+        """Сдвигает статистику кинопроизведения при изменении оценки."""
+        await cls._apply_rating_stats_changes(
+            {filmwork_id: cls._rating_stats_changes(old_rating, new_rating)},
+        )
+
+    @classmethod
+    def _rating_stats_changes(
+        cls,
+        old_rating: Optional[int] = None,
+        new_rating: Optional[int] = None,
+    ) -> Counter:
+        """Вычисляет изменение статистики при смене оценки."""
+        increments: Counter = Counter()
+        for rating, step in ((old_rating, -1), (new_rating, 1)):
+            if rating is not None:
+                increments['ratings_count'] += step
+                increments['ratings_sum'] += step * rating
+                increments[f'histogram.{rating}'] += step
+        return increments
+
+    @classmethod
+    async def _apply_rating_stats_changes(
+        cls,
+        changes: dict[UUID, Counter],
+    ) -> None:
+        """Применяет изменения статистики кинопроизведений.
+
+        Изменения всех кинопроизведений записываются одним bulk_write.
+        """
+        operations = []
+        for filmwork_id, increments in changes.items():
+            # Смена оценки на ту же самую не меняет статистику.
+            nonzero = {
+                field: step for field, step in increments.items() if step
+            }
+            if nonzero:
+                operations.append(
+                    UpdateOne(
+                        {DOCUMENT_ID_FIELD: filmwork_id},
+                        {'$inc': nonzero},
+                        upsert=True,
+                    ),
+                )
+        if not operations:
+            return
+        await FilmworkRatingStats.get_pymongo_collection().bulk_write(
+            operations,
+            ordered=False,
+        )
+        await cache.invalidate(RATING_SUMMARY_CACHE, *changes)
+
+    @classmethod
+    async def _get_user_rating_records(
+        cls,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[RatingRecord], Optional[str]]:
+        """Читает страницу оценок пользователя без Beanie."""
+        documents = await Rating.get_pymongo_collection().find(
+            {
+                USER_ID_FIELD: user_id,
+                **keyset_filter(UPDATED_AT_FIELD, cursor),
+            },
+            RatingRecord.projection(
+                None if fields is None
+                else fields | {ID_FIELD, UPDATED_AT_FIELD},
+            ),
+            sort=keyset_sort(UPDATED_AT_FIELD),
+            limit=limit,
+        ).to_list()
+        ratings = [
+            RatingRecord.from_document(document) for document in documents
+        ]
+        return ratings, next_cursor(UPDATED_AT_FIELD, ratings, limit)
+
+    @classmethod
+    def _user_ratings_query(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> FindMany[Rating]:
+        """Запрос оценок пользователя, начиная с позиции курсора."""
+        query = Rating.find(
             Rating.user_id == user_id,
-        ).sort(-Rating.updated_at).to_list()  # type: ignore
+            keyset_filter(UPDATED_AT_FIELD, cursor),
+        ).sort(keyset_sort(UPDATED_AT_FIELD))
+        return project_fields(query, fields, ID_FIELD, UPDATED_AT_FIELD)
@@ -1,15 +1,54 @@
 import asyncio
 from datetime import datetime, timezone
+from functools import partial
 from http import HTTPStatus
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
+from beanie import UpdateResponse
+from beanie.odm.queries.find import FindMany
+from beanie.operators import In
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 
+from core.cache import Loader, cache
+from core.config import settings
+from core.constants import (
+    CREATED_AT_FIELD,
+    DOCUMENT_ID_FIELD,
+    FILMWORK_ID_FIELD,
+    ID_FIELD,
+    RATING_FIELD,
+    SET_OPERATOR,
+    UPDATED_AT_FIELD,
+)
+from core.dataloader import clear_request_keys, request_loader
 from db.models import Review
-from schemas.review import ReviewCreate, ReviewResponse, ReviewUpdate
-from services.review_like import ReviewLikeService
+from db.projections import project_fields
+from db.records import ReviewRecord, fast_read
+from schemas.review import ReviewCreate, ReviewUpdate
+from services.pagination import (
+    PageRequest,
+    batched,
+    keyset_filter,
+    keyset_sort,
+    next_cursor,
+)
+from services.review_like import (
+    REVIEW_COUNTERS_CACHE,
+    REVIEW_EXISTS_CACHE,
+    ReviewLikeService,
+    review_exists_ttl,
+)
+from services.revision import raise_not_matched, revision_filter
+
+# Размер пачки рецензий при потоковой выдаче.
+STREAM_BATCH_SIZE = 100
+# Пространство имен кэша первых страниц рецензий кинопроизведений.
+FILMWORK_REVIEWS_CACHE = 'filmwork_reviews'
+# Число рецензий первой страницы в кэше - наибольший limit эндпоинта.
+FIRST_PAGE_CACHE_SIZE = 100
 
 
 class ReviewService:
@@ -21,18 +60,6 @@ class ReviewService:
         review_data: ReviewCreate,
     ) -> Review:
         """Создает рецензию, если она не существует."""
-        # Проверяем существование рецензии
-        existing_review = await Review.find_one(
-            Review.user_id == review_data.user_id,
-            Review.filmwork_id == review_data.filmwork_id,
-        )
-
-        if existing_review:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Рецензия для этого фильма уже существует',
-            )
-
         review = Review(
             user_id=review_data.user_id,
             filmwork_id=review_data.filmwork_id,
@@ -40,58 +67,127 @@ class ReviewService:
             author_name=review_data.author_name,
             rating=review_data.rating,
         )
-        return await review.insert()
+        # Уникальность рецензии гарантирует индекс (user_id, filmwork_id).
+        try:
+            await review.insert()
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail='Рецензия для этого фильма уже существует',
+            )
+        await cls._invalidate_filmwork_reviews(review.filmwork_id)
+        await cache.set_many(
+            REVIEW_EXISTS_CACHE,
+            {review.id: True},
+            review_exists_ttl(),
+            bool,
+        )
+        return review
 
     @classmethod
     async def update_review(
         cls,
         review_id: UUID,
         review_data: ReviewUpdate,
-    ) -> Review:
-        """Обновляет рецензию."""
-        review = await Review.get(review_id)
+        user_id: Optional[UUID] = None,
+        revision: Optional[datetime] = None,
+    ) -> ReviewRecord:
+        """Обновляет рецензию и возвращает ее новое состояние.
+
+        Рецензия изменяется одним find_one_and_update с $set измененных
+        полей, голос пользователя читается параллельно. Если передана
+        ревизия (updated_at), рецензия изменяется, только пока
+        она совпадает.
+        """
+        document_filter = {DOCUMENT_ID_FIELD: review_id}
+        review, user_votes = await asyncio.gather(
+            Review.find_one(
+                document_filter,
+                revision_filter(revision),
+            ).update(
+                {
+                    SET_OPERATOR: {
+                        'text': review_data.text,
+                        'author_name': review_data.author_name,
+                        RATING_FIELD: review_data.rating,
+                        UPDATED_AT_FIELD: datetime.now(timezone.utc),
+                    },
+                },
+                response_type=UpdateResponse.NEW_DOCUMENT,
+            ),
+            ReviewLikeService.get_user_votes([review_id], user_id),
+        )
 
         if review is None:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail='Рецензия не найдена',
+            await raise_not_matched(
+                Review,
+                document_filter,
+                revision,
+                'Рецензия не найдена',
             )
 
-        review.text = review_data.text
-        review.author_name = review_data.author_name
-        review.rating = review_data.rating
-        review.updated_at = datetime.now(timezone.utc)
-
-        await review.save()
-        return review
+        await cls._invalidate_filmwork_reviews(review.filmwork_id)
+        clear_request_keys('reviews', review.id)
+        return ReviewRecord.from_model(
+            review,
+            user_vote=user_votes.get(review.id),
+        )
 
     @classmethod
     async def delete_review(
         cls,
         user_id: UUID,
         review_id: UUID,
-    ) -> ReviewResponse:
-        """Удаляет рецензию."""
-        review = await cls.get_review(review_id, user_id)
-        review_to_remove = await Review.get(review_id)
+        revision: Optional[datetime] = None,
+    ) -> ReviewRecord:
+        """Удаляет рецензию и возвращает ее последнее состояние.
 
-        if review_to_remove is None:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail='Рецензия не найдена',
+        Рецензия удаляется одним find_one_and_delete, голос
+        пользователя читается параллельно. Если передана ревизия
+        (updated_at), рецензия удаляется, только пока она совпадает.
+        """
+        document_filter = {DOCUMENT_ID_FIELD: review_id}
+        document, user_votes = await asyncio.gather(
+            Review.get_pymongo_collection().find_one_and_delete(
+                {**document_filter, **revision_filter(revision)},
+            ),
+            ReviewLikeService.get_user_votes([review_id], user_id),
+        )
+
+        if document is None:
+            await raise_not_matched(
+                Review,
+                document_filter,
+                revision,
+                'Рецензия не найдена',
             )
 
-        await review_to_remove.delete()
-        return review  # noqa
+        review = ReviewRecord.from_document(document)
+        clear_request_keys('reviews', review.id)
+        await cls._invalidate_filmwork_reviews(review.filmwork_id)
+        await cache.invalidate(REVIEW_COUNTERS_CACHE, review.id)
+        await cache.invalidate(REVIEW_EXISTS_CACHE, review.id)
+        return review.model_copy(
+            update={'user_vote': user_votes.get(review.id)},
+        )
 
     @classmethod
     async def get_review(
         cls,
         review_id: UUID,
         user_id: Optional[UUID] = None,
-    ) -> ReviewResponse:
-        """Возвращает рецензию по ID с информацией о лайках."""
-        review = await Review.get(review_id)
+        fields: Optional[frozenset[str]] = None,
+    ) -> ReviewRecord:
+        """Возвращает рецензию по ID с информацией о лайках.
+
+        Если переданы fields, из MongoDB читаются только эти поля.
+        Рецензии, запрошенные одновременно в пределах запроса,
+        читаются одним запросом с $in.
+        """
+        review = await request_loader(
+            ('reviews', fields),
+            lambda review_ids: cls._load_reviews(review_ids, fields),
+        ).load(review_id)
 
         if review is None:
             raise HTTPException(
@@ -99,81 +195,298 @@ class ReviewService:
                 detail='Рецензия не найдена',
             )
 
-        # Получаем информацию о лайках
-        like_summary = await ReviewLikeService.get_review_like_summary(
-            review_id,
+        responses = await cls._with_like_summaries([review], user_id, fields)
+        return responses[0]
+
+    @classmethod
+    async def get_filmwork_reviews(
+        cls,
+        filmwork_id: UUID,
+        page: PageRequest,
+        user_id: Optional[UUID] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[ReviewRecord], Optional[str]]:
+        """Возвращает рецензии для кинопроизведения с сортировкой.
+
+        Если передан курсор, страница выбирается по нему, а skip
+        не используется. Вместе со страницей возвращается курсор
+        следующей страницы. Если переданы fields, из MongoDB читаются
+        только эти поля.
+
+        Первая страница берется из кэша целиком, даже если переданы
+        fields; счетчики лайков к ней подставляются из кэша счетчиков.
+        При быстром чтении рецензии возвращаются записями ReviewRecord,
+        прочитанными без Beanie.
+        """
+        sort_by = page.sort_by
+        if sort_by not in {CREATED_AT_FIELD, RATING_FIELD}:
+            sort_by = CREATED_AT_FIELD
+        records = fast_read('ReviewService.get_filmwork_reviews')
+
+        if page.cursor is None and not page.skip:
+            first_page = await cls._get_first_page(
+                filmwork_id,
+                sort_by,
+                records,
+            )
+            reviews = await cls._with_fresh_counters(first_page[:page.limit])
+        elif records:
+            reviews = await cls._filmwork_review_records(
+                filmwork_id,
+                sort_by,
+                page.cursor,
+                page.skip,
+                page.limit,
+                fields,
+            )
+        else:
+            reviews = await cls._filmwork_reviews_page(
+                filmwork_id,
+                sort_by,
+                page,
+                fields,
+            )
+        return (
+            await cls._with_like_summaries(reviews, user_id, fields),
+            next_cursor(sort_by, reviews, page.limit),
+        )
+
+    @classmethod
+    async def get_user_reviews(
+        cls,
+        user_id: UUID,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[ReviewRecord], Optional[str]]:
+        """Возвращает страницу рецензий пользователя, новые первыми."""
+        reviews = await cls._user_reviews_query(
             user_id,
+            cursor,
+            fields,
+        ).limit(limit).to_list()
+        return (
+            await cls._with_like_summaries(reviews, user_id, fields),
+            next_cursor(CREATED_AT_FIELD, reviews, limit),
         )
 
-        return ReviewResponse(
-            **review.dict(),
-            likes_count=like_summary.likes_count,
-            dislikes_count=like_summary.dislikes_count,
-            user_vote=like_summary.user_vote,
+    @classmethod
+    async def iter_user_reviews(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[ReviewRecord]:
+        """Возвращает рецензии пользователя по мере чтения из MongoDB.
+
+        Голоса пользователя запрашиваются пачками по STREAM_BATCH_SIZE
+        и забываются после пачки, поэтому память воркера не растет
+        с длиной истории.
+        """
+        reviews = aiter(cls._user_reviews_query(user_id, cursor, fields))
+        async for batch in batched(reviews, STREAM_BATCH_SIZE):
+            responses = await cls._with_like_summaries(
+                batch,
+                user_id,
+                fields,
+            )
+            ReviewLikeService.forget_user_votes(
+                [response.id for response in responses],
+                user_id,
+            )
+            for response in responses:
+                yield response
+
+    @classmethod
+    async def _load_reviews(
+        cls,
+        review_ids: list[UUID],
+        fields: Optional[frozenset[str]] = None,
+    ) -> dict[UUID, Review]:
+        """Читает рецензии по идентификаторам одним запросом."""
+        reviews = await project_fields(
+            Review.find(In(Review.id, review_ids)),
+            fields,
+            ID_FIELD,
+        ).to_list()
+        return {review.id: review for review in reviews}
+
+    @classmethod
+    async def _get_first_page(
+        cls,
+        filmwork_id: UUID,
+        sort_by: str,
+        records: bool = False,
+    ) -> list[Review] | list[ReviewRecord]:
+        """Возвращает первые FIRST_PAGE_CACHE_SIZE рецензий фильма.
+
+        Страницы из моделей и из записей кэшируются под разными ключами.
+        """
+        loader: Loader
+        if records:
+            loader = partial(
+                cls._filmwork_review_records,
+                filmwork_id,
+                sort_by,
+                limit=FIRST_PAGE_CACHE_SIZE,
+            )
+        else:
+            loader = cls._filmwork_reviews_query(
+                filmwork_id,
+                sort_by,
+            ).limit(FIRST_PAGE_CACHE_SIZE).to_list
+        return await cache.get_or_load(
+            FILMWORK_REVIEWS_CACHE,
+            (filmwork_id, sort_by, records),
+            loader,
+            settings.cache_filmwork_reviews_ttl,
+            list[ReviewRecord] if records else list[Review],
         )
 
     @classmethod
-    async def get_filmwork_reviews(
+    async def _filmwork_reviews_page(
         cls,
         filmwork_id: UUID,
-        user_id: Optional[UUID] = None,
+        sort_by: str,
+        page: PageRequest,
+        fields: Optional[frozenset[str]] = None,
+    ) -> list[Review]:
+        """Читает страницу рецензий кинопроизведения через Beanie."""
+        query = cls._filmwork_reviews_query(filmwork_id, sort_by, page.cursor)
+        if page.cursor is None:
+            query = query.skip(page.skip)
+        return await project_fields(
+            query,
+            fields,
+            ID_FIELD,
+            sort_by,
+        ).limit(page.limit).to_list()
+
+    @classmethod
+    def _filmwork_reviews_query(
+        cls,
+        filmwork_id: UUID,
+        sort_by: str,
+        cursor: Optional[str] = None,
+    ) -> FindMany[Review]:
+        """Запрос рецензий кинопроизведения после позиции курсора."""
+        return Review.find(
+            Review.filmwork_id == filmwork_id,
+            # Рецензии без оценки идут в конце выдачи по оценке.
+            keyset_filter(sort_by, cursor, nullable=sort_by == RATING_FIELD),
+        ).sort(keyset_sort(sort_by))
+
+    @classmethod
+    async def _filmwork_review_records(
+        cls,
+        filmwork_id: UUID,
+        sort_by: str,
+        cursor: Optional[str] = None,
         skip: int = 0,
         limit: int = 50,
-        sort_by: str = 'created_at',
-    ) -> list[ReviewResponse]:
-        """Возвращает рецензии для кинопроизведения с сортировкой."""
-        query = Review.find(Review.filmwork_id == filmwork_id)
-
-        # Сортировка
-        if sort_by == 'rating':
-            query = query.sort(-Review.rating)  # type: ignore
-        elif sort_by == 'created_at':
-            query = query.sort(-Review.created_at)  # type: ignore
-        else:
-            query = query.sort(-Review.created_at)  # type: ignore
+        fields: Optional[frozenset[str]] = None,
+    ) -> list[ReviewRecord]:
+        """Читает рецензии кинопроизведения без Beanie."""
+        documents = await Review.get_pymongo_collection().find(
+            {
+                FILMWORK_ID_FIELD: filmwork_id,
+                **keyset_filter(
+                    sort_by,
+                    cursor,
+                    nullable=sort_by == RATING_FIELD,
+                ),
+            },
+            ReviewRecord.projection(
+                None if fields is None else fields | {ID_FIELD, sort_by},
+            ),
+            sort=keyset_sort(sort_by),
+            skip=skip,
+            limit=limit,
+        ).to_list()
+        return [ReviewRecord.from_document(document) for document in documents]
 
-        reviews = await query.skip(skip).limit(limit).to_list()
-
-        tasks = [
-            ReviewLikeService.get_review_like_summary(review.id, user_id)
-            for review in reviews
-        ]
+    @classmethod
+    async def _with_fresh_counters(
+        cls,
+        reviews: list[Review] | list[ReviewRecord],
+    ) -> list[Review] | list[ReviewRecord]:
+        """Подставляет в рецензии актуальные счетчики лайков.
 
-        like_summaries = await asyncio.gather(*tasks)
+        Закэшированная страница не сбрасывается при каждом голосе,
+        поэтому счетчики берутся из отдельного кэша счетчиков.
+        """
+        counters = await ReviewLikeService.get_review_counters(
+            [review.id for review in reviews],
+        )
+        fresh_reviews = []
+        for review in reviews:
+            review_counters = counters.get(review.id)
+            if review_counters is not None:
+                review = review.model_copy(
+                    update={
+                        'likes_count': review_counters.likes_count,
+                        'dislikes_count': review_counters.dislikes_count,
+                    },
+                )
+            fresh_reviews.append(review)
+        return fresh_reviews
 
-        return [
-            ReviewResponse(
-                **review.dict(),
-                likes_count=summary.likes_count,
-                dislikes_count=summary.dislikes_count,
-                user_vote=summary.user_vote,
-            )
-            for review, summary in zip(reviews, like_summaries)
-        ]
+    @classmethod
+    async def _invalidate_filmwork_reviews(
+        cls,
+        filmwork_id: UUID,
+    ) -> None:
+        """Сбрасывает закэшированные первые страницы рецензий фильма."""
+        await cache.invalidate(
+            FILMWORK_REVIEWS_CACHE,
+            *(
+                (filmwork_id, sort_by, records)
+                for sort_by in (CREATED_AT_FIELD, RATING_FIELD)
+                for records in (False, True)
+            ),
+        )
 
     @classmethod
-    async def get_user_reviews(
+    def _user_reviews_query(
         cls,
         user_id: UUID,
-    ) -> list[ReviewResponse]:
-        """Возвращает все рецензии пользователя."""
-        reviews = await Review.find(
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> FindMany[Review]:
+        """Запрос рецензий пользователя, начиная с позиции курсора."""
+        query = Review.find(
             Review.user_id == user_id,
-        ).sort(-Review.created_at).to_list()  # type: ignore
-
-        tasks = [
-            ReviewLikeService.get_review_like_summary(review.id, user_id)
-            for review in reviews
-        ]
+            keyset_filter(CREATED_AT_FIELD, cursor),
+        ).sort(keyset_sort(CREATED_AT_FIELD))
+        return project_fields(query, fields, ID_FIELD, CREATED_AT_FIELD)
 
-        like_summaries = await asyncio.gather(*tasks)
+    @classmethod
+    async def _with_like_summaries(
+        cls,
+        reviews: list[Review] | list[ReviewRecord],
+        user_id: Optional[UUID] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> list[ReviewRecord]:
+        """Дополняет рецензии голосом пользователя.
 
+        Счетчики лайков хранятся в самих рецензиях, поэтому отдельно
+        запрашиваются только голоса пользователя - одним запросом.
+        Для проекций голос запрашивается, только если он входит в fields.
+        Рецензии прошли валидацию при чтении, поэтому в ответ они
+        попадают записями ReviewRecord без повторной проверки полей.
+        """
+        if fields is not None and 'user_vote' not in fields:
+            user_id = None
+        user_votes = await ReviewLikeService.get_user_votes(
+            [review.id for review in reviews],
+            user_id,
+        )
         return [
-            ReviewResponse(
-                **review.dict(),
-                likes_count=summary.likes_count,
-                dislikes_count=summary.dislikes_count,
-                user_vote=summary.user_vote,
+            review.model_copy(update={'user_vote': user_votes.get(review.id)})
+            if isinstance(review, ReviewRecord)
+            else ReviewRecord.from_model(
+                review,
+                user_vote=user_votes.get(review.id),
             )
-            for review, summary in zip(reviews, like_summaries)
+            for review in reviews
         ]
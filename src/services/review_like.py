@@ -1,12 +1,67 @@
+import asyncio
+from collections import ChainMap, Counter, defaultdict
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 import logging
-from typing import Optional
+from typing import Any, AsyncIterator, Optional
 from uuid import UUID
 
+from beanie import UpdateResponse
+from beanie.odm.queries.find import FindMany
+from beanie.operators import In
 from fastapi import HTTPException
+from pymongo import DESCENDING, UpdateOne
 
+from core.cache import cache
+from core.config import settings
+from core.constants import (
+    CREATED_AT_FIELD,
+    DOCUMENT_ID_FIELD,
+    ID_FIELD,
+    REVIEW_ID_FIELD,
+    SET_OPERATOR,
+    USER_ID_FIELD,
+)
+from core.dataloader import clear_request_keys, request_loader
+from core.write_buffer import WriteBehindBuffer
+from db.ids import uuid7_bounds
 from db.models import Review, ReviewLike
+from db.projections import (
+    DocumentId,
+    ReviewCounters,
+    ReviewVote,
+    partial_projection,
+    project_fields,
+)
+from schemas.bulk import BulkResponse
 from schemas.review_like import ReviewLikeCreate, ReviewLikeSummary
+from services.bulk import BulkBatch, WriteErrors, bulk_upsert, pairs_filter
+from services.pagination import keyset_filter, keyset_sort, next_cursor
+
+# Пространство имен кэша счетчиков лайков рецензий.
+REVIEW_COUNTERS_CACHE = 'review_counters'
+# Пространство имен кэша существования рецензий. Кэшируются только
+# существующие рецензии.
+REVIEW_EXISTS_CACHE = 'review_exists'
+# Ключ загрузчика голосов пользователя в пределах запроса.
+USER_VOTES_LOADER = 'user_votes'
+# Поля голоса, нужные для пакетной записи.
+REVIEW_LIKE_KEY_FIELDS = frozenset(
+    (ID_FIELD, USER_ID_FIELD, REVIEW_ID_FIELD, 'is_like'),
+)
+
+
+def review_exists_ttl() -> float:
+    """Время жизни признака существования рецензии.
+
+    Без общего хранилища удаление рецензии сбрасывает признак только
+    в своем воркере, поэтому остальные воркеры хранят его не дольше
+    cache_local_ttl и не принимают голоса за удаленную рецензию дольше
+    нескольких секунд.
+    """
+    if cache.backend is None:
+        return min(settings.cache_review_exists_ttl, settings.cache_local_ttl)
+    return settings.cache_review_exists_ttl
 
 
 class ReviewLikeService:
@@ -17,34 +72,153 @@ class ReviewLikeService:
         cls,
         like_data: ReviewLikeCreate,
     ) -> ReviewLike:
-        """Создает или обновляет лайк/дизлайк рецензии."""
-        # Проверяем существование рецензии
-        review = await Review.get(like_data.review_id)
-        if review is None:
+        """Создает или обновляет лайк/дизлайк рецензии.
+
+        В режиме отложенной записи голос подтверждается сразу после
+        проверки существования рецензии.
+
+        Запись голоса и сдвиг счетчиков рецензии - две отдельные записи
+        без транзакции: транзакция на шардированном кластере удвоила бы
+        время записи голоса. Если процесс завершится между ними,
+        счетчики рецензии разойдутся с review_likes до запуска
+        rebuild_review_counters, который пересчитывает их по голосам.
+        """
+        # Существование рецензии обычно известно из кэша, при промахе
+        # читается только _id.
+        review_ids = await cls._existing_review_ids([like_data.review_id])
+        if like_data.review_id not in review_ids:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
                 detail='Рецензия не найдена',
             )
+        clear_request_keys(
+            USER_VOTES_LOADER,
+            (like_data.user_id, like_data.review_id),
+        )
+        if review_like_buffer.enabled:
+            return await cls._buffer_review_like(like_data)
 
-        # Проверяем существующий лайк
+        review_like = ReviewLike(
+            review_id=like_data.review_id,
+            user_id=like_data.user_id,
+            is_like=like_data.is_like,
+        )
+        # Upsert выполняется за один запрос и опирается на уникальный
+        # индекс (user_id, review_id). Он возвращает прежнее состояние
+        # лайка, по которому вычисляется изменение счетчиков рецензии.
         existing_like = await ReviewLike.find_one(
             ReviewLike.user_id == like_data.user_id,
             ReviewLike.review_id == like_data.review_id,
+        ).update(
+            {
+                SET_OPERATOR: {'is_like': like_data.is_like},
+                '$setOnInsert': {
+                    DOCUMENT_ID_FIELD: review_like.id,
+                    CREATED_AT_FIELD: review_like.created_at,
+                },
+            },
+            upsert=True,
+            response_type=UpdateResponse.OLD_DOCUMENT,
         )
 
-        if existing_like:
-            # Обновляем существующий лайк
-            existing_like.is_like = like_data.is_like
-            await existing_like.save()
-            return existing_like
+        if existing_like is None:
+            await cls._update_review_counters(
+                like_data.review_id,
+                new_vote=like_data.is_like,
+            )
+            return review_like
 
-        # Создаем новый лайк
-        review_like = ReviewLike(
-            review_id=like_data.review_id,
-            user_id=like_data.user_id,
-            is_like=like_data.is_like,
+        await cls._update_review_counters(
+            like_data.review_id,
+            old_vote=existing_like.is_like,
+            new_vote=like_data.is_like,
+        )
+        existing_like.is_like = like_data.is_like
+        return existing_like
+
+    @classmethod
+    async def bulk_upsert_review_likes(
+        cls,
+        elements: list[dict[str, Any]],
+    ) -> BulkResponse:
+        """Создает или обновляет лайки/дизлайки рецензий пакетом.
+
+        Существование рецензий и прежние голоса проверяются двумя
+        запросами на весь пакет, по прежним голосам сдвигаются счетчики
+        рецензий. Если голос изменили между чтением и записью пакета,
+        счетчики исправляет rebuild_review_counters.
+        """
+        batch = BulkBatch(
+            elements,
+            ReviewLikeCreate,
+            lambda vote: (vote.user_id, vote.review_id),
+        )
+        await cls._reject_missing_reviews(batch)
+        like_ids, created, errors = await cls._write_votes([
+            (index, ReviewLike(**vote.model_dump()))
+            for index, vote in batch.pending
+        ])
+        batch.set_upsert_results(like_ids, created, errors)
+        return batch.response()
+
+    @classmethod
+    async def flush_review_likes(cls, votes: list[ReviewLike]) -> None:
+        """Записывает пачку голосов из буфера отложенной записи.
+
+        Голоса за рецензии, удаленные после подтверждения, отбрасываются.
+        """
+        review_ids = await cls._existing_review_ids(
+            [vote.review_id for vote in votes],
+        )
+        found_votes = [vote for vote in votes if vote.review_id in review_ids]
+        if len(found_votes) < len(votes):
+            cls.logger.warning(
+                'Отброшено голосов за несуществующие рецензии: %s',
+                len(votes) - len(found_votes),
+            )
+        _, _, errors = await cls._write_votes(list(enumerate(found_votes)))
+        if errors:
+            cls.logger.error(
+                'Не записано голосов из буфера: %s',
+                len(errors),
+            )
+
+    @classmethod
+    async def warm_review_exists(cls) -> None:
+        """Загружает в кэш существования последние рецензии.
+
+        Читаются только _id последних review_exists_warm_items рецензий
+        по индексу _id: идентификаторы UUIDv7 (db.ids) возрастают
+        со временем создания. Выборка ограничена промежутком UUIDv7
+        за review_exists_warm_days дней, иначе старые UUIDv4 со
+        случайными старшими битами оказались бы впереди новых.
+        """
+        if not cache.enabled or settings.review_exists_warm_items <= 0:
+            return
+        now = datetime.now(timezone.utc)
+        cursor = Review.get_pymongo_collection().find(
+            {
+                DOCUMENT_ID_FIELD: uuid7_bounds(
+                    now - timedelta(days=settings.review_exists_warm_days),
+                    # Запас на расхождение часов узлов.
+                    now + timedelta(minutes=1),
+                ),
+            },
+            {DOCUMENT_ID_FIELD: 1},
+            sort=[(DOCUMENT_ID_FIELD, DESCENDING)],
+            limit=settings.review_exists_warm_items,
+        )
+        reviews = await cursor.to_list()
+        await cache.set_many(
+            REVIEW_EXISTS_CACHE,
+            {review[DOCUMENT_ID_FIELD]: True for review in reviews},
+            review_exists_ttl(),
+            bool,
+        )
+        cls.logger.info(
+            'В кэш существования загружено рецензий: %s',
+            len(reviews),
         )
-        return await review_like.insert()
 
     @classmethod
     async def delete_review_like(
@@ -53,6 +227,9 @@ class ReviewLikeService:
         review_id: UUID,
     ) -> ReviewLike:
         """Удаляет лайк/дизлайк рецензии."""
+        if review_like_buffer.enabled:
+            # Ожидающий в буфере голос иначе был бы записан после удаления.
+            await review_like_buffer.flush()
         review_like = await ReviewLike.find_one(
             ReviewLike.user_id == user_id,
             ReviewLike.review_id == review_id,
@@ -63,6 +240,11 @@ class ReviewLikeService:
                 detail='Лайк/дизлайк не найден',
             )
         await review_like.delete()
+        clear_request_keys(USER_VOTES_LOADER, (user_id, review_id))
+        await cls._update_review_counters(
+            review_id,
+            old_vote=review_like.is_like,
+        )
         return review_like
 
     @classmethod
@@ -72,37 +254,476 @@ class ReviewLikeService:
         user_id: Optional[UUID] = None,
     ) -> ReviewLikeSummary:
         """Возвращает сводную информацию по лайкам рецензии."""
-        # Получаем все лайки для рецензии
-        likes = await ReviewLike.find(
-            ReviewLike.review_id == review_id,
-            ReviewLike.is_like is True,
-        ).to_list()
+        summaries = await cls.get_like_summaries([review_id], user_id)
+        return summaries[review_id]
 
-        dislikes = await ReviewLike.find(
-            ReviewLike.review_id == review_id,
-            ReviewLike.is_like is False,
-        ).to_list()
+    @classmethod
+    async def get_like_summaries(
+        cls,
+        review_ids: list[UUID],
+        user_id: Optional[UUID] = None,
+    ) -> dict[UUID, ReviewLikeSummary]:
+        """Возвращает сводки по лайкам для набора рецензий.
 
-        # Определяем голос текущего пользователя
-        user_vote = None
-        if user_id:
-            user_like = await ReviewLike.find_one(
-                ReviewLike.user_id == user_id,
-                ReviewLike.review_id == review_id,
+        Счетчики берутся из кэша или рецензий, голоса пользователя
+        читаются одним запросом с $in.
+        """
+        if not review_ids:
+            return {}
+        counters_by_id, user_votes = await asyncio.gather(
+            cls.get_review_counters(review_ids),
+            cls.get_user_votes(review_ids, user_id),
+        )
+        summaries = {}
+        for review_id in review_ids:
+            review_counters = counters_by_id.get(review_id)
+            summaries[review_id] = ReviewLikeSummary(
+                review_id=review_id,
+                likes_count=(
+                    review_counters.likes_count if review_counters else 0
+                ),
+                dislikes_count=(
+                    review_counters.dislikes_count if review_counters else 0
+                ),
+                user_vote=user_votes.get(review_id),
             )
-            if user_like:
-                user_vote = user_like.is_like
+        return summaries
+
+    @classmethod
+    async def get_review_counters(
+        cls,
+        review_ids: list[UUID],
+    ) -> dict[UUID, Optional[ReviewCounters]]:
+        """Возвращает счетчики лайков рецензий.
 
-        return ReviewLikeSummary(
-            review_id=review_id,
-            likes_count=len(likes),
-            dislikes_count=len(dislikes),
-            user_vote=user_vote,
+        Счетчики кэшируются по рецензиям, отсутствующие в кэше читаются
+        одним запросом с $in. Для несуществующих рецензий - None.
+        """
+        return await cache.get_or_load_many(
+            REVIEW_COUNTERS_CACHE,
+            review_ids,
+            cls._load_review_counters,
+            settings.cache_review_counters_ttl,
+            ReviewCounters,
         )
 
     @classmethod
-    async def get_user_review_likes(cls, user_id: UUID) -> list[ReviewLike]:
-        """Возвращает все лайки пользователя."""
-        return await ReviewLike.find(
-            ReviewLike.user_id == user_id,
+    async def get_user_votes(
+        cls,
+        review_ids: list[UUID],
+        user_id: Optional[UUID] = None,
+    ) -> dict[UUID, bool]:
+        """Возвращает голоса пользователя за переданные рецензии.
+
+        Голоса, запрошенные одновременно в пределах запроса, читаются
+        одной пачкой.
+        """
+        if user_id is None or not review_ids:
+            return {}
+        votes = await request_loader(
+            (USER_VOTES_LOADER,),
+            cls._load_user_votes,
+        ).load_many((user_id, review_id) for review_id in review_ids)
+        return {
+            review_id: is_like
+            for (_, review_id), is_like in votes.items()
+            if is_like is not None
+        }
+
+    @classmethod
+    def forget_user_votes(
+        cls,
+        review_ids: list[UUID],
+        user_id: Optional[UUID] = None,
+    ) -> None:
+        """Забывает голоса, запомненные загрузчиком текущего запроса.
+
+        Потоковые ответы вызывают его после каждой пачки, чтобы
+        загрузчик не держал голоса всей истории до конца ответа.
+        """
+        if user_id is not None:
+            clear_request_keys(
+                USER_VOTES_LOADER,
+                *((user_id, review_id) for review_id in review_ids),
+            )
+
+    @classmethod
+    async def rebuild_review_counters(cls) -> None:
+        """Пересчитывает счетчики лайков всех рецензий по review_likes.
+
+        Агрегация выполняется на стороне MongoDB и записывает результат
+        обратно в коллекцию рецензий через $merge.
+        """
+        pipeline: list[dict[str, Any]] = [
+            {
+                '$lookup': {
+                    'from': ReviewLike.get_collection_name(),
+                    'localField': DOCUMENT_ID_FIELD,
+                    'foreignField': REVIEW_ID_FIELD,
+                    'pipeline': [
+                        {
+                            '$group': {
+                                DOCUMENT_ID_FIELD: None,
+                                'likes_count': {
+                                    '$sum': {'$cond': ['$is_like', 1, 0]},
+                                },
+                                'dislikes_count': {
+                                    '$sum': {'$cond': ['$is_like', 0, 1]},
+                                },
+                            },
+                        },
+                    ],
+                    'as': 'counters',
+                },
+            },
+            {
+                '$project': {
+                    'likes_count': {
+                        '$ifNull': [{'$first': '$counters.likes_count'}, 0],
+                    },
+                    'dislikes_count': {
+                        '$ifNull': [
+                            {'$first': '$counters.dislikes_count'},
+                            0,
+                        ],
+                    },
+                },
+            },
+            {
+                '$merge': {
+                    'into': Review.get_collection_name(),
+                    'on': DOCUMENT_ID_FIELD,
+                    'whenMatched': 'merge',
+                    'whenNotMatched': 'discard',
+                },
+            },
+        ]
+        cursor = await Review.get_pymongo_collection().aggregate(pipeline)
+        await cursor.to_list()
+        await cache.invalidate(REVIEW_COUNTERS_CACHE)
+
+    @classmethod
+    async def get_user_review_likes(
+        cls,
+        user_id: UUID,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> tuple[list[ReviewLike], Optional[str]]:
+        """Возвращает страницу лайков пользователя, новые первыми."""
+        review_likes = await cls._user_review_likes_query(
+            user_id,
+            cursor,
+            fields,
+        ).limit(limit).to_list()
+        return review_likes, next_cursor(CREATED_AT_FIELD, review_likes, limit)
+
+    @classmethod
+    def iter_user_review_likes(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[ReviewLike]:
+        """Возвращает лайки пользователя по мере чтения из MongoDB."""
+        return aiter(
+            cls._user_review_likes_query(user_id, cursor, fields),
+        )
+
+    @classmethod
+    async def _reject_missing_reviews(
+        cls,
+        batch: BulkBatch[ReviewLikeCreate],
+    ) -> None:
+        """Отмечает голоса за несуществующие рецензии статусом not_found."""
+        review_ids = await cls._existing_review_ids(
+            [vote.review_id for _, vote in batch.pending],
+        )
+        for index, vote in batch.pending:
+            if vote.review_id not in review_ids:
+                batch.set_result(
+                    index,
+                    'not_found',
+                    detail='Рецензия не найдена',
+                )
+
+    @classmethod
+    async def _write_votes(
+        cls,
+        votes: list[tuple[int, ReviewLike]],
+    ) -> tuple[dict[int, UUID], set[int], WriteErrors]:
+        """Записывает голоса одним bulk_write и сдвигает счетчики.
+
+        Возвращает идентификаторы голосов, индексы созданных голосов
+        и ошибки записи по индексам.
+        """
+        old_likes = await cls._find_old_likes(votes)
+        like_ids = {
+            index: (old_likes[index] or vote).id for index, vote in votes
+        }
+        created, errors = await bulk_upsert(
+            ReviewLike,
+            cls._vote_upserts(votes, like_ids),
+        )
+        # Голос, которого не было при чтении, учитывается как новый.
+        created.update(
+            index for index, vote in votes if old_likes[index] is None
+        )
+        await cls._apply_counter_changes(
+            cls._vote_counter_changes(votes, old_likes, created, errors),
+        )
+        return like_ids, created, errors
+
+    @classmethod
+    async def _find_old_likes(
+        cls,
+        votes: list[tuple[int, ReviewLike]],
+    ) -> dict[int, Any]:
+        """Читает прежние голоса пользователей, None - голоса нет."""
+        existing = await cls._find_review_likes(
+            [(vote.user_id, vote.review_id) for _, vote in votes],
+        )
+        return {
+            index: existing.get((vote.user_id, vote.review_id))
+            for index, vote in votes
+        }
+
+    @classmethod
+    def _vote_upserts(
+        cls,
+        votes: list[tuple[int, ReviewLike]],
+        like_ids: dict[int, UUID],
+    ) -> list[tuple[int, UpdateOne]]:
+        """Операции, создающие или изменяющие голоса."""
+        return [
+            (
+                index,
+                UpdateOne(
+                    {
+                        USER_ID_FIELD: vote.user_id,
+                        REVIEW_ID_FIELD: vote.review_id,
+                    },
+                    {
+                        SET_OPERATOR: {'is_like': vote.is_like},
+                        '$setOnInsert': {
+                            DOCUMENT_ID_FIELD: like_ids[index],
+                            CREATED_AT_FIELD: vote.created_at,
+                        },
+                    },
+                    upsert=True,
+                ),
+            )
+            for index, vote in votes
+        ]
+
+    @classmethod
+    def _vote_counter_changes(
+        cls,
+        votes: list[tuple[int, ReviewLike]],
+        old_likes: dict[int, Any],
+        created: set[int],
+        errors: WriteErrors,
+    ) -> dict[UUID, Counter]:
+        """Суммирует изменения счетчиков рецензий по записанным голосам."""
+        counter_changes: dict[UUID, Counter] = defaultdict(Counter)
+        for index, vote in votes:
+            if index in errors:
+                continue
+            old_like = None if index in created else old_likes[index]
+            counter_changes[vote.review_id].update(
+                cls._counter_changes(
+                    old_like.is_like if old_like else None,
+                    vote.is_like,
+                ),
+            )
+        return counter_changes
+
+    @classmethod
+    async def _buffer_review_like(
+        cls,
+        like_data: ReviewLikeCreate,
+    ) -> ReviewLike:
+        """Помещает голос в буфер отложенной записи.
+
+        Повторный голос того же пользователя за ту же рецензию
+        сохраняет идентификатор и время создания ожидающего голоса.
+        """
+        key = (like_data.user_id, like_data.review_id)
+        review_like = ReviewLike(**like_data.model_dump())
+        pending = review_like_buffer.get(key)
+        if pending is not None:
+            review_like.id = pending.id
+            review_like.created_at = pending.created_at
+        await review_like_buffer.put(key, review_like)
+        return review_like
+
+    @classmethod
+    async def _existing_review_ids(cls, review_ids: list[UUID]) -> set[UUID]:
+        """Возвращает идентификаторы существующих рецензий из набора.
+
+        Существование кэшируется по рецензиям, отсутствующие в кэше
+        проверяются одним запросом с $in.
+        """
+        if not review_ids:
+            return set()
+        exists = await cache.get_or_load_many(
+            REVIEW_EXISTS_CACHE,
+            review_ids,
+            cls._load_review_exists,
+            review_exists_ttl(),
+            bool,
+        )
+        return {review_id for review_id, found in exists.items() if found}
+
+    @classmethod
+    async def _load_review_exists(
+        cls,
+        review_ids: list[UUID],
+    ) -> dict[UUID, bool]:
+        """Проверяет существование рецензий, читая только _id."""
+        reviews = await Review.find(
+            In(Review.id, review_ids),
+        ).project(DocumentId).to_list()
+        return {review.id: True for review in reviews}
+
+    @classmethod
+    async def _find_review_likes(
+        cls,
+        keys: list[tuple[UUID, UUID]],
+    ) -> dict[tuple[UUID, UUID], Any]:
+        """Читает голоса по парам (user_id, review_id) одним запросом."""
+        if not keys:
+            return {}
+        review_likes = await ReviewLike.find(
+            pairs_filter(USER_ID_FIELD, REVIEW_ID_FIELD, keys),
+        ).project(
+            partial_projection(ReviewLike, REVIEW_LIKE_KEY_FIELDS),
         ).to_list()
+        return {
+            (review_like.user_id, review_like.review_id): review_like
+            for review_like in review_likes
+        }
+
+    @classmethod
+    async def _load_review_counters(
+        cls,
+        review_ids: list[UUID],
+    ) -> dict[UUID, ReviewCounters]:
+        """Читает счетчики лайков рецензий из MongoDB."""
+        counters = await Review.find(
+            In(Review.id, review_ids),
+        ).project(ReviewCounters).to_list()
+        return {
+            review_counters.id: review_counters
+            for review_counters in counters
+        }
+
+    @classmethod
+    async def _load_user_votes(
+        cls,
+        keys: list[tuple[UUID, UUID]],
+    ) -> dict[tuple[UUID, UUID], bool]:
+        """Читает голоса по парам (user_id, review_id).
+
+        На каждого пользователя выполняется один запрос с $in,
+        обычно в пачке один пользователь.
+        """
+        review_ids_by_user: dict[UUID, list[UUID]] = defaultdict(list)
+        for voter_id, review_id in keys:
+            review_ids_by_user[voter_id].append(review_id)
+        user_votes = await asyncio.gather(*(
+            cls._find_user_votes(user_id, review_ids)
+            for user_id, review_ids in review_ids_by_user.items()
+        ))
+        return dict(ChainMap(*user_votes))
+
+    @classmethod
+    async def _find_user_votes(
+        cls,
+        user_id: UUID,
+        review_ids: list[UUID],
+    ) -> dict[tuple[UUID, UUID], bool]:
+        """Читает голоса пользователя за рецензии одним запросом с $in."""
+        votes = await ReviewLike.find(
+            ReviewLike.user_id == user_id,
+            In(ReviewLike.review_id, review_ids),
+        ).project(ReviewVote).to_list()
+        return {(user_id, vote.review_id): vote.is_like for vote in votes}
+
+    @classmethod
+    async def _update_review_counters(
+        cls,
+        review_id: UUID,
+        old_vote: Optional[bool] = None,
+        new_vote: Optional[bool] = None,
+    ) -> None:
+        """Сдвигает счетчики рецензии при смене голоса."""
+        await cls._apply_counter_changes(
+            {review_id: cls._counter_changes(old_vote, new_vote)},
+        )
+
+    @classmethod
+    def _counter_changes(
+        cls,
+        old_vote: Optional[bool] = None,
+        new_vote: Optional[bool] = None,
+    ) -> Counter:
+        """Вычисляет изменение счетчиков рецензии при смене голоса.
+
+        Смена лайка на дизлайк дает -1/+1, новый голос - +1,
+        удаление - -1.
+        """
+        increments: Counter = Counter()
+        for vote, step in ((old_vote, -1), (new_vote, 1)):
+            if vote is not None:
+                increments['likes_count' if vote else 'dislikes_count'] += step
+        return increments
+
+    @classmethod
+    async def _apply_counter_changes(
+        cls,
+        changes: dict[UUID, Counter],
+    ) -> None:
+        """Применяет изменения счетчиков рецензий одним bulk_write."""
+        operations = []
+        for review_id, increments in changes.items():
+            nonzero = {
+                field: step for field, step in increments.items() if step
+            }
+            if nonzero:
+                operations.append(
+                    UpdateOne(
+                        {DOCUMENT_ID_FIELD: review_id},
+                        {'$inc': nonzero},
+                    ),
+                )
+        if not operations:
+            return
+        await Review.get_pymongo_collection().bulk_write(
+            operations,
+            ordered=False,
+        )
+        await cache.invalidate(REVIEW_COUNTERS_CACHE, *changes)
+
+    @classmethod
+    def _user_review_likes_query(
+        cls,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> FindMany[ReviewLike]:
+        """Запрос лайков пользователя, начиная с позиции курсора."""
+        query = ReviewLike.find(
+            ReviewLike.user_id == user_id,
+            keyset_filter(CREATED_AT_FIELD, cursor),
+        ).sort(keyset_sort(CREATED_AT_FIELD))
+        return project_fields(query, fields, ID_FIELD, CREATED_AT_FIELD)
+
+
+review_like_buffer = WriteBehindBuffer(
+    ReviewLikeService.flush_review_likes,
+    max_items=settings.review_like_buffer_max_items,
+    flush_size=settings.review_like_flush_size,
+    flush_interval=settings.review_like_flush_interval,
+    enabled=settings.review_like_write_behind,
+)
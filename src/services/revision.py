@@ -0,0 +1,66 @@
+"""Оптимистичная блокировка изменений по времени изменения документа.
+
+Ревизией документа служит updated_at из последнего ответа. Изменение
+или удаление с ревизией выполняется одним запросом find_one_and_*
+с условием на updated_at: если документ изменили после чтения,
+условие не совпадает и клиент получает 409.
+"""
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Any, NoReturn, Optional
+
+from beanie import Document
+from fastapi import HTTPException
+
+REVISION_CONFLICT_MSG = 'Документ изменен после чтения, повторите запрос'
+
+
+def revision_filter(revision: Optional[datetime]) -> dict[str, Any]:
+    """Условие совпадения ревизии документа или пустое условие.
+
+    MongoDB хранит время с точностью до миллисекунд, а в ответе
+    на создание оно может быть точнее, поэтому сравнивается
+    миллисекунда ревизии.
+    """
+    if revision is None:
+        return {}
+    start = revision.replace(
+        microsecond=revision.microsecond // 1000 * 1000,
+    )
+    return {
+        'updated_at': {
+            '$gte': start,
+            '$lt': start + timedelta(milliseconds=1),
+        },
+    }
+
+
+async def raise_not_matched(
+    model: type[Document],
+    document_filter: dict[str, Any],
+    revision: Optional[datetime],
+    not_found_detail: str,
+) -> NoReturn:
+    """Объясняет, почему условное изменение не нашло документ.
+
+    Дополнительный запрос выполняется, только если ревизия передана:
+    нужно отличить удаленный документ от измененного.
+
+    Raises:
+        HTTPException: 409, если документ есть, но ревизия другая,
+            иначе 404.
+    """
+    if revision is not None:
+        document = await model.get_pymongo_collection().find_one(
+            document_filter,
+            {'_id': 1},
+        )
+        if document is not None:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail=REVISION_CONFLICT_MSG,
+            )
+    raise HTTPException(
+        status_code=HTTPStatus.NOT_FOUND,
+        detail=not_found_detail,
+    )
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Any
+from uuid import UUID
+
+from beanie import Document
+
+from core.constants import (
+    FILMWORK_ID_FIELD,
+    ID_FIELD,
+    RATING_FIELD,
+    USER_ID_FIELD,
+)
+from db.models import Bookmark, Rating, Review
+from db.projections import partial_projection
+from schemas.user import UserFilmworkState, UserStateResponse
+
+# Поля, читаемые при сборе состояния пользователя по кинопроизведениям.
+BOOKMARK_STATE_FIELDS = frozenset((FILMWORK_ID_FIELD,))
+RATING_STATE_FIELDS = frozenset((FILMWORK_ID_FIELD, RATING_FIELD))
+REVIEW_STATE_FIELDS = frozenset((ID_FIELD, FILMWORK_ID_FIELD))
+
+
+class UserService:
+    logger = logging.getLogger(__name__)
+
+    @classmethod
+    async def get_filmworks_state(
+        cls,
+        user_id: UUID,
+        filmwork_ids: list[UUID],
+    ) -> UserStateResponse:
+        """Возвращает закладки, оценки и рецензии пользователя по фильмам.
+
+        Три запроса с $in выполняются одновременно, каждый обслуживается
+        уникальным индексом (user_id, filmwork_id) и читает только
+        нужные поля.
+        """
+        filmwork_ids = list(dict.fromkeys(filmwork_ids))
+        bookmarks, ratings, reviews = await asyncio.gather(
+            cls._find_filmwork_documents(
+                Bookmark,
+                BOOKMARK_STATE_FIELDS,
+                user_id,
+                filmwork_ids,
+            ),
+            cls._find_filmwork_documents(
+                Rating,
+                RATING_STATE_FIELDS,
+                user_id,
+                filmwork_ids,
+            ),
+            cls._find_filmwork_documents(
+                Review,
+                REVIEW_STATE_FIELDS,
+                user_id,
+                filmwork_ids,
+            ),
+        )
+        return UserStateResponse(
+            user_id=user_id,
+            filmworks=cls._collect_states(
+                filmwork_ids,
+                bookmarks,
+                ratings,
+                reviews,
+            ),
+        )
+
+    @classmethod
+    async def _find_filmwork_documents(
+        cls,
+        model: type[Document],
+        fields: frozenset[str],
+        user_id: UUID,
+        filmwork_ids: list[UUID],
+    ) -> list[Any]:
+        """Читает поля fields документов пользователя по фильмам."""
+        return await model.find(
+            {USER_ID_FIELD: user_id, FILMWORK_ID_FIELD: {'$in': filmwork_ids}},
+        ).project(partial_projection(model, fields)).to_list()
+
+    @classmethod
+    def _collect_states(
+        cls,
+        filmwork_ids: list[UUID],
+        bookmarks: list[Any],
+        ratings: list[Any],
+        reviews: list[Any],
+    ) -> dict[UUID, UserFilmworkState]:
+        """Собирает состояние пользователя по каждому фильму."""
+        states = {
+            filmwork_id: UserFilmworkState() for filmwork_id in filmwork_ids
+        }
+        for bookmark in bookmarks:
+            states[bookmark.filmwork_id].bookmarked = True
+        for rating in ratings:
+            states[rating.filmwork_id].rating = rating.rating
+        for review in reviews:
+            states[review.filmwork_id].review_id = review.id
+        return states
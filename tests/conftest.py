@@ -0,0 +1,85 @@
+"""Общие фикстуры тестов.
+
+Асинхронные тесты объявляются как async def и выполняются в новом цикле
+событий через asyncio.run: pytest-asyncio в зависимостях нет.
+"""
+import asyncio
+import inspect
+from typing import Any, Callable
+
+import pytest
+
+from core.cache import AsyncCache
+from core.dataloader import DataLoaderMiddleware
+
+# Время жизни значений, загружаемых через кэш.
+TTL = 60
+
+
+class CountingLoader:
+    """Загрузчик, который запоминает вызовы и может ждать разрешения."""
+
+    def __init__(
+        self,
+        loaded: dict,
+        blocked: bool = False,
+        error: Exception | None = None,
+    ) -> None:
+        self.loaded = loaded
+        self.error = error
+        self.calls: list[list] = []
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def __call__(self, keys: list) -> dict:
+        self.calls.append(keys)
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {key: self.loaded[key] for key in keys if key in self.loaded}
+
+    @property
+    def keys(self) -> list:
+        """Ключи всех вызовов по порядку."""
+        return [key for keys in self.calls for key in keys]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function) -> bool | None:
+    """Выполняет асинхронный тест через asyncio.run."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    funcargs = pyfuncitem.funcargs
+    asyncio.run(pyfuncitem.obj(**{
+        name: funcargs[name] for name in pyfuncitem._fixtureinfo.argnames
+    }))
+    return True
+
+
+@pytest.fixture
+def counting_loader() -> type[CountingLoader]:
+    """Класс загрузчика, считающего вызовы."""
+    return CountingLoader
+
+
+@pytest.fixture
+def namespace() -> str:
+    """Пространство имен кэша в тестах."""
+    return 'test'
+
+
+@pytest.fixture
+def load(namespace: str) -> Callable:
+    """Функция загрузки ключей через кэш."""
+    def load_keys(cache: AsyncCache, loader: Callable, *keys: Any):
+        return cache.get_or_load_many(namespace, keys, loader, TTL, str)
+    return load_keys
+
+
+@pytest.fixture
+def in_request() -> Callable:
+    """Функция, выполняющая ASGI-приложение в пределах запроса."""
+    async def run_request(app: Callable) -> None:
+        await DataLoaderMiddleware(app)({'type': 'http'}, None, None)
+    return run_request
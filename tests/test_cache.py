@@ -0,0 +1,96 @@
+"""Тесты внутрипроцессного кэша core.cache."""
+import asyncio
+
+from core.cache import AsyncCache
+
+
+async def test_concurrent_misses_are_coalesced(load, counting_loader):
+    cache = AsyncCache(max_items=10, max_bytes=1000)
+    loader = counting_loader({'a': 'A', 'b': 'B'}, blocked=True)
+    first = asyncio.ensure_future(load(cache, loader, 'a', 'b'))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(load(cache, loader, 'a'))
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await first == {'a': 'A', 'b': 'B'}
+    assert await second == {'a': 'A'}
+    assert [sorted(keys) for keys in loader.calls] == [['a', 'b']]
+    assert cache.stats()['coalesced'] == 1
+
+
+async def test_hit_does_not_call_loader(load, counting_loader):
+    cache = AsyncCache(max_items=10, max_bytes=1000)
+    loader = counting_loader({'a': 'A'})
+    await load(cache, loader, 'a')
+    assert await load(cache, loader, 'a') == {'a': 'A'}
+    assert loader.calls == [['a']]
+
+
+async def test_missing_keys_are_not_cached(load, counting_loader):
+    cache = AsyncCache(max_items=10, max_bytes=1000)
+    loader = counting_loader({})
+    assert await load(cache, loader, 'a') == {'a': None}
+    loader.loaded['a'] = 'A'
+    assert await load(cache, loader, 'a') == {'a': 'A'}
+
+
+async def test_invalidation_during_load_discards_result(
+    load,
+    counting_loader,
+    namespace,
+):
+    cache = AsyncCache(max_items=10, max_bytes=1000)
+    loader = counting_loader({'a': 'old'}, blocked=True)
+    loading = asyncio.ensure_future(load(cache, loader, 'a'))
+    await asyncio.sleep(0)
+    await cache.invalidate(namespace, 'a')
+    loader.release.set()
+    # Ожидающий запрос получает результат, но в кэш он не попадает.
+    assert await loading == {'a': 'old'}
+    loader.loaded['a'] = 'new'
+    assert await load(cache, loader, 'a') == {'a': 'new'}
+    assert len(loader.calls) == 2
+
+
+async def test_least_recently_used_entry_is_evicted(load, counting_loader):
+    cache = AsyncCache(max_items=2, max_bytes=1000)
+    loader = counting_loader({'a': 'A', 'b': 'B', 'c': 'C'})
+    await load(cache, loader, 'a')
+    await load(cache, loader, 'b')
+    await load(cache, loader, 'a')
+    await load(cache, loader, 'c')
+    loader.calls.clear()
+    await load(cache, loader, 'a', 'b', 'c')
+    stats = cache.stats()
+    assert loader.calls == [['b']]
+    assert stats['evictions'] == 2
+    assert stats['entries'] == 2
+
+
+async def test_byte_limit_evicts_entries(load, counting_loader):
+    # Объем значения - длина его JSON: '"xxxx"' занимает 6 байт.
+    cache = AsyncCache(max_items=10, max_bytes=12)
+    loader = counting_loader({'a': 'aaaa', 'b': 'bbbb', 'c': 'cccc'})
+    await load(cache, loader, 'a', 'b')
+    await load(cache, loader, 'c')
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['bytes'] == 12
+    assert stats['evictions'] == 1
+
+
+async def test_value_larger_than_limit_is_not_cached(load, counting_loader):
+    cache = AsyncCache(max_items=10, max_bytes=4)
+    loader = counting_loader({'a': 'too long'})
+    await load(cache, loader, 'a')
+    await load(cache, loader, 'a')
+    assert len(loader.calls) == 2
+    assert cache.stats()['entries'] == 0
+
+
+async def test_disabled_cache_always_loads(load, counting_loader):
+    cache = AsyncCache(max_items=10, max_bytes=1000, enabled=False)
+    loader = counting_loader({'a': 'A'})
+    await load(cache, loader, 'a')
+    assert await load(cache, loader, 'a', 'b') == {'a': 'A', 'b': None}
+    assert len(loader.calls) == 2
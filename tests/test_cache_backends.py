@@ -0,0 +1,92 @@
+"""Тесты общего уровня кэша и рассылки сбросов через MemoryCacheBackend."""
+import asyncio
+
+from core.cache import AsyncCache
+from core.cache_backends import MemoryCacheBackend
+
+
+def worker_cache(backend: MemoryCacheBackend) -> AsyncCache:
+    """Кэш воркера, подключенный к общему хранилищу."""
+    return AsyncCache(max_items=10, max_bytes=1000, backend=backend)
+
+
+async def deliver() -> None:
+    """Дает подписчикам обработать разосланные сообщения."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_value_is_shared_between_workers(load, counting_loader):
+    backend = MemoryCacheBackend()
+    first, second = worker_cache(backend), worker_cache(backend)
+    loader = counting_loader({'a': 'A'})
+    await load(first, loader, 'a')
+    assert await load(second, loader, 'a') == {'a': 'A'}
+    assert loader.keys == ['a']
+    assert second.stats()['shared_hits'] == 1
+
+
+async def test_invalidation_reaches_other_workers(
+    load,
+    counting_loader,
+    namespace,
+):
+    backend = MemoryCacheBackend()
+    first, second = worker_cache(backend), worker_cache(backend)
+    await first.start()
+    await second.start()
+    await deliver()
+    loader = counting_loader({'a': 'old'})
+    await load(first, loader, 'a')
+    await load(second, loader, 'a')
+    loader.loaded['a'] = 'new'
+    await first.invalidate(namespace, 'a')
+    await deliver()
+    found = await load(second, loader, 'a')
+    await first.close()
+    await second.close()
+    assert found == {'a': 'new'}
+    assert loader.keys == ['a', 'a']
+
+
+async def test_namespace_invalidation_reaches_other_workers(
+    load,
+    counting_loader,
+    namespace,
+):
+    backend = MemoryCacheBackend()
+    first, second = worker_cache(backend), worker_cache(backend)
+    await second.start()
+    await deliver()
+    await load(second, counting_loader({'a': 'A', 'b': 'B'}), 'a', 'b')
+    await first.invalidate(namespace)
+    await deliver()
+    stats = second.stats()
+    await second.close()
+    assert stats['entries'] == 0
+    assert stats['invalidations'] == 1
+
+
+async def test_load_started_before_invalidation_is_not_shared(
+    load,
+    counting_loader,
+    namespace,
+):
+    backend = MemoryCacheBackend()
+    first, second = worker_cache(backend), worker_cache(backend)
+    slow_loader = counting_loader({'a': 'old'}, blocked=True)
+    loading = asyncio.ensure_future(load(first, slow_loader, 'a'))
+    await deliver()
+    await second.invalidate(namespace, 'a')
+    slow_loader.release.set()
+    await loading
+    loader = counting_loader({'a': 'new'})
+    assert await load(second, loader, 'a') == {'a': 'new'}
+    assert loader.keys == ['a']
+
+
+async def test_expired_shared_value_is_not_returned(namespace):
+    backend = MemoryCacheBackend()
+    await backend.store_many(namespace, {'a': b'"A"'}, {'a': '0:0'}, 0)
+    entries = await backend.fetch_many(namespace, ['a'])
+    assert entries['a'].payload is None
@@ -0,0 +1,101 @@
+"""Тесты пакетной загрузки core.dataloader."""
+import asyncio
+
+import pytest
+
+from core.dataloader import DataLoader, clear_request_keys, request_loader
+
+
+async def test_concurrent_loads_are_batched(counting_loader):
+    batch_load = counting_loader({1: 'one', 2: 'two'})
+    loader = DataLoader(batch_load)
+    loaded = await asyncio.gather(
+        loader.load(1),
+        loader.load(2),
+        loader.load(3),
+    )
+    assert loaded == ['one', 'two', None]
+    assert batch_load.calls == [[1, 2, 3]]
+
+
+async def test_loaded_keys_are_memoized(counting_loader):
+    batch_load = counting_loader({1: 'one', 2: 'two'})
+    loader = DataLoader(batch_load)
+    await loader.load(1)
+    assert await loader.load_many([1, 2, 2]) == {1: 'one', 2: 'two'}
+    assert batch_load.calls == [[1], [2]]
+
+
+async def test_clear_forgets_loaded_keys(counting_loader):
+    batch_load = counting_loader({1: 'old'})
+    loader = DataLoader(batch_load)
+    await loader.load(1)
+    batch_load.loaded[1] = 'new'
+    loader.clear(1)
+    assert await loader.load(1) == 'new'
+    assert batch_load.calls == [[1], [1]]
+
+
+async def test_batch_error_is_raised_and_not_memoized(counting_loader):
+    batch_load = counting_loader({1: 'one'}, error=ValueError('нет связи'))
+    loader = DataLoader(batch_load)
+    failed = await asyncio.gather(
+        loader.load(1),
+        loader.load(2),
+        return_exceptions=True,
+    )
+    batch_load.error = None
+    assert all(isinstance(error, ValueError) for error in failed)
+    assert await loader.load(1) == 'one'
+    assert batch_load.calls == [[1, 2], [1]]
+
+
+async def test_loaders_are_shared_within_request(in_request, counting_loader):
+    loaders = []
+
+    async def app(scope, receive, send):
+        batch_load = counting_loader({})
+        loaders.append(request_loader(('reviews',), batch_load))
+        loaders.append(request_loader(('reviews',), batch_load))
+        loaders.append(request_loader(('votes',), batch_load))
+
+    await in_request(app)
+    assert loaders[0] is loaders[1]
+    assert loaders[0] is not loaders[2]
+
+
+def test_loaders_are_not_shared_outside_request(counting_loader):
+    batch_load = counting_loader({})
+    first = request_loader(('reviews',), batch_load)
+    assert first is not request_loader(('reviews',), batch_load)
+
+
+async def test_clear_request_keys_clears_loaders_of_kind(
+    in_request,
+    counting_loader,
+):
+    batch_load = counting_loader({1: 'one'})
+
+    async def app(scope, receive, send):
+        fields_loader = request_loader(('reviews', 'id'), batch_load)
+        await fields_loader.load(1)
+        clear_request_keys('reviews', 1)
+        await fields_loader.load(1)
+
+    await in_request(app)
+    assert batch_load.calls == [[1], [1]]
+
+
+async def test_middleware_resets_loaders_after_error(
+    in_request,
+    counting_loader,
+):
+    async def app(scope, receive, send):
+        request_loader(('reviews',), counting_loader({}))
+        raise RuntimeError('ошибка обработчика')
+
+    with pytest.raises(RuntimeError):
+        await in_request(app)
+    batch_load = counting_loader({})
+    first = request_loader(('reviews',), batch_load)
+    assert first is not request_loader(('reviews',), batch_load)
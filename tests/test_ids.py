@@ -0,0 +1,70 @@
+"""Тесты генератора UUIDv7 db.ids."""
+from datetime import datetime, timedelta, timezone
+import time
+from uuid import UUID
+
+from db.ids import MAX_COUNTER, Uuid7Generator, uuid7, uuid7_bounds
+
+NOW_MS = 1_700_000_000_000
+
+
+def timestamp_ms(uuid_value) -> int:
+    """Время создания из старших 48 бит UUIDv7."""
+    return uuid_value.int >> 80
+
+
+def test_version_and_variant():
+    generated = uuid7()
+    assert generated.version == 7
+    assert generated.variant == 'specified in RFC 4122'
+
+
+def test_timestamp_is_current_time():
+    before = time.time_ns() // 1_000_000
+    generated = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert before <= timestamp_ms(generated) <= after
+
+
+def test_ids_increase_in_generation_order():
+    generated = [uuid7() for _ in range(10_000)]
+    assert generated == sorted(generated)
+    assert len(set(generated)) == len(generated)
+
+
+def test_counter_overflow_moves_to_next_millisecond(monkeypatch):
+    monkeypatch.setattr(time, 'time_ns', lambda: NOW_MS * 1_000_000)
+    generate = Uuid7Generator()
+    generated = [generate() for _ in range(MAX_COUNTER + 2)]
+    assert generated == sorted(generated)
+    assert timestamp_ms(generated[0]) == NOW_MS
+    assert timestamp_ms(generated[-1]) == NOW_MS + 1
+
+
+def test_ids_increase_when_clock_goes_back(monkeypatch):
+    clock = iter([NOW_MS, NOW_MS - 5, NOW_MS + 1])
+    monkeypatch.setattr(time, 'time_ns', lambda: next(clock) * 1_000_000)
+    generate = Uuid7Generator()
+    generated = [generate() for _ in range(3)]
+    assert generated == sorted(generated)
+    assert timestamp_ms(generated[1]) == NOW_MS
+    assert timestamp_ms(generated[2]) == NOW_MS + 1
+
+
+def test_bounds_contain_ids_of_period():
+    now = datetime.now(timezone.utc)
+    bounds = uuid7_bounds(now - timedelta(days=1), now + timedelta(seconds=1))
+    assert bounds['$gte'] <= uuid7() <= bounds['$lte']
+
+
+def test_bounds_exclude_earlier_ids_and_legacy_uuid4():
+    now = datetime.now(timezone.utc)
+    bounds = uuid7_bounds(now - timedelta(days=1), now + timedelta(seconds=1))
+    later = uuid7_bounds(now + timedelta(days=1), now + timedelta(days=2))
+    assert uuid7() < later['$gte']
+    # Старшие биты UUIDv4 случайны: выше и ниже промежутка UUIDv7.
+    for legacy in (
+        UUID('f1e2d3c4-0000-4000-8000-000000000000'),
+        UUID('00000000-0000-4000-8000-000000000000'),
+    ):
+        assert not bounds['$gte'] <= legacy <= bounds['$lte']
@@ -0,0 +1,16 @@
+"""Тесты форм запросов db.index_audit."""
+from db.index_audit import get_query_shapes
+
+
+def test_keyset_lists_have_cursor_page_shapes():
+    shapes = {shape.name: shape for shape in get_query_shapes()}
+    keyset_names = [
+        name for name, shape in shapes.items()
+        if len(shape.sort) == 2 and not name.endswith('(cursor)')
+    ]
+    assert 'ReviewService.get_filmwork_reviews(rating)' in keyset_names
+    for name in keyset_names:
+        cursor_shape = shapes['{0} (cursor)'.format(name)]
+        assert cursor_shape.sort == shapes[name].sort
+        assert '$or' in cursor_shape.filter
+        assert cursor_shape.filter.items() >= shapes[name].filter.items()
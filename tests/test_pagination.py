@@ -0,0 +1,131 @@
+"""Тесты курсорной пагинации services.pagination."""
+import base64
+from datetime import datetime, timezone
+from http import HTTPStatus
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import HTTPException
+import orjson
+import pytest
+
+from services.pagination import (
+    batched,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    next_cursor,
+)
+
+
+@pytest.mark.parametrize(('sort_by', 'sort_value'), [
+    ('created_at', datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+    ('updated_at', datetime(2024, 5, 1, 12, 30)),
+    ('rating', 7),
+    ('rating', 0),
+    ('rating', None),
+])
+def test_cursor_round_trip(sort_by, sort_value):
+    last_id = uuid4()
+    cursor = encode_cursor(sort_by, sort_value, last_id)
+    assert decode_cursor(cursor, sort_by) == (sort_value, last_id)
+
+
+@pytest.mark.parametrize('cursor', [
+    'не base64',
+    'bm90IGpzb24=',
+    encode_cursor('rating', 1, uuid4())[:-4],
+])
+def test_damaged_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 'rating')
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def raw_cursor(*payload) -> str:
+    """Курсор с произвольным содержимым, как у подделанного курсора."""
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode()
+
+
+@pytest.mark.parametrize('sort_value', [
+    {'$ne': None},
+    {'$gt': 0},
+    [1],
+    True,
+    7.5,
+    '7',
+])
+def test_rating_cursor_with_non_integer_is_rejected(sort_value):
+    cursor = raw_cursor('rating', sort_value, str(uuid4()))
+    with pytest.raises(HTTPException) as error:
+        keyset_filter('rating', cursor, nullable=True)
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize('sort_value', [
+    'не дата',
+    '2024-13-45T00:00:00',
+    {'$ne': None},
+    None,
+    1714566600,
+])
+def test_date_cursor_with_invalid_date_is_rejected(sort_value):
+    cursor = raw_cursor('created_at', sort_value, str(uuid4()))
+    with pytest.raises(HTTPException) as error:
+        keyset_filter('created_at', cursor)
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_cursor_of_other_sort_is_rejected():
+    cursor = encode_cursor('rating', 1, uuid4())
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 'created_at')
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_first_page_has_no_filter():
+    assert keyset_filter('rating', None) == {}
+
+
+def test_filter_after_value():
+    last_id = uuid4()
+    cursor = encode_cursor('rating', 5, last_id)
+    assert keyset_filter('rating', cursor, nullable=True) == {'$or': [
+        {'rating': {'$lt': 5}},
+        {'rating': 5, '_id': {'$lt': last_id}},
+        {'rating': None},
+    ]}
+
+
+def test_filter_after_null_rating():
+    last_id = uuid4()
+    cursor = encode_cursor('rating', None, last_id)
+    # Пустые оценки идут в конце: дальше только пустые с меньшим _id.
+    assert keyset_filter('rating', cursor, nullable=True) == {
+        'rating': None,
+        '_id': {'$lt': last_id},
+    }
+
+
+def test_next_cursor_points_after_last_document():
+    documents = [
+        SimpleNamespace(id=uuid4(), rating=rating)
+        for rating in (9, None)
+    ]
+    cursor = next_cursor('rating', documents, limit=2)
+    assert decode_cursor(cursor, 'rating') == (None, documents[-1].id)
+
+
+def test_partial_page_has_no_next_cursor():
+    documents = [SimpleNamespace(id=uuid4(), rating=1)]
+    assert next_cursor('rating', documents, limit=2) is None
+    assert next_cursor('rating', [], limit=2) is None
+
+
+async def test_batched_groups_stream():
+    async def numbers():
+        for number in range(5):
+            yield number
+
+    batches = [batch async for batch in batched(numbers(), 2)]
+    assert batches == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,24 @@
+"""Тесты чтения голосов пользователя services.review_like."""
+from uuid import uuid4
+
+from services.review_like import ReviewLikeService
+
+
+async def test_forgotten_votes_are_loaded_again(monkeypatch, in_request):
+    user_id, review_id = uuid4(), uuid4()
+    batches = []
+
+    async def load_user_votes(keys):
+        batches.append(keys)
+        return {key: True for key in keys}
+
+    monkeypatch.setattr(ReviewLikeService, '_load_user_votes', load_user_votes)
+
+    async def app(scope, receive, send):
+        await ReviewLikeService.get_user_votes([review_id], user_id)
+        await ReviewLikeService.get_user_votes([review_id], user_id)
+        ReviewLikeService.forget_user_votes([review_id], user_id)
+        await ReviewLikeService.get_user_votes([review_id], user_id)
+
+    await in_request(app)
+    assert batches == [[(user_id, review_id)], [(user_id, review_id)]]
@@ -0,0 +1,111 @@
+"""Тесты отложенной записи core.write_buffer."""
+import asyncio
+
+from core.write_buffer import WriteBehindBuffer
+
+
+class RecordingWriter:
+    """Writer, который запоминает записанные пачки."""
+
+    def __init__(self) -> None:
+        self.batches: list[list] = []
+        self.error: Exception | None = None
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, changes: list) -> None:
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        self.batches.append(changes)
+
+
+def make_buffer(writer: RecordingWriter, **options) -> WriteBehindBuffer:
+    """Буфер с настройками по умолчанию для тестов."""
+    settings = {'max_items': 100, 'flush_size': 10, 'flush_interval': 60}
+    return WriteBehindBuffer(writer, **{**settings, **options})
+
+
+async def test_changes_of_one_key_are_coalesced():
+    writer = RecordingWriter()
+    buffer = make_buffer(writer)
+    await buffer.put('a', 1)
+    await buffer.put('b', 2)
+    await buffer.put('a', 3)
+    assert (len(buffer), buffer.get('a')) == (2, 3)
+    await buffer.flush()
+    assert writer.batches == [[3, 2]]
+    assert len(buffer) == 0
+
+
+async def test_flush_writes_chunks_of_flush_size():
+    writer = RecordingWriter()
+    buffer = make_buffer(writer, flush_size=2)
+    for key in range(5):
+        await buffer.put(key, key)
+    await buffer.flush()
+    batches = writer.batches
+    assert sorted(map(len, batches)) == [1, 2, 2]
+    assert sorted(change for batch in batches for change in batch) == [
+        0, 1, 2, 3, 4,
+    ]
+
+
+async def test_failed_chunk_returns_to_buffer():
+    writer = RecordingWriter()
+    writer.error = ConnectionError('нет связи')
+    buffer = make_buffer(writer)
+    await buffer.put('a', 1)
+    await buffer.flush()
+    assert (len(buffer), buffer.get('a')) == (1, 1)
+
+
+async def test_failed_chunk_keeps_newer_change():
+    writer = RecordingWriter()
+    writer.error = ConnectionError('нет связи')
+    writer.release.clear()
+    buffer = make_buffer(writer)
+    await buffer.put('a', 1)
+    flushing = asyncio.ensure_future(buffer.flush())
+    await asyncio.sleep(0)
+    await buffer.put('a', 2)
+    writer.release.set()
+    await flushing
+    assert buffer.get('a') == 2
+
+
+async def test_full_buffer_is_flushed_before_put():
+    writer = RecordingWriter()
+    buffer = make_buffer(writer, max_items=2)
+    await buffer.put('a', 1)
+    await buffer.put('b', 2)
+    await buffer.put('a', 3)
+    assert writer.batches == []
+    await buffer.put('c', 4)
+    assert writer.batches == [[3, 2]]
+    assert len(buffer) == 1
+
+
+async def test_background_task_flushes_at_flush_size():
+    writer = RecordingWriter()
+    buffer = make_buffer(writer, flush_size=2)
+    await buffer.start()
+    await buffer.put('a', 1)
+    await buffer.put('b', 2)
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert writer.batches == [[1, 2]]
+    await buffer.put('c', 3)
+    await buffer.close()
+    assert writer.batches == [[1, 2], [3]]
+
+
+async def test_background_task_flushes_after_interval():
+    writer = RecordingWriter()
+    buffer = make_buffer(writer, flush_interval=0.01)
+    await buffer.start()
+    await buffer.put('a', 1)
+    await asyncio.sleep(0.05)
+    written = list(writer.batches)
+    await buffer.close()
+    assert written == [[1]]